@@ -21,6 +21,13 @@
 # 3. (`CURENV_3`) The user uses the interactive shell.
 # 4. (`CURENV_4`) The user deactivates the Base configuration.
 #
+# This script is also sourced by `base` to configure an environment without
+# an interactive shell (`base --export` and `base run`), referred to as
+# `RUNENV`.  In this case, the environment is configured (`CURENV_2`) but the
+# interactive shell is not: the prompt, `bcd` completion, and the directory
+# index are not configured, and background jobs and `_base_lazy`
+# initializers are run immediately.
+#
 # It is best to read this script from top to bottom since execution order is
 # relevant.
 
@@ -45,6 +52,13 @@ _base_help() {
   echo "Usage: base [label]             run in a new Bash shell"
   echo "       . base [label]           copy env and run in a new Bash shell"
   echo "       . base_activate [label]  run in the current Bash shell"
+  echo "       base @label              run in a registered Base directory"
+  echo "       base --export[=FORMAT] [label]"
+  echo "                                print environment changes and exit"
+  echo "       base run [label] -- COMMAND [ARG...]"
+  echo "                                run a command in a Base environment"
+  echo "       base each [-j JOBS] [ROOT] -- COMMAND [ARG...]"
+  echo "                                run a command in each Base under ROOT"
   echo "       base --help              show this usage information and exit"
   echo "       base --version           show version information and exit"
   echo ""
@@ -52,6 +66,76 @@ _base_help() {
   echo "directory.  See the manpage (man base) for details."
 }
 
+# ### Function `_base_registry_find`
+#
+# This function finds a Base directory in the registry by label.
+#
+# The registry is a file named `registry` in the directory specified by the
+# `BASE_STATE_DIR` environment variable (see the state management API, which
+# is not defined at this point).  A record is appended to it each time that a
+# Base environment is configured (see the registry section).  Each record
+# contains the time of the activation (in seconds since the epoch), the Base
+# label, the mode, and the path of the Base directory, separated by tabs.
+# The last record of each path is used, and the most recently activated
+# directory that has the label and still exists is selected.  Only builtins
+# are used to read the registry, so no processes are created.
+#
+# When the registry has at least `100` more records than paths, it is
+# compacted to one record per path, and records of directories that no longer
+# exist are removed.
+#
+# Arguments:
+#
+# * `LABEL` (string): Base label
+#
+# Returns:
+#
+# * `0`: a Base directory is found
+# * `1`: no Base directory is registered with the label
+#
+# Side effects:
+#
+# * Environment variable `BASE_REGISTRY_PATH` is set to the Base directory
+#   path.
+# * An error is printed to `STDERR` when no Base directory is found.
+# * The registry is compacted when necessary.
+_base_registry_find () {
+  local file time label mode path tmp best=0 count=0
+  local -A times labels modes
+  file="${XDG_STATE_HOME:-${HOME}/.local/state}/base"
+  file="${BASE_STATE_DIR:-${file}}/registry"
+  BASE_REGISTRY_PATH=""
+  if [ -f "${file}" ] ; then
+    while IFS=$'\t' read -r time label mode path ; do
+      [[ "${time}" =~ ^[0-9]+$ && "${path}" == /* ]] || continue
+      times["${path}"]="${time}"
+      labels["${path}"]="${label}"
+      modes["${path}"]="${mode}"
+      (( count++ ))
+    done < "${file}"
+  fi
+  for path in "${!labels[@]}" ; do
+    [[ "${labels["${path}"]}" == "${1}" \
+      && "${times["${path}"]}" -gt "${best}" && -d "${path}" ]] || continue
+    best="${times["${path}"]}"
+    BASE_REGISTRY_PATH="${path}"
+  done
+  if [ "$(( count - ${#labels[@]} ))" -ge "100" ] ; then
+    tmp="${file}.$$"
+    for path in "${!labels[@]}" ; do
+      [ -d "${path}" ] || continue
+      printf '%s\t%s\t%s\t%s\n' \
+        "${times["${path}"]}" "${labels["${path}"]}" "${modes["${path}"]}" \
+        "${path}"
+    done > "${tmp}"
+    mv -f "${tmp}" "${file}" 2>/dev/null || rm -f "${tmp}"
+  fi
+  if [ -z "${BASE_REGISTRY_PATH}" ] ; then
+    echo "error: Base not found in registry: ${1}" >&2
+    return 1
+  fi
+}
+
 # ### Normal Execution
 #
 # This script is not meant to be executed normally.  The `--version` and
@@ -88,42 +172,62 @@ fi
 # Environment variables:
 #
 # * `BASE_LABEL_CLI` is set to the label argument when one is given.
-# * `BASE_MODE` is set to `CURENV`.
+# * `BASE_MODE` is set to `CURENV`, unless it is already set to `RUNENV`.
+#
+# When the label argument starts with `@`, the Base directory is looked up in
+# the registry using `_base_registry_find`, and the current directory is
+# changed to it.
 if [ "$#" -gt "1" ] ; then
   _base_help >&2
-  unset -f _base_help
+  unset -f _base_help _base_registry_find
   unset BASE_VERSION
   return 2
 elif [ "$#" -eq "1" ] ; then
   case "${1}" in
     "--version" )
       echo "base ${BASE_VERSION}"
-      unset -f _base_help
+      unset -f _base_help _base_registry_find
       unset BASE_VERSION
       return 0
       ;;
     "--help" )
       _base_help
-      unset -f _base_help
+      unset -f _base_help _base_registry_find
       unset BASE_VERSION
       return 0
       ;;
+    "@"?* )
+      if ! _base_registry_find "${1#@}" ; then
+        unset -f _base_help _base_registry_find
+        unset BASE_VERSION BASE_REGISTRY_PATH
+        return 1
+      fi
+      export BASE_LABEL_CLI="${1#@}"
+      ;;
     * )
       export BASE_LABEL_CLI="${1}"
       ;;
   esac
 fi
 
-unset -f _base_help
+unset -f _base_help _base_registry_find
 
 if [ -n "${BASE}" ] ; then
   echo "error: nested Bases require a new Bash shell" >&2
-  unset BASE_VERSION BASE_LABEL_CLI
+  unset BASE_VERSION BASE_LABEL_CLI BASE_REGISTRY_PATH
   return 1
 fi
 
+if [ -n "${BASE_REGISTRY_PATH}" ] ; then
+  if ! cd "${BASE_REGISTRY_PATH}" ; then
+    unset BASE_VERSION BASE_LABEL_CLI BASE_REGISTRY_PATH
+    return 1
+  fi
+  unset BASE_REGISTRY_PATH
+fi
+
 # shellcheck disable=SC2034
-BASE_MODE="CURENV"
+[ "${BASE_MODE}" == "RUNENV" ] || BASE_MODE="CURENV"
 
 # After this point, the Base environment is configured in the current Bash
 # shell.  From the above code, only the following environment variables remain
@@ -190,6 +294,354 @@ _base_lib_set_insert () {
     || _base_lib_array_append "${1}" "${2}"
 }
 
+# ### Function `_base_lib_set_remove`
+#
+# This function removes a value from a global set.
+#
+# Arguments:
+#
+# * `SET` (string): global set name
+# * `VALUE` (string): value to remove
+_base_lib_set_remove () {
+  local array="${1}[@]" value values=()
+  for value in "${!array}" ; do
+    [ "${value}" == "${2}" ] || values+=( "${value}" )
+  done
+  eval "${1}=( \"\${values[@]}\" )"
+}
+
+# ### Function `_base_lib_version_key`
+#
+# This function creates a key for sorting a string by version.
+#
+# Keys compare (using the `C` locale) in the same order as version sort
+# (`sort -V`).  A string is split into alternating non-digit and digit parts.
+# Non-digit parts are compared character by character, with `~` sorting
+# before the end of the part, which sorts before letters, which sort before
+# other characters.  Digit parts are compared numerically.  Strings that are
+# equal as versions are compared as strings.  Unlike GNU version sort, file
+# name suffixes are not handled specially.
+#
+# Arguments:
+#
+# * `STRING` (string): string to create a key for
+#
+# Side effects:
+#
+# * Environment variable `BASE_LIB_VERSION_KEY` is set to the key.
+#
+# Bash notes:
+#
+# * `LC_ALL` is set to `C` within the function so that strings are processed
+#   byte by byte.
+_base_lib_version_key () {
+  local rest="${1}" part digits idx LC_ALL=C
+  BASE_LIB_VERSION_KEY=""
+  while [ -n "${rest}" ] ; do
+    [[ "${rest}" =~ ^([^0-9]*)([0-9]*) ]]
+    part="${BASH_REMATCH[1]}"
+    digits="${BASH_REMATCH[2]}"
+    rest="${rest:${#BASH_REMATCH[0]}}"
+    for (( idx=0 ; idx<${#part} ; idx++ )) ; do
+      case "${part:${idx}:1}" in
+        "~") BASE_LIB_VERSION_KEY+="!" ;;
+        [a-zA-Z]) BASE_LIB_VERSION_KEY+="%${part:${idx}:1}" ;;
+        *) BASE_LIB_VERSION_KEY+="'${part:${idx}:1}" ;;
+      esac
+    done
+    digits="${digits#"${digits%%[!0]*}"}"
+    printf -v part '%03d' "${#digits}"
+    BASE_LIB_VERSION_KEY+="#${part}${digits}"
+  done
+  BASE_LIB_VERSION_KEY+="# ${1}"
+}
+
+# ### Function `_base_lib_version_sort`
+#
+# This function sorts a global array by version.
+#
+# Values are sorted in ascending order using keys created by
+# `_base_lib_version_key`, so no processes are created.
+#
+# Arguments:
+#
+# * `ARRAY` (string): global array name
+#
+# Side effects:
+#
+# * The array is sorted.
+#
+# Bash notes:
+#
+# * `LC_ALL` is set to `C` within the function so that keys are compared byte
+#   by byte.
+_base_lib_version_sort () {
+  local array="${1}[@]" value idx keys=() values=() LC_ALL=C
+  for value in "${!array}" ; do
+    _base_lib_version_key "${value}"
+    idx="${#keys[@]}"
+    while [ "${idx}" -gt "0" ] ; do
+      [[ "${BASE_LIB_VERSION_KEY}" < "${keys[$(( idx - 1 ))]}" ]] || break
+      keys[idx]="${keys[$(( idx - 1 ))]}"
+      values[idx]="${values[$(( idx - 1 ))]}"
+      (( idx-- ))
+    done
+    keys[idx]="${BASE_LIB_VERSION_KEY}"
+    values[idx]="${value}"
+  done
+  unset BASE_LIB_VERSION_KEY
+  eval "${1}=( \"\${values[@]}\" )"
+}
+
+##############################################################################
+# ## Cache Management
+#
+# The cache management API provides a way to store data that speeds up later
+# operations.  Cache files are stored under the directory specified by the
+# `BASE_CACHE_DIR` environment variable, which defaults to
+# `${XDG_CACHE_HOME}/base` (`${HOME}/.cache/base` when `XDG_CACHE_HOME` is not
+# set).  Cached data must always be safe to delete.
+#
+# The cache management API is available during environment configuration and
+# while the user uses the interactive shell.
+
+# ### Function `_base_cache_dir`
+#
+# This function gets the path of a cache directory, creating it if necessary.
+#
+# Arguments:
+#
+# * `NAME` (string): cache directory name, relative to `BASE_CACHE_DIR`
+#
+# Returns:
+#
+# * `0`: the cache directory exists
+# * `1`: the cache directory could not be created
+#
+# Side effects:
+#
+# * Environment variable `BASE_CACHE_PATH` is set to the directory path.
+# * The directory is created when it does not exist.
+_base_cache_dir () {
+  BASE_CACHE_PATH="${BASE_CACHE_DIR:-${XDG_CACHE_HOME:-${HOME}/.cache}/base}"
+  BASE_CACHE_PATH="${BASE_CACHE_PATH}/${1}"
+  [ -d "${BASE_CACHE_PATH}" ] || mkdir -p "${BASE_CACHE_PATH}" 2>/dev/null
+}
+
+# ### Function `_base_cache_file`
+#
+# This function gets the path of a cache file for a directory.
+#
+# The directory path is encoded in the file name by replacing `%` with `%25`
+# and `/` with `%2F`, so no processes are created.
+#
+# Arguments:
+#
+# * `NAME` (string): cache directory name, relative to `BASE_CACHE_DIR`
+# * `DIRECTORY` (string): directory path (optional, default: `BASE`)
+#
+# Returns:
+#
+# * `0`: the cache directory exists
+# * `1`: the cache directory could not be created
+#
+# Side effects:
+#
+# * Environment variable `BASE_CACHE_PATH` is set to the file path.
+# * The cache directory is created when it does not exist.
+_base_cache_file () {
+  local key="${2-${BASE}}"
+  key="${key//%/%25}"
+  _base_cache_dir "${1}" || return 1
+  BASE_CACHE_PATH="${BASE_CACHE_PATH}/${key//\//%2F}"
+}
+
+# ### Function `_base_session_dir`
+#
+# This function creates a directory for files that are only used by the
+# current shell, if it does not already exist.
+#
+# Session directories are named after the process ID of the shell.  When a
+# session directory is created, the session directories of shells that no
+# longer exist are removed.
+#
+# Returns:
+#
+# * `0`: the session directory exists
+# * `1`: the session directory could not be created
+#
+# Side effects:
+#
+# * Environment variable `BASE_SESSION_DIR` is set to the directory path.
+# * The directory is created when it does not exist.
+# * The session directories of shells that no longer exist are removed.
+_base_session_dir () {
+  local path pid
+  [ -n "${BASE_SESSION_DIR}" ] && [ -d "${BASE_SESSION_DIR}" ] && return 0
+  _base_cache_dir "session" || return 1
+  for path in "${BASE_CACHE_PATH}"/* ; do
+    pid="${path##*/}"
+    if [[ "${pid}" =~ ^[0-9]+$ ]] && ! kill -0 "${pid}" 2>/dev/null ; then
+      rm -rf "${path}"
+    fi
+  done
+  BASE_SESSION_DIR="${BASE_CACHE_PATH}/$$"
+  mkdir -p "${BASE_SESSION_DIR}" 2>/dev/null
+}
+
+# ### Function `_base_install_index`
+#
+# This function lists the subdirectories of a directory in version order,
+# using the shared installation index.
+#
+# This function is only available during environment configuration.  It is
+# used by `_base_select_dir`, so that directories of versioned installations
+# (such as `/usr/local/opt/go-1.16.3`) can be listed without scanning the
+# filesystem each time an environment is configured.
+#
+# The installation index of a directory is a cache file that is shared by all
+# Base environments.  Each line describes a subdirectory, with the name, the
+# version (the name without any leading non-digit characters), the path, and
+# the modification time (in seconds since the epoch) separated by tabs.  Lines
+# are sorted by version with the newest first, as done by
+# `_base_lib_version_sort`.  Links to directories are not included.
+#
+# The index file is given the modification time of the directory (using
+# `touch -r`) when it is written, and it is used as long as the modification
+# time of the directory is the same, so only a file read is needed.  Since the
+# times of the directory are compared with each other, the index is not
+# affected by clock differences on network filesystems.  Processes are only
+# created when the index is written.
+#
+# Arguments:
+#
+# * `DIRECTORY` (string): directory path
+#
+# Returns:
+#
+# * `0`: the subdirectories are listed
+# * `1`: the directory does not exist
+#
+# Side effects:
+#
+# * Arrays `BASE_INSTALL_NAMES`, `BASE_INSTALL_VERSIONS`, `BASE_INSTALL_PATHS`,
+#   and `BASE_INSTALL_MTIMES` are set to the name, version, path, and
+#   modification time of each subdirectory.
+# * The index file is written when it is not valid.
+# * The directory path is appended to `BASE_EXPORT_PATHS` when it is set (see
+#   `_base_export`).
+#
+# Bash notes:
+#
+# * The `dotglob`, `nullglob`, and `failglob` shell options are changed while
+#   globbing and then restored, so user settings are not affected.
+_base_install_index () {
+  local dir="${1%/}" index="" path name idx
+  local names=() paths=() mtimes=() setopts=() unsetopts=()
+  BASE_INSTALL_NAMES=()
+  BASE_INSTALL_VERSIONS=()
+  BASE_INSTALL_PATHS=()
+  BASE_INSTALL_MTIMES=()
+  [[ -n "${dir}" && "${dir}" != "." ]] || dir="${PWD}"
+  [[ "${dir}" == /* ]] || dir="${PWD}/${dir#./}"
+  [ -z "${BASE_EXPORT_PATHS+x}" ] || BASE_EXPORT_PATHS+=( "${dir}" )
+  [ -d "${dir}" ] || return 1
+  _base_cache_file "install-index" "${dir}" && index="${BASE_CACHE_PATH}"
+  if [[ -n "${index}" && -f "${index}" \
+      && ! "${dir}" -nt "${index}" && ! "${index}" -nt "${dir}" ]] ; then
+    while IFS= read -r path ; do
+      BASE_INSTALL_NAMES+=( "${path%%$'\t'*}" )
+      path="${path#*$'\t'}"
+      BASE_INSTALL_VERSIONS+=( "${path%%$'\t'*}" )
+      path="${path#*$'\t'}"
+      BASE_INSTALL_PATHS+=( "${path%$'\t'*}" )
+      BASE_INSTALL_MTIMES+=( "${path##*$'\t'}" )
+    done < "${index}"
+    return 0
+  fi
+  [ -z "${index}" ] || touch -r "${dir}" "${index}.$$.ref" 2>/dev/null \
+    || index=""
+  shopt -q dotglob || setopts+=( "dotglob" )
+  shopt -q nullglob || setopts+=( "nullglob" )
+  shopt -q failglob && unsetopts+=( "failglob" )
+  [ "${#setopts[@]}" -eq "0" ] || shopt -s "${setopts[@]}"
+  [ "${#unsetopts[@]}" -eq "0" ] || shopt -u "${unsetopts[@]}"
+  for path in "${dir}"/*/ ; do
+    path="${path%/}"
+    name="${path##*/}"
+    [[ -h "${path}" || "${name}" == *[$'\t\n']* ]] || names+=( "${name}" )
+  done
+  [ "${#setopts[@]}" -eq "0" ] || shopt -u "${setopts[@]}"
+  [ "${#unsetopts[@]}" -eq "0" ] || shopt -s "${unsetopts[@]}"
+  _base_lib_version_sort names
+  for (( idx="${#names[@]}"-1 ; idx>=0 ; idx-- )) ; do
+    name="${names[${idx}]}"
+    BASE_INSTALL_NAMES+=( "${name}" )
+    BASE_INSTALL_VERSIONS+=( "${name#"${name%%[0-9]*}"}" )
+    paths+=( "${dir}/${name}" )
+  done
+  BASE_INSTALL_PATHS=( "${paths[@]}" )
+  if [ "${#paths[@]}" -gt "0" ] ; then
+    mapfile -t mtimes < <(stat -c '%Y' -- "${paths[@]}" 2>/dev/null)
+  fi
+  for (( idx=0 ; idx<${#paths[@]} ; idx++ )) ; do
+    BASE_INSTALL_MTIMES+=( "${mtimes[${idx}]}" )
+  done
+  [ -n "${index}" ] || return 0
+  for (( idx=0 ; idx<${#paths[@]} ; idx++ )) ; do
+    printf '%s\t%s\t%s\t%s\n' "${BASE_INSTALL_NAMES[${idx}]}" \
+      "${BASE_INSTALL_VERSIONS[${idx}]}" "${paths[${idx}]}" \
+      "${BASE_INSTALL_MTIMES[${idx}]}"
+  done > "${index}.$$" \
+    && touch -r "${index}.$$.ref" "${index}.$$" 2>/dev/null \
+    && mv -f "${index}.$$" "${index}" 2>/dev/null
+  rm -f "${index}.$$" "${index}.$$.ref"
+  return 0
+}
+
+##############################################################################
+# ## State Management
+#
+# The state management API provides a way to store data that should persist,
+# such as selections made by the user.  State files are stored under the
+# directory specified by the `BASE_STATE_DIR` environment variable, which
+# defaults to `${XDG_STATE_HOME}/base` (`${HOME}/.local/state/base` when
+# `XDG_STATE_HOME` is not set).
+#
+# The state management API is available during environment configuration and
+# while the user uses the interactive shell.
+
+# ### Function `_base_state_file`
+#
+# This function gets the path of a state file for a directory.
+#
+# The directory path is encoded in the file name by replacing `%` with `%25`
+# and `/` with `%2F`, so no processes are created.
+#
+# Arguments:
+#
+# * `NAME` (string): state directory name, relative to `BASE_STATE_DIR`
+# * `DIRECTORY` (string): directory path (optional, default: `BASE`)
+#
+# Returns:
+#
+# * `0`: the state directory exists
+# * `1`: the state directory could not be created
+#
+# Side effects:
+#
+# * Environment variable `BASE_STATE_PATH` is set to the file path.
+# * The state directory is created when it does not exist.
+_base_state_file () {
+  local key="${2-${BASE}}"
+  key="${key//%/%25}"
+  BASE_STATE_PATH="${XDG_STATE_HOME:-${HOME}/.local/state}/base"
+  BASE_STATE_PATH="${BASE_STATE_DIR:-${BASE_STATE_PATH}}/${1}"
+  [ -d "${BASE_STATE_PATH}" ] || mkdir -p "${BASE_STATE_PATH}" 2>/dev/null \
+    || return 1
+  BASE_STATE_PATH="${BASE_STATE_PATH}/${key//\//%2F}"
+}
+
 ##############################################################################
 # ## Deactivation Callbacks
 #
@@ -321,6 +773,38 @@ _base_var_unset () {
   unset "${1}"
 }
 
+# ### Function `_base_var_restore`
+#
+# This function restores the value that was saved by `_base_var_save`.
+#
+# This is an internal function that should not be executed directly.  It is
+# called by `base_deactivate`, and by `_base_config_timer_stop` to undo the
+# changes of a configuration script that timed out.
+#
+# Arguments:
+#
+# * `VARIABLE` (string): global variable name
+#
+# Side effects:
+#
+# * The environment variable specified by `VARIABLE` is set to the saved
+#   value, and it is exported if it is in `BASE_VAR_EXPORTS`.  When no value
+#   is saved, the environment variable is unset.
+# * `BASE_VAR_PREV_${VARIABLE}` is unset.
+_base_var_restore () {
+  local prev="BASE_VAR_PREV_${1}"
+  if [ -n "${!prev+x}" ] ; then
+    eval "${1}=\${!prev}"
+    if _base_lib_array_contains "BASE_VAR_EXPORTS" "${1}" ; then
+      # shellcheck disable=SC2163
+      export "${1}"
+    fi
+    unset "${prev}"
+  else
+    unset "${1}"
+  fi
+}
+
 ##############################################################################
 # ## Label Management
 #
@@ -362,130 +846,1404 @@ _base_label_set_default () {
 }
 
 ##############################################################################
-# ## User Interaction Functions
-#
-# User interaction functions are available for interacting with the user
-# during environment configuration.
-#
-# User interaction functions are only available during environment
-# configuration (`CURENV_2`).
+# ## Configuration Scripts
+#
+# The configuration script API provides a way to control how configuration
+# scripts are run.
+#
+# Configuration scripts may contain directives in the comments at the start
+# of the script, in lines of the form `# base: DIRECTIVE [ARG...]`.  The
+# following directives are supported:
+#
+# * `background`: the script is run in the background (see
+#   `_base_background`)
+# * `provides NAME...`: the script provides the specified names
+# * `requires NAME...`: the script requires the specified names
+# * `timeout SECONDS`: the time limit of the script
+# * `if-exists PATH...`: the script is only run if one of the paths exists
+# * `if-command NAME...`: the script is only run if one of the commands is
+#   found on the `PATH`
+#
+# Consecutive scripts that have `provides` or `requires` directives are run
+# concurrently, and a script that requires a name that is provided by another
+# script in the group is run after that script (see
+# `_base_config_group_run`).  These scripts are run in subshells without a
+# terminal, so their changes are applied in the same way as those of
+# background jobs, and selections use the remembered or default selection.
+# Changes to the Base label are also applied.
+#
+# Scripts may be run with a time limit (see `_base_config_limit`).  A script
+# that exceeds its time limit is abandoned, a warning is displayed, and the
+# changes that it made using the variable management functions and the Base
+# label are undone, so that the shell is still usable.
+#
+# Predicate directives are checked without sourcing the script (see
+# `_base_config_predicates`), so scripts that are not relevant to a Base
+# directory are skipped without being run.  When the `BASE_CONFIG_PROFILE`
+# environment variable is set, the time taken by each script, and the scripts
+# that are skipped, are displayed (see `_base_config_profile`).
+#
+# Configuration files with a `.env` extension are environment files, which
+# declare variable changes without running any code (see `_base_config_env`).
+# Directives may be used in environment files.
+#
+# Background jobs are run after the other configuration is done, so they do
+# not delay the prompt.  The output of a background job is saved and is
+# displayed before the first prompt after the job is done.  Environment
+# variables that a background job changes using `_base_var_set` or
+# `_base_var_unset` are applied at that time using the same functions, so
+# deactivation restores them.  Changes that are made in other ways, such as
+# setting a variable directly, are not applied.  Exporting a variable that is
+# changed using the variable management API is applied.
+#
+# The configuration script API is only available during environment
+# configuration (`CURENV_2`).  The following environment variables are used
+# to manage background jobs:
+#
+# * `BASE_BACKGROUND_QUEUE` is an array of commands to run in the background.
+# * `BASE_BACKGROUND_JOBS` is an array of the IDs of running jobs.
+# * `BASE_CONFIG_GROUP` is an array of the paths of the scripts in the
+#   current group of scripts that declare dependencies.
+# * `BASE_CONFIG_PROVIDES` and `BASE_CONFIG_REQUIRES` are arrays of the names
+#   that the scripts in the group provide and require.
+# * `BASE_CONFIG_LIMITS` is an array of the time limits of the scripts in the
+#   group.
+#
+# Commands can also be registered using `_base_lazy` so that they are
+# initialized when they are first run.
 
-# ### Function `_base_select`
-#
-# This function prompts the user to select an option.
+# ### Function `_base_config_directives`
 #
-# An indexed list of options is displayed, and the user selects an option by
-# index.  An invalid selection results in the default: the first option.  The
-# selected option value (not index) is stored in the `BASE_SELECTION`
-# environment variable.
+# This function reads the directives of a configuration script.
 #
-# If only one option is passed, it is selected without prompting the user.  If
-# no options are passed, a warning is displayed and `BASE_SELECTION` is unset.
+# Directives are read from the comments and blank lines at the start of the
+# script, using only builtins.
 #
 # Arguments:
 #
-# * `LABEL` (string): label to display in the selection prompt
-# * `OPTION` (string): one or more options to select from
-#
-# Returns:
-#
-# * `0`: `BASE_SELECTION` is set
-# * `1`: `BASE_SELECTION` is unset
+# * `FILE` (string): configuration script path
 #
 # Side effects:
 #
-# * When multiple options are available, the list of options is displayed and
-#   a selection is read.
-# * Environment variable `BASE_SELECTION` is set or unset.
-_base_select () {
-  declare -g BASE_SELECTION
-
-  if [ "$#" -le "1" ] ; then
-    echo "warning: _base_select called without options" >&2
-    unset BASE_SELECTION
-    return 1
-  fi
-
-  if [ "$#" -eq "2" ] ; then
-    BASE_SELECTION="${2}"
-    return 0
-  fi
-
-  local args=( "$@" ) len=0 idx=1
-  len=${#args[@]}
-
-  while [ "${idx}" -lt "${len}" ] ; do
-    echo "${idx}) ${args[$idx]}"
-    (( idx++ ))
-  done
-  read -rp "Select ${1} [1]: " idx
-  if [[ "${idx}" =~ ^[0-9]+$ && \
-      "${idx}" -gt "0" && "${idx}" -lt "${len}" ]] ; then
-    BASE_SELECTION="${args[${idx}]}"
-    return 0
-  fi
-
-  # shellcheck disable=SC2034
-  BASE_SELECTION="${array[0]}"
-  return 0
+# * The `BASE_CONFIG_DIRECTIVES` array is set to the directives, each
+#   containing the directive name and any arguments.
+_base_config_directives () {
+  local line
+  BASE_CONFIG_DIRECTIVES=()
+  while IFS= read -r line ; do
+    [[ -z "${line}" || "${line}" == "#"* ]] || break
+    if [[ "${line}" =~ ^#\ base:\ *([^ ].*[^ ]|[^ ])\ *$ ]] ; then
+      BASE_CONFIG_DIRECTIVES+=( "${BASH_REMATCH[1]}" )
+    fi
+  done < "${1}"
 }
 
-# ### Function `_base_select_dir`
+# ### Function `_base_background`
 #
-# This function prompts the user to select a directory.
+# This function runs a command in the background.
 #
-# This function calls `_base_select` with directory names as options.  If no
-# directories are found, a warning is displayed.
+# The command is queued and run after the other configuration is done.  It
+# may be a function that is defined by the configuration script.  When a
+# background job runs `_base_background`, the command is run immediately.
 #
 # Arguments:
 #
-# * `LABEL` (string): label to display in the selection prompt
-# * `DIRECTORY` (string): parent directory path
-# * `GLOB` (string): directory options pattern
-#
-# Returns:
-#
-# * `0`: `BASE_SELECTION` is set
-# * `1`: `BASE_SELECTION` is unset
+# * `COMMAND` (string): command to run
+# * `ARG` (string): zero or more arguments
 #
 # Side effects:
 #
-# * When multiple options are available, the list of options is displayed and
-#   a selection is read.
-# * Environment variable `BASE_SELECTION` is set or unset.
-_base_select_dir () {
-  local opts=()
-  while IFS= read -r -d $'\0'; do
-    opts+=( "$(basename "${REPLY}" )" )
-  done < <(find "${2}" -maxdepth 1 -type d -name "${3}" -print0 | sort -zrV)
-  if [ "${#opts[@]}" -gt "0" ] ; then
-    _base_select "${1}" "${opts[@]}"
-    return $?
-  else
-    echo "warning: no ${1} directories found" >&2
-    return 1
-  fi
+# * The command is appended to `BASE_BACKGROUND_QUEUE`.
+_base_background () {
+  local cmd
+  printf -v cmd '%q ' "$@"
+  BASE_BACKGROUND_QUEUE+=( "${cmd}" )
 }
 
-##############################################################################
-# ## Core Configuration
+# ### Function `_base_background_run`
 #
-# This section configures a Base environment.
-
-# ### Base Directory
+# This function runs a background job.
 #
-# The full path of the Base directory is stored in the `BASE` environment
-# variable.
-BASE="${PWD}"
+# This is an internal function that should not be executed directly.  It is
+# run in a subshell by `_base_background_start` and
+# `_base_config_group_run`.
+#
+# The output of the command is saved to `bg-${ID}.out` in the session
+# directory.  The variable management functions are replaced so that each
+# change is recorded, in order.  Colon-separated lists are changed relative
+# to the value that the variable had before the change: a value that ends
+# with `:` and the previous value is recorded as a `prepend` record, and a
+# value that starts with the previous value and `:` is recorded as an
+# `append` record.  Other changes are recorded as `set` and `unset` records,
+# so that other variables are never partially edited.  This way, changes
+# that several jobs make to the same list, such as prepending directories to
+# the `PATH`, are all applied.
+# The export state of each changed variable is then recorded as an `export`
+# record.  Deactivation callbacks are recorded as `callback` records, lazy
+# commands registered using `_base_lazy` are recorded as `lazy` records, and
+# functions that the command defines are recorded as `function` records, so
+# that they are available in the interactive shell.  When the Base label is
+# changed, a `label` record is saved.  Records are saved to `bg-${ID}.vars`,
+# with values quoted using `printf %q`, and file `bg-${ID}.done` is created
+# when the job is done.
+#
+# The command is run with no positional parameters, and the state of the job
+# is stored in global variables with a `BASE_BACKGROUND_` prefix so that
+# configuration scripts do not change it.
+#
+# Arguments:
+#
+# * `ID` (string): job ID
+# * `COMMAND` (string): command to run, quoted for `eval`
+_base_background_run () {
+  BASE_BACKGROUND_FILE="${BASE_SESSION_DIR}/bg-${1}"
+  BASE_BACKGROUND_CMD="${2}"
+  BASE_BACKGROUND_LABEL="${BASE_LABEL}"
+  BASE_BACKGROUND_VARS=()
+  BASE_BACKGROUND_CHANGES=()
+  declare -gA BASE_BACKGROUND_FUNCS=()
+  _base_var_set () {
+    BASE_BACKGROUND_VARS+=( "${1}" )
+    BASE_BACKGROUND_OP="set"
+    BASE_BACKGROUND_VALUE="${2}"
+    if [[ -n "${!1}" && "${2}" == *":${!1}" ]] ; then
+      BASE_BACKGROUND_OP="prepend"
+      BASE_BACKGROUND_VALUE="${2%"${!1}"}"
+    elif [[ -n "${!1}" && "${2}" == "${!1}:"* ]] ; then
+      BASE_BACKGROUND_OP="append"
+      BASE_BACKGROUND_VALUE="${2#"${!1}"}"
+    fi
+    printf -v BASE_BACKGROUND_OP '%s %q %q' \
+      "${BASE_BACKGROUND_OP}" "${1}" "${BASE_BACKGROUND_VALUE}"
+    BASE_BACKGROUND_CHANGES+=( "${BASE_BACKGROUND_OP}" )
+    eval "${1}=\${2}"
+  }
+  _base_var_unset () {
+    BASE_BACKGROUND_VARS+=( "${1}" )
+    printf -v BASE_BACKGROUND_OP 'unset %q' "${1}"
+    BASE_BACKGROUND_CHANGES+=( "${BASE_BACKGROUND_OP}" )
+    unset "${1}"
+  }
+  _base_deactivation_callback_register () {
+    printf -v BASE_BACKGROUND_OP 'callback %q' "${1}"
+    BASE_BACKGROUND_CHANGES+=( "${BASE_BACKGROUND_OP}" )
+  }
+  _base_lazy () {
+    printf -v BASE_BACKGROUND_OP '%q ' "$@"
+    BASE_BACKGROUND_CHANGES+=( "lazy ${BASE_BACKGROUND_OP}" )
+  }
+  _base_background () {
+    "$@"
+  }
+  while read -r _ _ BASE_BACKGROUND_OP ; do
+    BASE_BACKGROUND_FUNCS[${BASE_BACKGROUND_OP}]=1
+  done < <(declare -F)
+  set --
+  eval "${BASE_BACKGROUND_CMD}" > "${BASE_BACKGROUND_FILE}.out" 2>&1 \
+    < /dev/null
+  {
+    while read -r _ _ BASE_BACKGROUND_OP ; do
+      [ -z "${BASE_BACKGROUND_FUNCS[${BASE_BACKGROUND_OP}]}" ] || continue
+      printf 'function %q\n' "$(declare -f "${BASE_BACKGROUND_OP}")"
+    done < <(declare -F)
+    [ "${#BASE_BACKGROUND_CHANGES[@]}" -eq "0" ] \
+      || printf '%s\n' "${BASE_BACKGROUND_CHANGES[@]}"
+    for BASE_BACKGROUND_CMD in "${BASE_BACKGROUND_VARS[@]}" ; do
+      set -- "${BASE_BACKGROUND_CMD}"
+      [[ "${!1@a}" == *x* ]] && printf 'export %q\n' "${1}"
+    done
+    if [ "${BASE_LABEL}" != "${BASE_BACKGROUND_LABEL}" ] ; then
+      printf 'label %q\n' "${BASE_LABEL}"
+    fi
+  } > "${BASE_BACKGROUND_FILE}.vars"
+  : > "${BASE_BACKGROUND_FILE}.done"
+}
 
-# ### Base Label
+# ### Function `_base_background_apply`
 #
-# If the Base label was not specified using a CLI argument, then it defaults
-# to the basename of the Base directory.
+# This function applies the results of a background job that is done.
 #
-# Note that the Base label can be changed in user configuration through the
-# label management API.
-if [ -n "${BASE_LABEL_CLI}" ] ; then
+# This is an internal function that should not be executed directly.
+#
+# The output of the job is displayed, and the records saved by
+# `_base_background_run` are applied in order: functions are defined,
+# variables are changed using the variable management functions, relative to
+# their current values for `prepend` and `append` records (without the `:`
+# separator when the current value is empty), deactivation callbacks are
+# registered, lazy commands are registered using `_base_lazy`, and the Base
+# label is set.  Lazy commands can only be registered while the
+# configuration is loaded, so a warning is displayed for `lazy` records of
+# jobs that are started using `_base_background`.
+#
+# Arguments:
+#
+# * `ID` (string): job ID
+#
+# Side effects:
+#
+# * The output of the job is displayed.
+# * Functions are defined, and environment variables are changed.
+# * Deactivation callbacks are appended to `BASE_DEACTIVATION_CALLBACKS`.
+# * Lazy commands are registered.
+# * The cache of commands is reset, so that any new `PATH` settings are used.
+_base_background_apply () {
+  local file="${BASE_SESSION_DIR}/bg-${1}" out="" line op name value cb
+  IFS= read -r -d '' out < "${file}.out"
+  if [ -n "${out}" ] ; then
+    printf '%s' "${out}"
+    [[ "${out}" == *$'\n' ]] || echo
+  fi
+  while IFS= read -r line ; do
+    op="${line%% *}"
+    line="${line#* }"
+    name="${line%% *}"
+    case "${op}" in
+      "set")
+        eval "value=${line#* }"
+        _base_var_set "${name}" "${value}"
+        ;;
+      "prepend")
+        eval "value=${line#* }"
+        [ -n "${!name}" ] || value="${value%:}"
+        _base_var_set "${name}" "${value}${!name}"
+        ;;
+      "append")
+        eval "value=${line#* }"
+        [ -n "${!name}" ] || value="${value#:}"
+        _base_var_set "${name}" "${!name}${value}"
+        ;;
+      "export")
+        # shellcheck disable=SC2163
+        export "${name}"
+        ;;
+      "unset")
+        _base_var_unset "${name}"
+        ;;
+      "callback")
+        eval "value=${line}"
+        for cb in "${BASE_DEACTIVATION_CALLBACKS[@]}" ; do
+          [ "${cb}" != "${value}" ] || continue 2
+        done
+        BASE_DEACTIVATION_CALLBACKS+=( "${value}" )
+        ;;
+      "lazy")
+        if declare -F _base_lazy > /dev/null ; then
+          eval "_base_lazy ${line}"
+        else
+          eval "value=${name}"
+          echo "warning: _base_lazy is not supported in background jobs:" \
+            "${value}" >&2
+        fi
+        ;;
+      "function")
+        eval "value=${line}"
+        eval "${value}"
+        ;;
+      "label")
+        eval "BASE_LABEL=${line}"
+        ;;
+    esac
+  done < "${file}.vars"
+  hash -r
+}
+
+# ### Function `_base_background_start`
+#
+# This function starts the queued background jobs.
+#
+# This is an internal function that should not be executed directly.  It is
+# called after the user configuration is done.
+#
+# Each job is run in a subshell that is started from another subshell, so
+# that the job is not managed by the interactive shell and no job control
+# messages are displayed.  When the session directory cannot be created, or
+# when there is no interactive shell (`RUNENV`), the commands are run
+# immediately instead.
+#
+# Side effects:
+#
+# * Background jobs are started, and their IDs are appended to
+#   `BASE_BACKGROUND_JOBS`.
+# * `BASE_BACKGROUND_QUEUE` is unset.
+_base_background_start () {
+  local idx
+  for (( idx=0 ; idx<${#BASE_BACKGROUND_QUEUE[@]} ; idx++ )) ; do
+    if [ "${BASE_MODE}" != "RUNENV" ] && _base_session_dir ; then
+      ( _base_background_run "${idx}" "${BASE_BACKGROUND_QUEUE[${idx}]}" & )
+      BASE_BACKGROUND_JOBS+=( "${idx}" )
+    else
+      eval "${BASE_BACKGROUND_QUEUE[${idx}]}"
+    fi
+  done
+  unset BASE_BACKGROUND_QUEUE
+}
+
+# ### Function `_base_background_collect`
+#
+# This function collects the results of background jobs that are done.
+#
+# This is an internal function that should not be executed directly.  It is
+# called by `_base_ps_update` while there are background jobs, so that
+# results are collected before a prompt is displayed.
+#
+# The results of each job that is done are applied using
+# `_base_background_apply`.  A job is done when its `bg-${ID}.done` file
+# exists, so only builtins are used to check.  When no jobs or `_base_lazy`
+# stubs remain, the variable management functions are unset.
+#
+# Side effects:
+#
+# * The output of jobs that are done is displayed.
+# * Environment variables are changed.
+# * The IDs of jobs that are done are removed from `BASE_BACKGROUND_JOBS`,
+#   which is unset when all jobs are done.
+_base_background_collect () {
+  local id jobs=()
+  for id in "${BASE_BACKGROUND_JOBS[@]}" ; do
+    if [ -e "${BASE_SESSION_DIR}/bg-${id}.done" ] ; then
+      _base_background_apply "${id}"
+    else
+      jobs+=( "${id}" )
+    fi
+  done
+  if [ "${#jobs[@]}" -gt "0" ] ; then
+    BASE_BACKGROUND_JOBS=( "${jobs[@]}" )
+  else
+    unset BASE_BACKGROUND_JOBS
+    if [ -z "${BASE_LAZY_NAMES+x}" ] ; then
+      unset -f _base_var_save _base_var_set _base_var_unset
+    fi
+  fi
+}
+
+# ### Function `_base_config_env`
+#
+# This function applies an environment file.
+#
+# This is an internal function that should not be executed directly.
+#
+# Environment files are configuration files with a `.env` extension.  They are
+# parsed using only builtins, without running any code, and changes are made
+# using `_base_var_set` and `_base_var_unset`.  Each line has one of the
+# following forms:
+#
+# * `NAME=VALUE` sets and exports a variable.  An `export` prefix is allowed.
+# * `NAME+=VALUE` prepends `VALUE` to a colon-separated list, such as `PATH`,
+#   and exports the variable.  A relative `VALUE` is relative to the Base
+#   directory.
+# * `unset NAME` unsets a variable.
+#
+# Blank lines and lines that start with `#` are ignored.  Values are parsed
+# by `_base_config_env_value`.  A warning is displayed for lines that cannot
+# be parsed.
+#
+# Arguments:
+#
+# * `FILE` (string): environment file path
+#
+# Side effects:
+#
+# * Environment variables are changed.
+_base_config_env () {
+  local line num=0 name op value
+  local re='^(export +)?([A-Za-z_][A-Za-z0-9_]*)(\+?=)(.*)$'
+  while IFS= read -r line || [ -n "${line}" ] ; do
+    (( num++ ))
+    line="${line#"${line%%[![:space:]]*}"}"
+    line="${line%"${line##*[![:space:]]}"}"
+    [[ -z "${line}" || "${line}" == "#"* ]] && continue
+    name=""
+    if [[ "${line}" =~ ^unset\ +([A-Za-z_][A-Za-z0-9_]*)$ ]] ; then
+      _base_var_unset "${BASH_REMATCH[1]}"
+      continue
+    fi
+    if [[ "${line}" =~ ${re} ]] ; then
+      name="${BASH_REMATCH[2]}"
+      op="${BASH_REMATCH[3]}"
+      value="${BASH_REMATCH[4]}"
+    fi
+    if [ -z "${name}" ] || ! _base_config_env_value "${value}" ; then
+      echo "warning: invalid environment file line: ${1}:${num}" >&2
+      continue
+    fi
+    value="${BASE_CONFIG_ENV_VALUE}"
+    if [ "${op}" == "+=" ] ; then
+      [[ -z "${value}" || "${value}" == "/"* ]] || value="${BASE}/${value}"
+      [ -z "${!name}" ] || value="${value}:${!name}"
+    fi
+    _base_var_set "${name}" "${value}"
+    # shellcheck disable=SC2163
+    export "${name}"
+  done < "${1}"
+}
+
+# ### Function `_base_config_env_value`
+#
+# This function parses a value in an environment file.
+#
+# This is an internal function that should not be executed directly.
+#
+# A value that is enclosed in single quotes is used literally.  Otherwise, any
+# enclosing double quotes are removed, a backslash escapes the following
+# character, and variable references in `$NAME` and `${NAME}` forms are
+# replaced with the values of the variables.  No code is run.
+#
+# Arguments:
+#
+# * `VALUE` (string): value to parse
+#
+# Returns:
+#
+# * `0` (`TRUE`): the value is valid
+# * `1` (`FALSE`): the value has unbalanced quotes
+#
+# Side effects:
+#
+# * `BASE_CONFIG_ENV_VALUE` is set to the parsed value.
+_base_config_env_value () {
+  local raw="${1}" re
+  BASE_CONFIG_ENV_VALUE=""
+  if [[ "${raw}" == "'"* ]] ; then
+    [[ "${#raw}" -ge "2" && "${raw}" == *"'" ]] || return 1
+    BASE_CONFIG_ENV_VALUE="${raw:1:${#raw}-2}"
+    return 0
+  fi
+  if [[ "${raw}" == '"'* ]] ; then
+    [[ "${#raw}" -ge "2" && "${raw}" == *'"' ]] || return 1
+    raw="${raw:1:${#raw}-2}"
+  fi
+  # shellcheck disable=SC2016
+  re='^([^\$]*)(\\(.)|\$\{([A-Za-z_][A-Za-z0-9_]*)\}|'
+  # shellcheck disable=SC2016
+  re+='\$([A-Za-z_][A-Za-z0-9_]*)|\$)(.*)$'
+  while [[ "${raw}" =~ ${re} ]] ; do
+    BASE_CONFIG_ENV_VALUE+="${BASH_REMATCH[1]}"
+    if [ -n "${BASH_REMATCH[3]}" ] ; then
+      BASE_CONFIG_ENV_VALUE+="${BASH_REMATCH[3]}"
+    elif [ -n "${BASH_REMATCH[4]}" ] ; then
+      BASE_CONFIG_ENV_VALUE+="${!BASH_REMATCH[4]}"
+    elif [ -n "${BASH_REMATCH[5]}" ] ; then
+      BASE_CONFIG_ENV_VALUE+="${!BASH_REMATCH[5]}"
+    else
+      BASE_CONFIG_ENV_VALUE+="${BASH_REMATCH[2]}"
+    fi
+    raw="${BASH_REMATCH[6]}"
+  done
+  BASE_CONFIG_ENV_VALUE+="${raw}"
+}
+
+# ### Function `_base_config_predicates`
+#
+# This function checks the predicate directives of a configuration script.
+#
+# This is an internal function that should not be executed directly.
+#
+# Predicate directives (read by `_base_config_directives`) are checked
+# without sourcing the script, using only builtins.  The script should be run
+# only if all of the following predicates are true:
+#
+# * `if-exists PATH...`: at least one of the paths exists, relative to the
+#   Base directory
+# * `if-command NAME...`: at least one of the commands is found on the `PATH`
+#
+# Returns:
+#
+# * `0` (`TRUE`): the script should be run
+# * `1` (`FALSE`): the script should be skipped
+#
+# Side effects:
+#
+# * `BASE_CONFIG_SKIPPED` is set to the directive that is false when the
+#   script should be skipped.
+_base_config_predicates () {
+  local directive arg found
+  local -a args
+  for directive in "${BASE_CONFIG_DIRECTIVES[@]}" ; do
+    case "${directive}" in
+      "if-exists "*)
+        found=""
+        read -r -a args <<< "${directive#if-exists }"
+        for arg in "${args[@]}" ; do
+          [ ! -e "${arg}" ] || found=1
+        done
+        ;;
+      "if-command "*)
+        found=""
+        read -r -a args <<< "${directive#if-command }"
+        for arg in "${args[@]}" ; do
+          ! type -P "${arg}" >/dev/null || found=1
+        done
+        ;;
+      *)
+        continue
+        ;;
+    esac
+    if [ -z "${found}" ] ; then
+      BASE_CONFIG_SKIPPED="${directive}"
+      return 1
+    fi
+  done
+}
+
+# ### Function `_base_config_clock`
+#
+# This function reads the clock that is used to profile configuration.
+#
+# This is an internal function that should not be executed directly.
+#
+# `EPOCHREALTIME` is used when it is available, so that no process is
+# created.  Otherwise, the clock has a resolution of one second.
+#
+# Side effects:
+#
+# * `BASE_CONFIG_CLOCK` is set to the current time, in microseconds.
+_base_config_clock () {
+  BASE_CONFIG_CLOCK="${EPOCHREALTIME/[.,]/}"
+  if [ -z "${BASE_CONFIG_CLOCK}" ] ; then
+    printf -v BASE_CONFIG_CLOCK '%(%s)T000000' -1
+  fi
+}
+
+# ### Function `_base_config_profile`
+#
+# This function displays a line of configuration profiling output.
+#
+# This is an internal function that should not be executed directly.
+#
+# Profiling output is only displayed when the `BASE_CONFIG_PROFILE`
+# environment variable is set.  It is written to standard error, with lines
+# prefixed with `profile:`.
+#
+# Arguments:
+#
+# * `START` (integer): start time in microseconds (see `_base_config_clock`),
+#   or the empty string to display the message without an elapsed time
+# * `MESSAGE` (string): what was profiled
+_base_config_profile () {
+  local elapsed
+  [ -n "${BASE_CONFIG_PROFILE}" ] || return 0
+  if [ -z "${1}" ] ; then
+    printf 'profile: %s\n' "${2}" >&2
+    return 0
+  fi
+  _base_config_clock
+  elapsed=$(( BASE_CONFIG_CLOCK - ${1} ))
+  printf 'profile: %d.%03d ms %s\n' \
+    "$(( elapsed / 1000 ))" "$(( elapsed % 1000 ))" "${2}" >&2
+}
+
+# ### Function `_base_config_group_add`
+#
+# This function adds a configuration script to the current group of scripts
+# that declare dependencies.
+#
+# This is an internal function that should not be executed directly.
+#
+# Arguments:
+#
+# * `FILE` (string): configuration script path
+#
+# Returns:
+#
+# * `0` (`TRUE`): the script declares dependencies and was added
+# * `1` (`FALSE`): the script does not declare dependencies
+#
+# Side effects:
+#
+# * The path and the `provides` and `requires` directive arguments (read by
+#   `_base_config_directives`) are appended to `BASE_CONFIG_GROUP`,
+#   `BASE_CONFIG_PROVIDES`, and `BASE_CONFIG_REQUIRES`, and the time limit
+#   (`BASE_CONFIG_LIMIT`) is appended to `BASE_CONFIG_LIMITS`.
+_base_config_group_add () {
+  local directive provides=" " requires=" " found=""
+  for directive in "${BASE_CONFIG_DIRECTIVES[@]}" ; do
+    case "${directive}" in
+      "provides "*) provides+="${directive#provides } " ; found=1 ;;
+      "requires "*) requires+="${directive#requires } " ; found=1 ;;
+    esac
+  done
+  [ -n "${found}" ] || return 1
+  BASE_CONFIG_GROUP+=( "${1}" )
+  BASE_CONFIG_PROVIDES+=( "${provides}" )
+  BASE_CONFIG_REQUIRES+=( "${requires}" )
+  BASE_CONFIG_LIMITS+=( "${BASE_CONFIG_LIMIT}" )
+}
+
+# ### Function `_base_config_group_run`
+#
+# This function runs the current group of configuration scripts that declare
+# dependencies.
+#
+# This is an internal function that should not be executed directly.
+#
+# The scripts are run in waves.  Each wave consists of the scripts that do
+# not require anything that is provided by another script in the group that
+# has not run yet.  The scripts in a wave are run concurrently, each in a
+# subshell using `_base_background_run`, and then the results are applied
+# in sorted order using `_base_background_apply`, so the result does not
+# depend on which script finishes first.  When no script can run because of
+# a dependency cycle, a warning is displayed and the remaining scripts are
+# sourced in sorted order.  When the session directory cannot be created,
+# the scripts are sourced in sorted order.
+#
+# Job control is disabled while the scripts run, so that no job control
+# messages are displayed.
+#
+# Side effects:
+#
+# * The scripts are run and their results are applied.
+# * The time taken by the group is displayed when profiling.
+# * `BASE_CONFIG_GROUP`, `BASE_CONFIG_PROVIDES`, `BASE_CONFIG_REQUIRES`, and
+#   `BASE_CONFIG_LIMITS` are unset.
+_base_config_group_run () {
+  local idx jdx req ok monitor="" pending=() wave=() blocked=() pids=() cmd
+  local start
+  [ "${#BASE_CONFIG_GROUP[@]}" -gt "0" ] || return 0
+  _base_config_clock
+  start="${BASE_CONFIG_CLOCK}"
+  for (( idx=0 ; idx<${#BASE_CONFIG_GROUP[@]} ; idx++ )) ; do
+    pending+=( "${idx}" )
+  done
+  _base_session_dir || wave=( "${pending[@]}" )
+  [[ "$-" == *m* ]] && monitor=1 && set +m
+  while [[ "${#pending[@]}" -gt "0" && "${#wave[@]}" -eq "0" ]] ; do
+    blocked=()
+    for idx in "${pending[@]}" ; do
+      ok=1
+      for req in ${BASE_CONFIG_REQUIRES[${idx}]} ; do
+        for jdx in "${pending[@]}" ; do
+          if [[ "${jdx}" != "${idx}" \
+              && "${BASE_CONFIG_PROVIDES[${jdx}]}" == *" ${req} "* ]] ; then
+            ok=""
+          fi
+        done
+      done
+      if [ -n "${ok}" ] ; then
+        wave+=( "${idx}" )
+      else
+        blocked+=( "${idx}" )
+      fi
+    done
+    if [ "${#wave[@]}" -eq "0" ] ; then
+      echo "warning: dependency cycle in configuration scripts" >&2
+      wave=( "${blocked[@]}" )
+      break
+    fi
+    pids=()
+    for idx in "${wave[@]}" ; do
+      printf -v cmd '_base_config_timer_start %q ; ' \
+        "${BASE_CONFIG_LIMITS[${idx}]}"
+      printf -v cmd '%ssource %q ; _base_config_timer_stop %q' "${cmd}" \
+        "${BASE_CONFIG_GROUP[${idx}]}" "${BASE_CONFIG_GROUP[${idx}]}"
+      _base_background_run "config-${BASE_CONFIG_SEQ:-0}-${idx}" "${cmd}" &
+      pids+=( "$!" )
+    done
+    wait "${pids[@]}"
+    for idx in "${wave[@]}" ; do
+      _base_background_apply "config-${BASE_CONFIG_SEQ:-0}-${idx}"
+    done
+    pending=( "${blocked[@]}" )
+    wave=()
+  done
+  [ -z "${monitor}" ] || set -m
+  for idx in "${wave[@]}" ; do
+    _base_config_timer_start "${BASE_CONFIG_LIMITS[${idx}]}"
+    # shellcheck disable=SC1090
+    source "${BASE_CONFIG_GROUP[${idx}]}"
+    _base_config_timer_stop "${BASE_CONFIG_GROUP[${idx}]}"
+  done
+  _base_config_profile "${start}" "concurrent ${BASE_CONFIG_GROUP[*]}"
+  (( BASE_CONFIG_SEQ++ ))
+  unset BASE_CONFIG_GROUP BASE_CONFIG_PROVIDES BASE_CONFIG_REQUIRES
+  unset BASE_CONFIG_LIMITS
+}
+
+# ### Function `_base_config_limit`
+#
+# This function determines the time limit for a configuration script.
+#
+# This is an internal function that should not be executed directly.
+#
+# The time limit of a script is the argument of its `timeout` directive (read
+# by `_base_config_directives`), or `BASE_CONFIG_TIMEOUT` if the script does
+# not have one.  When `BASE_CONFIG_TIMEOUT_TOTAL` is set, the time limit is
+# reduced to the time that remains for the whole configuration, which started
+# at `BASE_CONFIG_START`.  Time limits are specified in seconds, and a time
+# limit of `0` disables the limit.
+#
+# Arguments:
+#
+# * `FILE` (string): configuration script path
+#
+# Returns:
+#
+# * `0` (`TRUE`): the script should be run
+# * `1` (`FALSE`): no time remains, so the script should be skipped
+#
+# Side effects:
+#
+# * `BASE_CONFIG_LIMIT` is set to the time limit, or the empty string if
+#   there is no time limit.
+# * A warning is displayed when a time limit is invalid or the script is
+#   skipped.
+_base_config_limit () {
+  local directive limit="${BASE_CONFIG_TIMEOUT:-0}" now remaining
+  for directive in "${BASE_CONFIG_DIRECTIVES[@]}" ; do
+    [[ "${directive}" != "timeout "* ]] || limit="${directive#timeout }"
+  done
+  if [[ ! "${limit}" =~ ^[0-9]+$ ]] ; then
+    echo "warning: invalid time limit for ${1}: ${limit}" >&2
+    limit=0
+  fi
+  if [[ "${BASE_CONFIG_TIMEOUT_TOTAL:-0}" =~ ^[1-9][0-9]*$ ]] ; then
+    printf -v now '%(%s)T' -1
+    remaining=$(( BASE_CONFIG_START + BASE_CONFIG_TIMEOUT_TOTAL - now ))
+    if [ "${remaining}" -le "0" ] ; then
+      echo "warning: configuration time limit exceeded, skipping ${1}" >&2
+      return 1
+    fi
+    [[ "${limit}" -ne "0" && "${limit}" -le "${remaining}" ]] \
+      || limit="${remaining}"
+  fi
+  BASE_CONFIG_LIMIT=""
+  [ "${limit}" -eq "0" ] || BASE_CONFIG_LIMIT="${limit}"
+}
+
+# ### Function `_base_config_timer_start`
+#
+# This function starts the time limit of a configuration script.
+#
+# This is an internal function that should not be executed directly.  It must
+# be called in the same context that the script is sourced in, immediately
+# before sourcing it, and `_base_config_timer_stop` must be called
+# immediately after.
+#
+# A watchdog (`_base_config_timer_watch`) is started in a subshell that is
+# started from another subshell, so that no job control messages are
+# displayed.  When the time limit is exceeded, the watchdog sends a `USR1`
+# signal to the shell and terminates the commands that the shell is running,
+# and `_base_config_timer_expire` makes the script return.  When there is no
+# time limit or the session directory cannot be created, nothing is done.
+#
+# The changes that the script makes using the variable management functions
+# are tracked separately, so that they can be undone using
+# `_base_var_restore`: `BASE_VAR_VARS` and `BASE_VAR_EXPORTS` are emptied,
+# and the values that are saved in `BASE_VAR_PREV_*` variables are moved to
+# `BASE_CONFIG_TIMER_PREV_*` variables, so that `_base_var_save` saves the
+# values from before the script is run.  They are merged again by
+# `_base_config_timer_stop`.
+#
+# Job control is disabled while the script runs, so that the commands that it
+# runs are in the process group of the shell, and the shell does not display
+# a message such as `Terminated` when the watchdog terminates a command.
+#
+# Arguments:
+#
+# * `LIMIT` (integer): time limit in seconds (optional)
+#
+# Side effects:
+#
+# * The watchdog is started, and a `USR1` trap is set.  Any previous `USR1`
+#   trap is saved in `BASE_CONFIG_TIMER_TRAP`.
+# * `BASE_CONFIG_TIMER` is set to the path of the watchdog file, which
+#   contains `armed` until the timer is stopped.
+# * `BASE_CONFIG_TIMER_DEPTH` and `BASE_CONFIG_TIMER_LABEL` are set.
+# * Job control is disabled, and `BASE_CONFIG_TIMER_MONITOR` is set if it was
+#   enabled.
+# * `BASE_VAR_VARS` and `BASE_VAR_EXPORTS` are saved in
+#   `BASE_CONFIG_TIMER_VARS` and `BASE_CONFIG_TIMER_EXPORTS`, and saved values
+#   are moved to `BASE_CONFIG_TIMER_PREV_*` variables.
+_base_config_timer_start () {
+  local pid="${BASHPID}" var prev
+  [ -n "${1}" ] || return 0
+  _base_session_dir || return 0
+  BASE_CONFIG_TIMER="${BASE_SESSION_DIR}/timer-${BASHPID}"
+  BASE_CONFIG_TIMER_DEPTH="${#BASH_SOURCE[@]}"
+  BASE_CONFIG_TIMER_LABEL="${BASE_LABEL}"
+  BASE_CONFIG_TIMER_MONITOR=""
+  [[ "$-" == *m* ]] && BASE_CONFIG_TIMER_MONITOR=1 && set +m
+  BASE_CONFIG_TIMER_VARS=( "${BASE_VAR_VARS[@]}" )
+  BASE_CONFIG_TIMER_EXPORTS=( "${BASE_VAR_EXPORTS[@]}" )
+  for var in "${BASE_VAR_VARS[@]}" ; do
+    prev="BASE_VAR_PREV_${var}"
+    if [ -n "${!prev+x}" ] ; then
+      eval "BASE_CONFIG_TIMER_PREV_${var}=\${!prev}"
+      unset "${prev}"
+    fi
+  done
+  BASE_VAR_VARS=()
+  BASE_VAR_EXPORTS=()
+  echo "armed" > "${BASE_CONFIG_TIMER}"
+  : > "${BASE_CONFIG_TIMER}.pid"
+  BASE_CONFIG_TIMER_TRAP="$(trap -p USR1)"
+  trap '_base_config_timer_expire' USR1
+  ( _base_config_timer_watch "${1}" "${pid}" "${BASE_CONFIG_TIMER}" & )
+}
+
+# ### Function `_base_config_timer_watch`
+#
+# This function is the watchdog of a configuration script time limit.
+#
+# This is an internal function that should not be executed directly.  It is
+# run in a subshell by `_base_config_timer_start`.
+#
+# The process ID of the watchdog is written to `${FILE}.pid` so that it can be
+# terminated when the script is done.  When the time limit is exceeded and the
+# file still contains `armed`, a `USR1` signal is sent to the shell, and the
+# child processes of the shell that are in the process group of the shell are
+# terminated.  Job control is disabled while the script runs, so these are
+# the commands that the script runs.  Other processes, such as background
+# jobs of the interactive shell and the foreground process group of the
+# terminal, are not signaled.
+#
+# Arguments:
+#
+# * `LIMIT` (integer): time limit in seconds
+# * `PID` (integer): process ID of the shell
+# * `FILE` (string): watchdog file path
+_base_config_timer_watch () {
+  local state="" stat line fields pgrp
+  echo "${BASHPID}" > "${3}.pid"
+  read -r -t "${1}" <> <(:)
+  read -r state < "${3}"
+  [ "${state}" == "armed" ] || return 0
+  kill -USR1 "${2}" || return 0
+  read -r line < "/proc/${2}/stat" || return 0
+  read -r -a fields <<< "${line##*) }"
+  pgrp="${fields[2]}"
+  for stat in /proc/[0-9]*/stat ; do
+    read -r line < "${stat}" 2>/dev/null || continue
+    read -r -a fields <<< "${line##*) }"
+    if [[ "${fields[1]}" == "${2}" && "${fields[2]}" == "${pgrp}" ]] ; then
+      kill "${line%% *}" 2>/dev/null
+    fi
+  done
+}
+
+# ### Function `_base_config_timer_expire`
+#
+# This function handles the expiration of a configuration script time limit.
+#
+# This is an internal function that should not be executed directly.  It is
+# run by the `USR1` trap that is set by `_base_config_timer_start`.
+#
+# The `extdebug` shell option is set, and `_base_config_timer_abort` is set as
+# the `DEBUG` trap, so that the script and any functions that it is running
+# return.  The previous `DEBUG` trap and `extdebug` shell option are restored
+# by `_base_config_timer_abort` once the script has returned, or by
+# `_base_config_timer_stop`.
+#
+# Side effects:
+#
+# * `BASE_CONFIG_TIMED_OUT` is set.
+# * Any previous `DEBUG` trap is saved in `BASE_CONFIG_TIMER_DEBUG`, and
+#   `BASE_CONFIG_TIMER_EXTDEBUG` is set if the `extdebug` shell option was
+#   set.
+# * The `extdebug` shell option and a `DEBUG` trap are set.
+_base_config_timer_expire () {
+  BASE_CONFIG_TIMED_OUT=1
+  [ -z "${BASE_CONFIG_TIMER_DEBUG+x}" ] || return 0
+  BASE_CONFIG_TIMER_DEBUG="$(trap -p DEBUG)"
+  BASE_CONFIG_TIMER_EXTDEBUG=""
+  shopt -q extdebug && BASE_CONFIG_TIMER_EXTDEBUG=1
+  shopt -s extdebug
+  trap '_base_config_timer_abort' DEBUG
+}
+
+# ### Function `_base_config_timer_abort`
+#
+# This function makes a configuration script that timed out return.
+#
+# This is an internal function that should not be executed directly.  It is
+# run by the `DEBUG` trap that is set by `_base_config_timer_expire`.
+#
+# Returns:
+#
+# * `2`: the command is skipped and the current function or sourced script
+#   returns, while running code that was called by the script
+# * `0`: the previous `DEBUG` trap and `extdebug` shell option are restored,
+#   once the script has returned or when `_base_config_timer_stop` is running
+#
+# Side effects:
+#
+# * `BASE_CONFIG_TIMER_DEBUG` and `BASE_CONFIG_TIMER_EXTDEBUG` are unset when
+#   the previous `DEBUG` trap and `extdebug` shell option are restored.
+#
+# Bash notes:
+#
+# * When the `extdebug` shell option is set and the `DEBUG` trap returns `2`,
+#   Bash simulates a `return` from the current function or sourced script.
+#   The number of elements of `BASH_SOURCE` is the call depth, which is one
+#   more than the depth of the code that the trap interrupted since this
+#   function is called by the trap.
+_base_config_timer_abort () {
+  if [[ "${#BASH_SOURCE[@]}" -gt "${BASE_CONFIG_TIMER_DEPTH}" \
+      && " ${FUNCNAME[*]} " != *" _base_config_timer_stop "* ]] ; then
+    return 2
+  fi
+  trap - DEBUG
+  eval "${BASE_CONFIG_TIMER_DEBUG}"
+  [ -n "${BASE_CONFIG_TIMER_EXTDEBUG}" ] || shopt -u extdebug
+  unset BASE_CONFIG_TIMER_DEBUG BASE_CONFIG_TIMER_EXTDEBUG
+}
+
+# ### Function `_base_config_timer_stop`
+#
+# This function stops the time limit of a configuration script.
+#
+# This is an internal function that should not be executed directly.
+#
+# The watchdog is cancelled and terminated.  When the script timed out, a
+# warning is displayed, the changes that the script made using the variable
+# management functions are undone using `_base_var_restore`, and the Base
+# label is restored.  Other changes, such as function definitions, are not
+# undone.  When the script is run in a job by `_base_background_run`, the
+# variable records of the job are discarded as well, so that the changes are
+# not applied.  The variables that the script changed are then merged into
+# `BASE_VAR_VARS` and `BASE_VAR_EXPORTS`, keeping the values that were saved
+# before the script was run.
+#
+# Arguments:
+#
+# * `FILE` (string): configuration script path
+#
+# Side effects:
+#
+# * The previous `USR1` trap is restored, as well as the previous `DEBUG`
+#   trap and `extdebug` shell option if they are still set.
+# * Job control is enabled if it was enabled when the timer was started.
+# * Environment variables and the Base label are restored when the script
+#   timed out.
+# * `BASE_VAR_VARS`, `BASE_VAR_EXPORTS`, and the `BASE_VAR_PREV_*` variables
+#   are merged.
+# * The variables that are used to manage the time limit are unset.
+_base_config_timer_stop () {
+  local pid="" cmd var prev changes=()
+  [ -n "${BASE_CONFIG_TIMER+x}" ] || return 0
+  : > "${BASE_CONFIG_TIMER}"
+  read -r pid < "${BASE_CONFIG_TIMER}.pid" 2>/dev/null
+  [ -z "${pid}" ] || kill "${pid}" 2>/dev/null
+  trap - USR1
+  eval "${BASE_CONFIG_TIMER_TRAP}"
+  if [ -n "${BASE_CONFIG_TIMER_DEBUG+x}" ] ; then
+    trap - DEBUG
+    eval "${BASE_CONFIG_TIMER_DEBUG}"
+    [ -n "${BASE_CONFIG_TIMER_EXTDEBUG}" ] || shopt -u extdebug
+  fi
+  [ -z "${BASE_CONFIG_TIMER_MONITOR}" ] || set -m
+  if [ -n "${BASE_CONFIG_TIMED_OUT}" ] ; then
+    echo "warning: configuration script timed out: ${1}" >&2
+    for var in "${BASE_VAR_VARS[@]}" ; do
+      _base_var_restore "${var}"
+    done
+    BASE_VAR_VARS=()
+    BASE_VAR_EXPORTS=()
+    BASE_LABEL="${BASE_CONFIG_TIMER_LABEL}"
+    if [ -n "${BASE_BACKGROUND_CHANGES+x}" ] ; then
+      for cmd in "${BASE_BACKGROUND_CHANGES[@]}" ; do
+        [[ "${cmd}" =~ ^(set|prepend|append|unset)\  ]] \
+          || changes+=( "${cmd}" )
+      done
+      BASE_BACKGROUND_CHANGES=( "${changes[@]}" )
+      BASE_BACKGROUND_VARS=()
+    fi
+  fi
+  for var in "${BASE_CONFIG_TIMER_VARS[@]}" ; do
+    prev="BASE_CONFIG_TIMER_PREV_${var}"
+    unset "BASE_VAR_PREV_${var}"
+    if [ -n "${!prev+x}" ] ; then
+      eval "BASE_VAR_PREV_${var}=\${!prev}"
+      unset "${prev}"
+    fi
+  done
+  for var in "${BASE_VAR_VARS[@]}" ; do
+    ! _base_lib_array_contains BASE_CONFIG_TIMER_VARS "${var}" || continue
+    BASE_CONFIG_TIMER_VARS+=( "${var}" )
+    if _base_lib_array_contains BASE_VAR_EXPORTS "${var}" ; then
+      BASE_CONFIG_TIMER_EXPORTS+=( "${var}" )
+    fi
+  done
+  BASE_VAR_VARS=( "${BASE_CONFIG_TIMER_VARS[@]}" )
+  BASE_VAR_EXPORTS=( "${BASE_CONFIG_TIMER_EXPORTS[@]}" )
+  unset BASE_CONFIG_TIMER BASE_CONFIG_TIMER_DEPTH BASE_CONFIG_TIMER_LABEL
+  unset BASE_CONFIG_TIMER_TRAP BASE_CONFIG_TIMER_DEBUG
+  unset BASE_CONFIG_TIMER_EXTDEBUG BASE_CONFIG_TIMED_OUT
+  unset BASE_CONFIG_TIMER_MONITOR BASE_CONFIG_TIMER_VARS
+  unset BASE_CONFIG_TIMER_EXPORTS
+}
+
+# ### Function `_base_lazy`
+#
+# This function registers a command that is initialized when it is first
+# run.
+#
+# A stub function with the name of the command is defined.  When the stub is
+# first run, it runs the initializer using `_base_lazy_run` and then runs the
+# command with the same arguments.  This defers initialization that is slow,
+# such as sourcing the initialization script of a version manager, until the
+# command is used.  When there is no interactive shell (`RUNENV`), the
+# initializer is run immediately instead.
+#
+# The initializer is run in the interactive shell, within a function.
+# Environment variables should be changed using `_base_var_set` and
+# `_base_var_unset`, which remain set while there are stubs, so that
+# deactivation restores them.  Note that variables that the initializer
+# declares using `declare` without `-g` are local to the function.
+#
+# The following arrays are used to manage stubs:
+#
+# * `BASE_LAZY_NAMES` stores the command names.
+# * `BASE_LAZY_INITS` stores the initializers, quoted for `eval`.
+#
+# Arguments:
+#
+# * `NAME` (string): command name
+# * `INITIALIZER` (string): initializer command
+# * `ARG` (string): zero or more initializer arguments
+#
+# Returns:
+#
+# * `0`: the command is registered
+# * `1`: invalid arguments
+#
+# Side effects:
+#
+# * A stub function named `NAME` is defined.
+# * The command is added to `BASE_LAZY_NAMES` and `BASE_LAZY_INITS`, replacing
+#   any previous registration.
+_base_lazy () {
+  local idx="${#BASE_LAZY_NAMES[@]}" init
+  if [[ "$#" -lt "2" || ! "${1}" =~ ^[A-Za-z_][A-Za-z0-9_.:-]*$ ]] ; then
+    echo "warning: invalid _base_lazy arguments: $*" >&2
+    return 1
+  fi
+  printf -v init '%q ' "${@:2}"
+  if [ "${BASE_MODE}" == "RUNENV" ] ; then
+    eval "${init}"
+    return 0
+  fi
+  while [ "${idx}" -gt "0" ] ; do
+    [ "${BASE_LAZY_NAMES[$(( idx - 1 ))]}" != "${1}" ] || break
+    (( idx-- ))
+  done
+  [ "${idx}" -gt "0" ] || idx="$(( ${#BASE_LAZY_NAMES[@]} + 1 ))"
+  BASE_LAZY_NAMES[idx - 1]="${1}"
+  BASE_LAZY_INITS[idx - 1]="${init}"
+  eval "${1} () { _base_lazy_run ${1} ; ${1} \"\$@\" ; }"
+}
+
+# ### Function `_base_lazy_run`
+#
+# This function initializes a command that is registered using `_base_lazy`.
+#
+# This is an internal function that should not be executed directly.  It is
+# called by a stub function, which then runs the command.
+#
+# When no stubs or background jobs remain, the variable management functions
+# are unset.
+#
+# Arguments:
+#
+# * `NAME` (string): command name
+#
+# Side effects:
+#
+# * The stub function is unset.
+# * The command is removed from `BASE_LAZY_NAMES` and `BASE_LAZY_INITS`, which
+#   are unset when no stubs remain.
+# * The initializer is run.
+# * The cache of commands is reset, so that any new `PATH` settings are used.
+_base_lazy_run () {
+  local idx init="" names=() inits=()
+  for (( idx=0 ; idx<${#BASE_LAZY_NAMES[@]} ; idx++ )) ; do
+    if [ "${BASE_LAZY_NAMES[${idx}]}" == "${1}" ] ; then
+      init="${BASE_LAZY_INITS[${idx}]}"
+    else
+      names+=( "${BASE_LAZY_NAMES[${idx}]}" )
+      inits+=( "${BASE_LAZY_INITS[${idx}]}" )
+    fi
+  done
+  if [ "${#names[@]}" -gt "0" ] ; then
+    BASE_LAZY_NAMES=( "${names[@]}" )
+    BASE_LAZY_INITS=( "${inits[@]}" )
+  else
+    unset BASE_LAZY_NAMES BASE_LAZY_INITS
+  fi
+  unset -f "${1}"
+  shift
+  eval "${init}"
+  hash -r
+  if [[ -z "${BASE_LAZY_NAMES+x}" && -z "${BASE_BACKGROUND_JOBS+x}" ]] ; then
+    unset -f _base_var_save _base_var_set _base_var_unset
+  fi
+}
+
+##############################################################################
+# ## User Interaction Functions
+#
+# User interaction functions are available for interacting with the user
+# during environment configuration.
+#
+# User interaction functions are only available during environment
+# configuration (`CURENV_2`).
+
+# ### Function `_base_select`
+#
+# This function prompts the user to select an option.
+#
+# An indexed list of options is displayed, and the user selects an option by
+# index.  An invalid selection results in the default: the first option.  The
+# selected option value (not index) is stored in the `BASE_SELECTION`
+# environment variable.
+#
+# If only one option is passed, it is selected without prompting the user.  If
+# no options are passed, a warning is displayed and `BASE_SELECTION` is unset.
+#
+# The user is not prompted in the following cases, in order of precedence:
+#
+# * When the `BASE_SELECT_<LABEL>` environment variable is set to an option
+#   value or index, that option is selected.  `<LABEL>` is the label in
+#   uppercase with each character other than letters and digits replaced with
+#   an underscore (example: `BASE_SELECT_PYTHON_VIRTUAL_ENVIRONMENT`).  A
+#   warning is displayed if the value is not valid.
+# * The selection for the label is remembered per Base directory in a state
+#   file, and it is selected when the same options are passed.  When the
+#   options change, the user is prompted again.
+# * When standard input is not a terminal, the default is selected.
+#
+# Arguments:
+#
+# * `LABEL` (string): label to display in the selection prompt
+# * `OPTION` (string): one or more options to select from
+#
+# Returns:
+#
+# * `0`: `BASE_SELECTION` is set
+# * `1`: `BASE_SELECTION` is unset
+#
+# Side effects:
+#
+# * When multiple options are available and the selection is not otherwise
+#   determined, the list of options is displayed and a selection is read.
+# * Environment variable `BASE_SELECTION` is set or unset.
+# * A selection that is read is saved in the state file.
+# * The state file path is appended to `BASE_EXPORT_PATHS` when it is set (see
+#   `_base_export`).
+_base_select () {
+  declare -g BASE_SELECTION
+
+  if [ "$#" -le "1" ] ; then
+    echo "warning: _base_select called without options" >&2
+    unset BASE_SELECTION
+    return 1
+  fi
+
+  if [ "$#" -eq "2" ] ; then
+    BASE_SELECTION="${2}"
+    return 0
+  fi
+
+  local args=( "$@" ) len=0 idx=1 var key line state="" lines=()
+  len=${#args[@]}
+
+  var="${1^^}"
+  var="BASE_SELECT_${var//[!A-Z0-9]/_}"
+  if [ -n "${!var}" ] ; then
+    for (( idx=1 ; idx<len ; idx++ )) ; do
+      if [ "${args[${idx}]}" == "${!var}" ] ; then
+        BASE_SELECTION="${args[${idx}]}"
+        return 0
+      fi
+    done
+    if [[ "${!var}" =~ ^[0-9]+$ && \
+        "${!var}" -gt "0" && "${!var}" -lt "${len}" ]] ; then
+      BASE_SELECTION="${args[${!var}]}"
+      return 0
+    fi
+    echo "warning: invalid ${var} selection: ${!var}" >&2
+  fi
+
+  printf -v key '%s\t' "${args[@]}"
+  if [[ "${key}" != *$'\n'* && "${args[*]:1}" != *$'\t'* ]] \
+      && _base_state_file "select" ; then
+    state="${BASE_STATE_PATH}"
+    [ -z "${BASE_EXPORT_PATHS+x}" ] || BASE_EXPORT_PATHS+=( "${state}" )
+    if [ -f "${state}" ] ; then
+      while IFS= read -r line ; do
+        if [ "${line#*$'\t'}" == "${key}" ] ; then
+          for (( idx=1 ; idx<len ; idx++ )) ; do
+            if [ "${args[${idx}]}" == "${line%%$'\t'*}" ] ; then
+              BASE_SELECTION="${args[${idx}]}"
+              return 0
+            fi
+          done
+        fi
+        [[ "${line#*$'\t'}" == "${1}"$'\t'* ]] || lines+=( "${line}" )
+      done < "${state}"
+    fi
+  fi
+
+  if [ ! -t 0 ] ; then
+    BASE_SELECTION="${args[1]}"
+    return 0
+  fi
+
+  idx=1
+  while [ "${idx}" -lt "${len}" ] ; do
+    echo "${idx}) ${args[$idx]}"
+    (( idx++ ))
+  done
+  read -rp "Select ${1} [1]: " idx
+  if [[ "${idx}" =~ ^[0-9]+$ && \
+      "${idx}" -gt "0" && "${idx}" -lt "${len}" ]] ; then
+    BASE_SELECTION="${args[${idx}]}"
+  else
+    BASE_SELECTION="${args[1]}"
+  fi
+
+  if [ -n "${state}" ] ; then
+    lines+=( "${BASE_SELECTION}"$'\t'"${key}" )
+    printf '%s\n' "${lines[@]}" > "${state}.$$" \
+      && mv -f "${state}.$$" "${state}" 2>/dev/null
+    rm -f "${state}.$$"
+  fi
+  return 0
+}
+
+# ### Function `_base_select_dir`
+#
+# This function prompts the user to select a directory.
+#
+# This function calls `_base_select` with directory names as options, sorted
+# by version with the newest first.  If no directories are found, a warning
+# is displayed.  Directories are listed using `_base_install_index`, so a
+# directory is only scanned when it has changed.  Links to directories are
+# not included.
+#
+# Arguments:
+#
+# * `LABEL` (string): label to display in the selection prompt
+# * `DIRECTORY` (string): parent directory path
+# * `GLOB` (string): one or more directory options patterns; directories that
+#   match any of the patterns are options
+#
+# Returns:
+#
+# * `0`: `BASE_SELECTION` is set
+# * `1`: `BASE_SELECTION` is unset
+#
+# Side effects:
+#
+# * When multiple options are available, the list of options is displayed and
+#   a selection is read.
+# * Environment variable `BASE_SELECTION` is set or unset.
+_base_select_dir () {
+  local name glob opts=()
+  _base_install_index "${2}"
+  for name in "${BASE_INSTALL_NAMES[@]}" ; do
+    for glob in "${@:3}" ; do
+      # shellcheck disable=SC2053
+      if [[ "${name}" == ${glob} ]] ; then
+        opts+=( "${name}" )
+        break
+      fi
+    done
+  done
+  if [ "${#opts[@]}" -gt "0" ] ; then
+    _base_select "${1}" "${opts[@]}"
+    return $?
+  else
+    echo "warning: no ${1} directories found" >&2
+    return 1
+  fi
+}
+
+##############################################################################
+# ## Core Configuration
+#
+# This section configures a Base environment.
+
+# ### Function `_base_find`
+#
+# This function finds the nearest Base directory of the current directory.
+#
+# The parent directories of the current directory are searched, nearest
+# first, for one that contains a `.base` file, link, or directory.  Only
+# parameter expansion and file tests are used, so no processes are created.
+#
+# The result is cached for the current directory in the `find` cache
+# directory, so that a later lookup from the same directory reads a single
+# file instead of searching each parent directory.  The cached Base directory
+# is used while the Base directory still contains a `.base` configuration and
+# the cache is newer than the current directory and each parent directory
+# below the Base directory, so that a `.base` configuration that is later
+# added to one of those directories is detected.
+#
+# This is an internal function that should not be executed directly.
+#
+# Returns:
+#
+# * `0`: a Base directory is found
+# * `1`: no parent directory contains a `.base` configuration
+#
+# Side effects:
+#
+# * Environment variable `BASE` is set to the Base directory path.
+_base_find () {
+  local dir="${PWD%/*}" found="" cache=""
+  if _base_cache_file "find" "${PWD}" ; then
+    cache="${BASE_CACHE_PATH}"
+    if [ -f "${cache}" ] ; then
+      IFS= read -r found < "${cache}"
+      [[ "${PWD}" == "${found%/}"/* && -e "${found%/}/.base" ]] || found=""
+      dir="${PWD}"
+      while [[ -n "${found}" && "${dir:-/}" != "${found}" ]] ; do
+        [ "${cache}" -nt "${dir}" ] || found=""
+        dir="${dir%/*}"
+      done
+      dir="${PWD%/*}"
+    fi
+  fi
+  if [ -z "${found}" ] ; then
+    while true ; do
+      if [ -e "${dir}/.base" ] ; then
+        found="${dir:-/}"
+        break
+      fi
+      [ -n "${dir}" ] || return 1
+      dir="${dir%/*}"
+    done
+    [ -z "${cache}" ] || printf '%s\n' "${found}" 2>/dev/null > "${cache}"
+  fi
+  BASE="${found}"
+}
+
+# ### Base Directory
+#
+# The full path of the Base directory is stored in the `BASE` environment
+# variable.  It is the current directory by default.
+#
+# When the `BASE_FIND` environment variable is set and the current directory
+# does not contain a `.base` configuration, the Base directory is the nearest
+# parent directory that does, found using `_base_find`.  In this case, the
+# current directory is changed to the Base directory while the environment is
+# configured, so that configuration scripts run in the Base directory, and
+# it is changed back when configuration is done.  `BASE_FIND_RETURN` is set
+# to the previous current directory and `OLDPWD`, which are restored.
+BASE="${PWD}"
+if [[ -n "${BASE_FIND}" && ! -e ".base" ]] && _base_find ; then
+  BASE_FIND_RETURN=( "${PWD}" "${OLDPWD}" )
+  builtin cd "${BASE}" || BASE="${PWD}"
+fi
+
+# ### Base Label
+#
+# If the Base label was not specified using a CLI argument, then it defaults
+# to the basename of the Base directory.
+#
+# Note that the Base label can be changed in user configuration through the
+# label management API.
+if [ -n "${BASE_LABEL_CLI}" ] ; then
   BASE_LABEL="${BASE_LABEL_CLI}"
 else
   BASE_LABEL="$(basename "${BASE}")"
@@ -501,12 +2259,17 @@ fi
 # If the `BASE_NO_TITLE` environment variable is set, then the title is not
 # updated.
 #
+# While there are background configuration jobs, their results are collected
+# using `_base_background_collect`.
+#
 # Side effects:
 #
 # * The prompt and title are updated by setting the `PS1` environment
 #   variable.
+# * The results of background configuration jobs that are done are collected.
 _base_ps_update () {
   local lpath suffix
+  [ -z "${BASE_BACKGROUND_JOBS+x}" ] || _base_background_collect
   if [ "${BASE}" == "${PWD}" ] ; then
     lpath="[${BASE_LABEL}] "
   elif [ "${BASE}/" == "${PWD:0:$((${#BASE}+1))}" ] ; then
@@ -532,9 +2295,12 @@ _base_ps_update () {
 # ### Configure Prompt
 #
 # The current value of the `PS1` environment variable is saved, and the
-# `PROMPT_COMMAND` environment variable is set to `_base_ps_update`.
-_base_var_save "PS1"
-_base_var_set "PROMPT_COMMAND" "_base_ps_update"
+# `PROMPT_COMMAND` environment variable is set to `_base_ps_update`.  The
+# prompt is not configured when there is no interactive shell (`RUNENV`).
+if [ "${BASE_MODE}" != "RUNENV" ] ; then
+  _base_var_save "PS1"
+  _base_var_set "PROMPT_COMMAND" "_base_ps_update"
+fi
 
 # To execute another function each time the prompt is displayed, add the
 # function to `PROMPT_COMMAND`.  For example, the following can be used to
@@ -548,6 +2314,15 @@ _base_var_set "PROMPT_COMMAND" "_base_ps_update"
 #
 # This function is called directly from the command line.
 #
+# When the `BASE_BCD_INDEX` environment variable is set and the argument is
+# not a directory relative to the Base directory, the directory is found in
+# the directory index, allowing jumps to directories deep within the Base
+# directory using just the name or the end of the path.  Names that do not
+# match exactly are matched by subsequence (fuzzy matching).
+#
+# Visits are recorded so that completion options and directory index matches
+# can be ranked by frecency (frequency and recency).
+#
 # Arguments:
 #
 # * `DIR` (string): directory relative to the Base directory (optional)
@@ -561,6 +2336,7 @@ _base_var_set "PROMPT_COMMAND" "_base_ps_update"
 # Side effects:
 #
 # * The current directory is changed when successful.
+# * A visit is recorded in the frecency file when successful.
 # * An error is displayed when the directory does not exist.
 # * Usage is displayed when called with too many arguments.
 bcd () {
@@ -568,10 +2344,552 @@ bcd () {
     echo "usage: bcd [dir]" >&2
     return 2
   fi
+  if [[ -n "${BASE_BCD_INDEX}" && -n "${1}" && ! -d "${BASE}/${1}" ]] \
+      && _base_bcd_index_find "${1}" ; then
+    cd "${BASE}/${BASE_BCD_INDEX_MATCH}" || return 1
+    _base_bcd_frecency_visit
+    return 0
+  fi
   cd "${BASE}/${1}" || return 1
+  _base_bcd_frecency_visit
+  return 0
+}
+
+# ### Function `_base_bcd_scan`
+#
+# This function lists the subdirectories of a directory that start with a
+# prefix.
+#
+# This is an internal function that should not be executed directly.
+#
+# Subdirectories are listed using shell globbing, so no processes are
+# created.  Hidden directories are included, while links to directories are
+# not.
+#
+# Arguments:
+#
+# * `DIRECTORY` (string): directory path
+# * `PREFIX` (string): subdirectory name prefix (may be empty)
+# * `MAX` (integer): maximum number of subdirectories to list (optional)
+#
+# Side effects:
+#
+# * The `BASE_BCD_DIRS` array is set to the subdirectory names.
+#
+# Bash notes:
+#
+# * The `dotglob`, `nullglob`, and `failglob` shell options are changed while
+#   globbing and then restored, so user settings are not affected.
+_base_bcd_scan () {
+  local path setopts=() unsetopts=()
+  shopt -q dotglob || setopts+=( "dotglob" )
+  shopt -q nullglob || setopts+=( "nullglob" )
+  shopt -q failglob && unsetopts+=( "failglob" )
+  [ "${#setopts[@]}" -eq "0" ] || shopt -s "${setopts[@]}"
+  [ "${#unsetopts[@]}" -eq "0" ] || shopt -u "${unsetopts[@]}"
+  BASE_BCD_DIRS=()
+  for path in "${1}/${2}"*/ ; do
+    [[ -z "${3}" || "${#BASE_BCD_DIRS[@]}" -lt "${3}" ]] || break
+    path="${path%/}"
+    [ -h "${path}" ] || BASE_BCD_DIRS+=( "${path##*/}" )
+  done
+  [ "${#setopts[@]}" -eq "0" ] || shopt -u "${setopts[@]}"
+  [ "${#unsetopts[@]}" -eq "0" ] || shopt -s "${unsetopts[@]}"
+}
+
+# ### Function `_base_bcd_cache`
+#
+# This function finds the subdirectory names of a directory in the `bcd`
+# completion cache, adding them to the cache when necessary.
+#
+# This is an internal function that should not be executed directly.
+#
+# The cache stores the subdirectory names of up to `BASE_BCD_CACHE_MAX`
+# (default `32`) directories in memory, evicting the least recently used
+# entry when full.  Set `BASE_BCD_CACHE_MAX` to `0` to disable the cache.
+#
+# Each entry has a reference file in the session directory that is given the
+# modification time of the directory (using `touch -r`) before the directory
+# is scanned.  An entry is valid as long as the modification time of the
+# directory is the same as that of the reference file.  Since the times of the
+# directory are compared with each other, the cache is not affected by clock
+# differences on network filesystems.  A process is only created when an
+# entry is added.
+#
+# The following environment variables are used to manage the cache:
+#
+# * `BASE_BCD_CACHE_PATHS` is an array of the directory path of each entry.
+# * `BASE_BCD_CACHE_TIMES` is an array of the last use of each entry.
+# * `BASE_BCD_CACHE_TICK` is incremented each time the cache is used.
+# * `BASE_BCD_CACHE_${IDX}` is an array of the subdirectory names of entry
+#   `IDX`.
+#
+# Arguments:
+#
+# * `DIRECTORY` (string): directory path
+#
+# Returns:
+#
+# * `0`: `BASE_BCD_CACHE_IDX` is set to the index of the cache entry
+# * `1`: the cache is disabled or the directory cannot be cached
+#
+# Side effects:
+#
+# * The cache is updated.
+# * Environment variable `BASE_BCD_CACHE_IDX` is set.
+_base_bcd_cache () {
+  local max="${BASE_BCD_CACHE_MAX:-32}" idx=0 ref
+  [ "${max}" -gt "0" ] 2>/dev/null || return 1
+  _base_session_dir || return 1
+  (( BASE_BCD_CACHE_TICK++ ))
+  BASE_BCD_CACHE_IDX=""
+  while [ "${idx}" -lt "${#BASE_BCD_CACHE_PATHS[@]}" ] ; do
+    if [ "${BASE_BCD_CACHE_PATHS[${idx}]}" == "${1}" ] ; then
+      BASE_BCD_CACHE_IDX="${idx}"
+      break
+    fi
+    (( idx++ ))
+  done
+  if [ -n "${BASE_BCD_CACHE_IDX}" ] ; then
+    BASE_BCD_CACHE_TIMES[idx]="${BASE_BCD_CACHE_TICK}"
+    ref="${BASE_SESSION_DIR}/bcd-${idx}"
+    if [[ ! "${1}" -nt "${ref}" && ! "${ref}" -nt "${1}" ]] ; then
+      return 0
+    fi
+  elif [ "${#BASE_BCD_CACHE_PATHS[@]}" -lt "${max}" ] ; then
+    BASE_BCD_CACHE_IDX="${#BASE_BCD_CACHE_PATHS[@]}"
+  else
+    BASE_BCD_CACHE_IDX=0
+    for idx in "${!BASE_BCD_CACHE_TIMES[@]}" ; do
+      if [ "${BASE_BCD_CACHE_TIMES[${idx}]}" -lt \
+          "${BASE_BCD_CACHE_TIMES[${BASE_BCD_CACHE_IDX}]}" ] ; then
+        BASE_BCD_CACHE_IDX="${idx}"
+      fi
+    done
+  fi
+  idx="${BASE_BCD_CACHE_IDX}"
+  ref="${BASE_SESSION_DIR}/bcd-${idx}"
+  BASE_BCD_CACHE_PATHS[idx]=""
+  BASE_BCD_CACHE_TIMES[idx]="${BASE_BCD_CACHE_TICK}"
+  touch -r "${1}" "${ref}" 2>/dev/null || return 1
+  _base_bcd_scan "${1}" ""
+  eval "BASE_BCD_CACHE_${idx}=( \"\${BASE_BCD_DIRS[@]}\" )"
+  BASE_BCD_CACHE_PATHS[idx]="${1}"
+}
+
+# ### Function `_base_bcd_cache_clear`
+#
+# This function clears the `bcd` completion cache.
+#
+# Side effects:
+#
+# * The cache environment variables are unset.
+# * The cache reference files are removed.
+_base_bcd_cache_clear () {
+  local idx
+  for idx in "${!BASE_BCD_CACHE_PATHS[@]}" ; do
+    unset "BASE_BCD_CACHE_${idx}"
+    [ -z "${BASE_SESSION_DIR}" ] || rm -f "${BASE_SESSION_DIR}/bcd-${idx}"
+  done
+  unset BASE_BCD_CACHE_PATHS BASE_BCD_CACHE_TIMES BASE_BCD_CACHE_TICK
+  unset BASE_BCD_CACHE_IDX
+}
+
+# ### Function `_base_bcd_dirs`
+#
+# This function lists the subdirectories of a directory that start with a
+# prefix.
+#
+# This is an internal function that should not be executed directly.  It is
+# used to generate `bcd` completion options.
+#
+# The subdirectories are found in the `bcd` completion cache when possible.
+# Subdirectories are no longer collected once the maximum is reached.
+#
+# Arguments:
+#
+# * `DIRECTORY` (string): directory path
+# * `PREFIX` (string): subdirectory name prefix (may be empty)
+# * `MAX` (integer): maximum number of subdirectories to list
+#
+# Side effects:
+#
+# * The `BASE_BCD_DIRS` array is set to the subdirectory names.
+_base_bcd_dirs () {
+  local name names
+  if _base_bcd_cache "${1}" ; then
+    names="BASE_BCD_CACHE_${BASE_BCD_CACHE_IDX}[@]"
+    BASE_BCD_DIRS=()
+    for name in "${!names}" ; do
+      [ "${#BASE_BCD_DIRS[@]}" -lt "${3}" ] || break
+      [[ "${name}" == "${2}"* ]] && BASE_BCD_DIRS+=( "${name}" )
+    done
+  else
+    _base_bcd_scan "${1}" "${2}" "${3}"
+  fi
+}
+
+# ### Function `_base_bcd_index_update`
+#
+# This function updates the directory index of the Base directory.
+#
+# This is an internal function that should not be executed directly.  It is
+# run in the background when the `BASE_BCD_INDEX` environment variable is set.
+#
+# The index is a cache file that lists each directory under the Base
+# directory, one per line, as the directory name and the path relative to the
+# Base directory separated by a tab.  Lines are sorted by name (in the `C`
+# locale) so that directories can be found by name using a binary search.
+#
+# Directories with names that match a pattern in the colon-separated
+# `BASE_BCD_INDEX_IGNORE` environment variable are not indexed.  The default
+# patterns ignore version control directories, dependency directories such as
+# `node_modules`, and common build output directories.  At most
+# `BASE_BCD_INDEX_MAX` (default `100000`) directories are indexed.
+#
+# The index is updated incrementally.  A stamp file is written when an update
+# starts, and the subdirectories of a directory are only scanned when the
+# directory has been modified since the previous update started.  Otherwise,
+# the subdirectories listed in the previous index are used, so directories
+# without subdirectories are not scanned again either.  (When the previous
+# index reached the maximum size, directories without subdirectories listed
+# in it are scanned, since their subdirectories may have been left out.)  The
+# new index is written to a temporary file that is then moved into place, so
+# concurrent updates do not corrupt the index.
+#
+# Side effects:
+#
+# * The index file and stamp file are written.
+_base_bcd_index_update () {
+  local index stamp tmp rel dir name pat list idx=0 ignored
+  local max="${BASE_BCD_INDEX_MAX:-100000}"
+  local ignore=".git:.hg:.svn:.tox:.venv:.stack-work:__pycache__:node_modules"
+  local pats=() queue=( "" ) children=() rels=()
+  local -A kids
+  ignore="${BASE_BCD_INDEX_IGNORE-${ignore}:_build:build:dist:target}"
+  _base_cache_file "bcd-index" || return 1
+  index="${BASE_CACHE_PATH}"
+  stamp="${index}.stamp"
+  tmp="${index}.${BASHPID}"
+  IFS=":" read -r -a pats <<< "${ignore}"
+  if [[ -f "${index}" && -f "${stamp}" ]] ; then
+    while IFS=$'\t' read -r name rel ; do
+      dir="${rel%/*}"
+      [ "${dir}" != "${rel}" ] || dir="."
+      kids[${dir}]+="${name}"$'\n'
+      rels+=( "${rel}" )
+    done < "${index}"
+    if [ "${#rels[@]}" -lt "${max}" ] ; then
+      for rel in "${rels[@]}" ; do
+        kids[${rel}]+=""
+      done
+    fi
+  fi
+  : > "${tmp}.stamp"
+  {
+    while [ "${idx}" -lt "${#queue[@]}" ] ; do
+      rel="${queue[${idx}]}"
+      dir="${BASE}${rel:+/${rel}}"
+      if [[ -n "${kids[${rel:-.}]+x}" && ! "${dir}" -nt "${stamp}" ]] ; then
+        children=()
+        list="${kids[${rel:-.}]}"
+        while [ -n "${list}" ] ; do
+          children+=( "${list%%$'\n'*}" )
+          list="${list#*$'\n'}"
+        done
+      else
+        _base_bcd_scan "${dir}" ""
+        children=( "${BASE_BCD_DIRS[@]}" )
+      fi
+      for name in "${children[@]}" ; do
+        [[ "${name}" == *[$'\t\n']* ]] && continue
+        ignored=""
+        for pat in "${pats[@]}" ; do
+          # shellcheck disable=SC2053
+          [[ -n "${pat}" && "${name}" == ${pat} ]] && ignored=1 && break
+        done
+        [ -z "${ignored}" ] || continue
+        [ "${#queue[@]}" -le "${max}" ] || break 2
+        queue+=( "${rel:+${rel}/}${name}" )
+        printf '%s\t%s\n' "${name}" "${rel:+${rel}/}${name}"
+      done
+      (( idx++ ))
+    done
+  } | LC_ALL=C sort > "${tmp}"
+  mv -f "${tmp}" "${index}" && mv -f "${tmp}.stamp" "${stamp}"
+  rm -f "${tmp}" "${tmp}.stamp"
+}
+
+# ### Function `_base_bcd_index_load`
+#
+# This function loads the directory index into memory.
+#
+# This is an internal function that should not be executed directly.
+#
+# The index is only read when it has changed since it was last loaded.  This
+# is determined using a reference file in the session directory that is given
+# the modification time of the index (using `touch -r`) when it is loaded.
+#
+# Returns:
+#
+# * `0`: the index is loaded
+# * `1`: the index is not available
+#
+# Side effects:
+#
+# * The `BASE_BCD_INDEX_LINES` array is set to the lines of the index.
+_base_bcd_index_load () {
+  local ref
+  _base_session_dir || return 1
+  _base_cache_file "bcd-index" || return 1
+  [ -f "${BASE_CACHE_PATH}" ] || return 1
+  ref="${BASE_SESSION_DIR}/bcd-index"
+  if [[ -n "${BASE_BCD_INDEX_LINES+x}" && -e "${ref}" \
+      && ! "${BASE_CACHE_PATH}" -nt "${ref}" \
+      && ! "${ref}" -nt "${BASE_CACHE_PATH}" ]] ; then
+    return 0
+  fi
+  touch -r "${BASE_CACHE_PATH}" "${ref}" 2>/dev/null || return 1
+  mapfile -t BASE_BCD_INDEX_LINES < "${BASE_CACHE_PATH}"
+}
+
+# ### Function `_base_bcd_index_find`
+#
+# This function finds a directory in the directory index.
+#
+# This is an internal function that should not be executed directly.  It is
+# called by `bcd` when the `BASE_BCD_INDEX` environment variable is set and
+# the argument is not a directory relative to the Base directory.
+#
+# Directories with the same name as the last component of the query, and a
+# relative path that ends with the query, are found using a binary search of
+# the index.  When there are no such directories, directories with a relative
+# path that contains the characters of the query in order (fuzzy matching)
+# are found by scanning the index.  When there are multiple candidates, the
+# one with the highest frecency score is selected, and the one with the
+# shortest relative path is selected when scores are equal.
+#
+# Arguments:
+#
+# * `QUERY` (string): directory name or relative path suffix
+#
+# Returns:
+#
+# * `0`: `BASE_BCD_INDEX_MATCH` is set
+# * `1`: no directory is found
+#
+# Side effects:
+#
+# * The directory index is loaded if necessary.
+# * Environment variable `BASE_BCD_INDEX_MATCH` is set to the relative path of
+#   the selected directory.
+#
+# Bash notes:
+#
+# * `LC_ALL` is set to `C` within the function so that string comparisons
+#   match the sort order of the index.
+_base_bcd_index_find () {
+  local name="${1##*/}" query="${1}" lo=0 hi mid line rel pattern="*"
+  local candidates=() score best=0 LC_ALL=C
+  [ -n "${name}" ] || return 1
+  _base_bcd_index_load || return 1
+  hi="${#BASE_BCD_INDEX_LINES[@]}"
+  while [ "${lo}" -lt "${hi}" ] ; do
+    mid=$(( (lo + hi) / 2 ))
+    if [[ "${BASE_BCD_INDEX_LINES[${mid}]}" < "${name}"$'\t' ]] ; then
+      lo=$(( mid + 1 ))
+    else
+      hi="${mid}"
+    fi
+  done
+  while [[ "${BASE_BCD_INDEX_LINES[${lo}]}" == "${name}"$'\t'* ]] ; do
+    rel="${BASE_BCD_INDEX_LINES[${lo}]#*$'\t'}"
+    if [[ "${rel}" == "${query}" || "${rel}" == *"/${query}" ]] ; then
+      candidates+=( "${rel}" )
+    fi
+    (( lo++ ))
+  done
+  if [ "${#candidates[@]}" -eq "0" ] ; then
+    while [ -n "${query}" ] ; do
+      pattern="${pattern}\\${query:0:1}*"
+      query="${query:1}"
+    done
+    for line in "${BASE_BCD_INDEX_LINES[@]}" ; do
+      rel="${line#*$'\t'}"
+      # shellcheck disable=SC2053
+      [[ "${rel}" == ${pattern} ]] && candidates+=( "${rel}" )
+    done
+  fi
+  [ "${#candidates[@]}" -gt "0" ] || return 1
+  _base_bcd_frecency_load || declare -gA BASE_BCD_FRECENCY=()
+  BASE_BCD_INDEX_MATCH="${candidates[0]}"
+  best="${BASE_BCD_FRECENCY["${BASE_BCD_INDEX_MATCH}"]:-0}"
+  for rel in "${candidates[@]}" ; do
+    score="${BASE_BCD_FRECENCY["${rel}"]:-0}"
+    if [[ "${score}" -gt "${best}" \
+        || ( "${score}" -eq "${best}" \
+          && "${#rel}" -lt "${#BASE_BCD_INDEX_MATCH}" ) ]] ; then
+      BASE_BCD_INDEX_MATCH="${rel}"
+      best="${score}"
+    fi
+  done
+  return 0
+}
+
+# ### Function `_base_bcd_frecency_visit`
+#
+# This function records a visit to the current directory in the `bcd`
+# frecency file of the Base directory.
+#
+# This is an internal function that should not be executed directly.  It is
+# called by `bcd` after changing the directory.
+#
+# The frecency file has one line per record, containing a rank (in hundredths
+# of a visit), the time of the last visit (in seconds since the epoch), and a
+# path relative to the Base directory, separated by tabs.  A visit is recorded
+# by appending a record with a rank of `100`.  Only builtins are used, so no
+# processes are created.  Records are aggregated by `_base_bcd_frecency_load`.
+#
+# Visits are not recorded when `BASE_BCD_FRECENCY_MAX` is `0`.
+#
+# Side effects:
+#
+# * A record is appended to the frecency file.
+_base_bcd_frecency_visit () {
+  local rel="${PWD#"${BASE}"/}" now
+  [ "${BASE_BCD_FRECENCY_MAX:-1000}" -gt "0" ] 2>/dev/null || return 0
+  [[ "${rel}" != "${PWD}" && "${rel}" != *[$'\t\n']* ]] || return 0
+  _base_cache_file "bcd-frecency" || return 0
+  printf -v now '%(%s)T' -1
+  printf '100\t%s\t%s\n' "${now}" "${rel}" >> "${BASE_CACHE_PATH}" 2>/dev/null
+  return 0
+}
+
+# ### Function `_base_bcd_frecency_load`
+#
+# This function loads the `bcd` frecency scores of the Base directory.
+#
+# This is an internal function that should not be executed directly.
+#
+# The records of each path are aggregated by adding the ranks and using the
+# latest time.  The score of a path is the rank multiplied by four when the
+# last visit was within the past hour, multiplied by two when within the past
+# day, divided by two when within the past week, and divided by four
+# otherwise.
+#
+# When the file has at least `100` more records than paths, it is compacted
+# to one record per path, and records of directories that no longer exist are
+# removed.  When the total rank exceeds `BASE_BCD_FRECENCY_MAX` (default
+# `1000`) visits, all ranks are aged by multiplying them by `0.9`, and paths
+# with a rank below one visit are removed, so the file remains small.
+#
+# The scores are only loaded when the file has changed since it was last
+# loaded or when the scores are more than an hour old.  Changes are detected
+# using a reference file in the session directory that is given the
+# modification time of the frecency file (using `touch -r`) when it is loaded.
+#
+# Returns:
+#
+# * `0`: the scores are loaded
+# * `1`: frecency is disabled or there are no records
+#
+# Side effects:
+#
+# * The `BASE_BCD_FRECENCY` associative array is set to the score of each
+#   path, and `BASE_BCD_FRECENCY_TIME` is set to the time that it is loaded.
+# * The frecency file is compacted when necessary.
+_base_bcd_frecency_load () {
+  local max="${BASE_BCD_FRECENCY_MAX:-1000}" path ref tmp rank time rel now
+  local total=0 count=0
+  local -A ranks times
+  [ "${max}" -gt "0" ] 2>/dev/null || return 1
+  _base_session_dir || return 1
+  _base_cache_file "bcd-frecency" || return 1
+  path="${BASE_CACHE_PATH}"
+  [ -f "${path}" ] || return 1
+  ref="${BASE_SESSION_DIR}/bcd-frecency"
+  printf -v now '%(%s)T' -1
+  if [[ -n "${BASE_BCD_FRECENCY_TIME}" && -e "${ref}" \
+      && "$(( now - BASE_BCD_FRECENCY_TIME ))" -lt "3600" \
+      && ! "${path}" -nt "${ref}" && ! "${ref}" -nt "${path}" ]] ; then
+    return 0
+  fi
+  while IFS=$'\t' read -r rank time rel ; do
+    [[ "${rank}" =~ ^[0-9]+$ && "${time}" =~ ^[0-9]+$ ]] || continue
+    [ -n "${rel}" ] || continue
+    ranks["${rel}"]="$(( ${ranks["${rel}"]:-0} + rank ))"
+    [ "${time}" -gt "${times["${rel}"]:-0}" ] && times["${rel}"]="${time}"
+    (( total += rank, count++ ))
+  done < "${path}"
+  if [ "$(( count - ${#ranks[@]} ))" -ge "100" ] ; then
+    tmp="${path}.$$"
+    for rel in "${!ranks[@]}" ; do
+      rank="${ranks["${rel}"]}"
+      [ "${total}" -le "$(( max * 100 ))" ] || rank="$(( rank * 9 / 10 ))"
+      if [[ "${rank}" -ge "100" && -d "${BASE}/${rel}" ]] ; then
+        ranks["${rel}"]="${rank}"
+        printf '%s\t%s\t%s\n' "${rank}" "${times["${rel}"]}" "${rel}"
+      else
+        ranks["${rel}"]="0"
+      fi
+    done > "${tmp}"
+    mv -f "${tmp}" "${path}" 2>/dev/null || rm -f "${tmp}"
+  fi
+  touch -r "${path}" "${ref}" 2>/dev/null || return 1
+  declare -gA BASE_BCD_FRECENCY=()
+  BASE_BCD_FRECENCY_TIME="${now}"
+  for rel in "${!ranks[@]}" ; do
+    rank="${ranks["${rel}"]}"
+    time="$(( now - ${times["${rel}"]} ))"
+    [ "${rank}" -gt "0" ] || continue
+    if [ "${time}" -lt "3600" ] ; then
+      BASE_BCD_FRECENCY["${rel}"]="$(( rank * 4 ))"
+    elif [ "${time}" -lt "86400" ] ; then
+      BASE_BCD_FRECENCY["${rel}"]="$(( rank * 2 ))"
+    elif [ "${time}" -lt "604800" ] ; then
+      BASE_BCD_FRECENCY["${rel}"]="$(( rank / 2 ))"
+    else
+      BASE_BCD_FRECENCY["${rel}"]="$(( rank / 4 ))"
+    fi
+  done
   return 0
 }
 
+# ### Function `_base_bcd_frecency_sort`
+#
+# This function sorts `bcd` completion options by frecency score.
+#
+# This is an internal function that should not be executed directly.
+#
+# Options for directories that have been visited using `bcd` are moved to the
+# front, in order of decreasing score.  The order of other options is not
+# changed.
+#
+# Side effects:
+#
+# * The `COMPREPLY` array is sorted.
+_base_bcd_frecency_sort () {
+  local ranked=() scores=() unranked=() opt score idx
+  _base_bcd_frecency_load || return 0
+  for opt in "${COMPREPLY[@]}" ; do
+    score="${BASE_BCD_FRECENCY["${opt%/}"]}"
+    if [ -z "${score}" ] ; then
+      unranked+=( "${opt}" )
+      continue
+    fi
+    idx="${#ranked[@]}"
+    while [ "${idx}" -gt "0" ] ; do
+      [ "${scores[$(( idx - 1 ))]}" -lt "${score}" ] || break
+      ranked[idx]="${ranked[$(( idx - 1 ))]}"
+      scores[idx]="${scores[$(( idx - 1 ))]}"
+      (( idx-- ))
+    done
+    ranked[idx]="${opt}"
+    scores[idx]="${score}"
+  done
+  COMPREPLY=( "${ranked[@]}" "${unranked[@]}" )
+}
+
 # ### Function `_base_bcd_complete`
 #
 # This function generates an array of completion options for the `bcd`
@@ -580,6 +2898,13 @@ bcd () {
 # This is an internal function that should not be executed directly.  It is
 # registered as an autocompletion hook for `bcd` via the `complete` builtin.
 #
+# When there is a single matching directory, the options are the directory
+# and its subdirectories, so that completion continues into the directory.
+# Directories are listed using `_base_bcd_dirs`, so no processes are created.
+# At most `BASE_BCD_COMPLETE_MAX` options (default: `1000`) are generated;
+# invalid values are ignored.  Options are sorted by frecency score using
+# `_base_bcd_frecency_sort`.
+#
 # Arguments:
 #
 # * `COMMAND` (string): name of the command being completed (unused)
@@ -589,30 +2914,43 @@ bcd () {
 #
 # * The `COMPREPLY` array is set to the list of possible completions.
 _base_bcd_complete () {
-  local curr="${BASE}" rest="${2##*/}"
+  local curr="${BASE}" rest="${2##*/}" max="${BASE_BCD_COMPLETE_MAX}" name
+  local path
+  [[ "${max}" =~ ^[0-9]+$ ]] && max="$(( 10#${max} ))" || max=1000
   if [ ${#2} -gt ${#rest} ] ; then
     curr="${BASE}/${2%/*}"
   fi
   COMPREPLY=()
-  while IFS= read -r -d $'\0'; do
-    COMPREPLY+=( "${REPLY#${BASE}/}" )
-  done < <(find "${curr}" -mindepth 1 -maxdepth 1 -type d -name "${rest}*" -print0)
+  _base_bcd_dirs "${curr}" "${rest}" "${max}"
+  for name in "${BASE_BCD_DIRS[@]}" ; do
+    path="${curr}/${name}"
+    COMPREPLY+=( "${path#"${BASE}"/}" )
+  done
   if [ ${#COMPREPLY[*]} -eq 1 ] ; then
-    curr="${BASE}/${COMPREPLY[0]}"
-    COMPREPLY=()
-    while IFS= read -r -d $'\0'; do
-      COMPREPLY+=( "${REPLY#${BASE}/}/" )
-    done < <(find "${curr}" -maxdepth 1 -type d -print0)
+    path="${COMPREPLY[0]}"
+    _base_bcd_dirs "${BASE}/${path}" "" "$(( max - 1 ))"
+    COMPREPLY=( "${path}/" )
+    for name in "${BASE_BCD_DIRS[@]}" ; do
+      COMPREPLY+=( "${path}/${name}/" )
+    done
     if [ ${#COMPREPLY[*]} -eq 1 ] ; then
-      COMPREPLY=( "${COMPREPLY[0]%/}" )
+      COMPREPLY=( "${path}" )
     fi
   fi
+  [ ${#COMPREPLY[*]} -lt 2 ] || _base_bcd_frecency_sort
+  unset BASE_BCD_DIRS
 }
 
 # ### Configure `bcd` Completion
 #
 # `bcd` is configured to use the `_base_bcd_complete` function for completion.
-complete -o filenames -F _base_bcd_complete bcd
+# The `nosort` option (Bash 4.4 and later) is used when available so that
+# options are displayed in frecency order.  Completion is not configured when
+# there is no interactive shell (`RUNENV`).
+if [ "${BASE_MODE}" != "RUNENV" ] ; then
+  complete -o filenames -o nosort -F _base_bcd_complete bcd 2>/dev/null \
+    || complete -o filenames -F _base_bcd_complete bcd
+fi
 
 # ### Function `base_deactivate`
 #
@@ -620,39 +2958,56 @@ complete -o filenames -F _base_bcd_complete bcd
 #
 # Side effects:
 #
+# * The results of background configuration jobs that are not done are
+#   discarded.
+# * Stub functions of `_base_lazy` commands that have not been run are unset.
 # * Deactivation callbacks are called in reverse order.
 # * Previous environment variables are restored.
-# * Completion for the `bcd` command is removed.
+# * Completion for the `bcd` command is removed, the `bcd` completion cache
+#   is cleared, and the loaded directory index is released.
+# * The session directory is removed.
 # * Base functions and environment variables are unset.
 
 base_deactivate () {
-  local idx prev var
+  local idx var
   for (( idx="${#BASE_DEACTIVATION_CALLBACKS[@]}"-1 ; idx>=0 ; idx-- )); do
     eval "${BASE_DEACTIVATION_CALLBACKS[${idx}]}"
   done
 
   for var in "${BASE_VAR_VARS[@]}" ; do
-    prev="BASE_VAR_PREV_${var}"
-    if [ -n "${!prev+x}" ] ; then
-      eval "${var}=\${!prev}"
-      if _base_lib_array_contains "BASE_VAR_EXPORTS" "${var}" ; then
-        # shellcheck disable=SC2163
-        export "${var}"
-      fi
-      unset "${prev}"
-    else
-      unset "${var}"
-    fi
+    _base_var_restore "${var}"
   done
 
   complete -r bcd
+  _base_bcd_cache_clear
+
+  [ -z "${BASE_SESSION_DIR}" ] || rm -rf "${BASE_SESSION_DIR}"
 
   unset BASE_VERSION BASE_MODE BASE BASE_LABEL
   unset BASE_VAR_VARS BASE_VAR_EXPORTS BASE_DEACTIVATION_CALLBACKS
+  unset BASE_CACHE_PATH BASE_SESSION_DIR BASE_STATE_PATH
+  unset BASE_BCD_INDEX_LINES BASE_BCD_INDEX_MATCH
+  unset BASE_BCD_FRECENCY BASE_BCD_FRECENCY_TIME
+  unset BASE_BACKGROUND_JOBS
+  for var in "${BASE_LAZY_NAMES[@]}" ; do
+    unset -f "${var}"
+  done
+  unset BASE_LAZY_NAMES BASE_LAZY_INITS
   unset -f _base_lib_array_contains
   unset -f _base_lib_array_append
   unset -f _base_lib_set_insert
-  unset -f _base_ps_update _base_bcd_complete bcd f base_deactivate
+  unset -f _base_lib_set_remove
+  unset -f _base_cache_dir _base_cache_file _base_session_dir
+  unset -f _base_state_file
+  unset -f _base_var_save _base_var_set _base_var_unset _base_var_restore
+  unset -f _base_background_collect _base_background_apply _base_lazy_run
+  unset -f _base_ps_update bcd
+  unset -f _base_bcd_scan _base_bcd_cache _base_bcd_cache_clear
+  unset -f _base_bcd_dirs _base_bcd_complete
+  unset -f _base_bcd_index_update _base_bcd_index_load _base_bcd_index_find
+  unset -f _base_bcd_frecency_visit _base_bcd_frecency_load
+  unset -f _base_bcd_frecency_sort
+  unset -f base_deactivate
 }
 
 ##############################################################################
@@ -669,11 +3024,102 @@ base_deactivate () {
 # When a directory is used, the scripts are sourced in sorted order.  Numeric
 # prefixes can be used, for example, to make the scripts load in the desired
 # order.
+#
+# Scripts with a `background` directive are run in the background, and
+# background jobs are started after all other scripts are sourced.
+# Consecutive scripts with `provides` or `requires` directives are run
+# concurrently before the next script that does not declare dependencies is
+# sourced.
+#
+# Scripts are run with a time limit when `BASE_CONFIG_TIMEOUT` or
+# `BASE_CONFIG_TIMEOUT_TOTAL` is set or the script has a `timeout` directive,
+# including scripts that are run in the background.
+# A script that exceeds its time limit is abandoned, and scripts are skipped
+# once the total time limit is exceeded.
+#
+# Scripts with predicate directives that are false are skipped without being
+# sourced.  Profiling output is displayed when `BASE_CONFIG_PROFILE` is set.
+#
+# Files with a `.env` extension are environment files, which are applied
+# using `_base_config_env` instead of being sourced.
 if [ -e ".base" ] ; then
+  printf -v BASE_CONFIG_START '%(%s)T' -1
+  _base_config_clock
+  BASE_CONFIG_PROFILE_START="${BASE_CONFIG_CLOCK}"
   for config in $(find -L ".base" -type f | sort) ; do
-    # shellcheck disable=SC1090
-    source "${config}"
+    _base_config_directives "${config}"
+    if ! _base_config_predicates ; then
+      _base_config_profile "" "skipped ${config}: ${BASE_CONFIG_SKIPPED}"
+      continue
+    fi
+    _base_config_limit "${config}" || continue
+    if [[ "${config}" == *".env" ]] ; then
+      _base_config_group_run
+      _base_config_clock
+      BASE_CONFIG_SCRIPT_START="${BASE_CONFIG_CLOCK}"
+      _base_config_env "${config}"
+      _base_config_profile "${BASE_CONFIG_SCRIPT_START}" "${config}"
+    elif _base_lib_array_contains BASE_CONFIG_DIRECTIVES "background" ; then
+      printf -v BASE_CONFIG_CMD '_base_config_timer_start %q ; ' \
+        "${BASE_CONFIG_LIMIT}"
+      printf -v BASE_CONFIG_CMD '%ssource %q ; _base_config_timer_stop %q' \
+        "${BASE_CONFIG_CMD}" "${config}" "${config}"
+      BASE_BACKGROUND_QUEUE+=( "${BASE_CONFIG_CMD}" )
+      _base_config_profile "" "background ${config}"
+    elif ! _base_config_group_add "${config}" ; then
+      _base_config_group_run
+      _base_config_clock
+      BASE_CONFIG_SCRIPT_START="${BASE_CONFIG_CLOCK}"
+      _base_config_timer_start "${BASE_CONFIG_LIMIT}"
+      # shellcheck disable=SC1090
+      source "${config}"
+      _base_config_timer_stop "${config}"
+      _base_config_profile "${BASE_CONFIG_SCRIPT_START}" "${config}"
+    fi
   done
+  _base_config_group_run
+  _base_config_profile "${BASE_CONFIG_PROFILE_START}" "total"
+fi
+_base_background_start
+
+##############################################################################
+# ## Directory Index
+#
+# When the `BASE_BCD_INDEX` environment variable is set, the directory index
+# used by `bcd` is updated in the background, so activation is not delayed.
+# The variable may be set in the user configuration.  The index is not
+# updated when there is no interactive shell (`RUNENV`).
+if [[ -n "${BASE_BCD_INDEX}" && "${BASE_MODE}" != "RUNENV" ]] ; then
+  ( _base_bcd_index_update >/dev/null 2>&1 & )
+fi
+
+##############################################################################
+# ## Registry
+#
+# A record of the activation is appended to the registry, so that the Base
+# directory can be activated from any directory using `@` and its label (see
+# `_base_registry_find`).  The record contains the time of the activation, the
+# Base label, the mode, and the Base directory, separated by tabs.  It is
+# appended after the user configuration, so that the recorded label is the one
+# that is displayed in the prompt.  Only builtins are used, so no processes are
+# created unless the state directory needs to be created.
+#
+# No record is appended when the `BASE_NO_REGISTRY` environment variable is
+# set, when the label or directory contains a tab or newline, or when running
+# a command (`RUNENV`), so that scripted use such as `base run` and
+# `base each` does not grow the registry.
+if [[ -z "${BASE_NO_REGISTRY}" && "${BASE_MODE}" != "RUNENV" \
+    && "${BASE_LABEL}${BASE}" != *[$'\t\n']* ]] ; then
+  BASE_REGISTRY_PATH="${XDG_STATE_HOME:-${HOME}/.local/state}/base"
+  BASE_REGISTRY_PATH="${BASE_STATE_DIR:-${BASE_REGISTRY_PATH}}"
+  if [ -d "${BASE_REGISTRY_PATH}" ] \
+      || mkdir -p "${BASE_REGISTRY_PATH}" 2>/dev/null ; then
+    printf -v BASE_REGISTRY_TIME '%(%s)T' -1
+    printf '%s\t%s\t%s\t%s\n' \
+      "${BASE_REGISTRY_TIME}" "${BASE_LABEL}" "${BASE_MODE}" "${BASE}" \
+      2>/dev/null >> "${BASE_REGISTRY_PATH}/registry"
+  fi
+  unset BASE_REGISTRY_PATH BASE_REGISTRY_TIME
 fi
 
 ##############################################################################
@@ -682,9 +3128,41 @@ fi
 # The functions and environment variables used for configuration are unset.
 unset -f _base_select _base_select_dir
 unset -f _base_label_set _base_label_set_default
-unset -f _base_var_save _base_var_set _base_var_unset
+unset -f _base_config_directives _base_background
+unset -f _base_config_group_add _base_config_group_run _base_config_limit
+unset -f _base_config_predicates _base_config_clock _base_config_profile
+unset -f _base_config_env _base_config_env_value
+unset -f _base_config_timer_start _base_config_timer_watch
+unset -f _base_config_timer_expire _base_config_timer_abort
+unset -f _base_config_timer_stop
+unset -f _base_background_run _base_background_start _base_lazy
 unset -f _base_deactivation_callback_register
-unset BASE_LABEL_CLI BASE_SELECTION
+unset -f _base_lib_version_key _base_lib_version_sort
+unset -f _base_install_index _base_find
+unset BASE_LABEL_CLI BASE_SELECTION BASE_CONFIG_DIRECTIVES BASE_CONFIG_SEQ
+unset BASE_CONFIG_START BASE_CONFIG_LIMIT BASE_CONFIG_SKIPPED BASE_CONFIG_CMD
+unset BASE_CONFIG_CLOCK BASE_CONFIG_PROFILE_START BASE_CONFIG_SCRIPT_START
+unset BASE_CONFIG_ENV_VALUE
+unset BASE_INSTALL_NAMES BASE_INSTALL_VERSIONS BASE_INSTALL_PATHS
+unset BASE_INSTALL_MTIMES
+
+# When the Base directory was found using `_base_find`, the previous current
+# directory is restored.  When it no longer exists, a warning is displayed and
+# the current directory remains the Base directory.
+if [ -n "${BASE_FIND_RETURN+x}" ] ; then
+  if builtin cd "${BASE_FIND_RETURN[0]}" ; then
+    OLDPWD="${BASE_FIND_RETURN[1]}"
+  else
+    echo "warning: unable to return to ${BASE_FIND_RETURN[0]}" >&2
+  fi
+  unset BASE_FIND_RETURN
+fi
+
+# The variable management functions are kept while there are background jobs
+# or `_base_lazy` stubs, so that their variable changes can be applied.
+if [[ -z "${BASE_BACKGROUND_JOBS+x}" && -z "${BASE_LAZY_NAMES+x}" ]] ; then
+  unset -f _base_var_save _base_var_set _base_var_unset
+fi
 
 # The cache of commands is reset to ensure that any new `PATH` settings are
 # used.
@@ -698,6 +3176,8 @@ hash -r
 #     * (`NEWENV` when this script is executed normally)
 #     * (`CPYENV` when this script is sourced)
 #     * `CURENV` when `base_activate` is sourced
+#     * `RUNENV` when `base_activate` is sourced by `base` without an
+#       interactive shell
 # * `BASE` is the Base directory path.
 # * `BASE_LABEL` is the Base label.
 # * `BASE_VAR_VARS` is the array of modified environment variables.
@@ -712,7 +3192,25 @@ hash -r
 #     * `_base_lib_array_contains`
 #     * `_base_lib_array_append`
 #     * `_base_lib_set_insert`
+#     * `_base_lib_set_remove`
+# * The cache management functions:
+#     * `_base_cache_dir`
+#     * `_base_cache_file`
+#     * `_base_session_dir`
+# * The state management function `_base_state_file`
 # * `_base_ps_update` updates the prompt.
+# * `_base_background_collect` collects the results of background jobs.
+# * `_base_background_apply` applies the results of a background job.
+# * `_base_lazy_run` initializes commands that are registered using
+#   `_base_lazy`, and the stub functions remain set until they are run.
+# * The variable management functions remain set until all background jobs
+#   are done and all stubs are run.
+# * `_base_var_restore` restores environment variables when deactivating.
 # * `bcd` is used by the user.
-# * `_base_bcd_complete` handle `bcd` completion.
+# * `_base_bcd_scan`, `_base_bcd_cache`, `_base_bcd_cache_clear`,
+#   `_base_bcd_dirs`, and `_base_bcd_complete` handle `bcd` completion.
+# * `_base_bcd_index_update`, `_base_bcd_index_load`, and
+#   `_base_bcd_index_find` manage the `bcd` directory index.
+# * `_base_bcd_frecency_visit`, `_base_bcd_frecency_load`, and
+#   `_base_bcd_frecency_sort` manage `bcd` frecency.
 # * `base_deactivate` is used by the user.
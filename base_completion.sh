@@ -0,0 +1,70 @@
+#!/usr/bin/env bash
+
+# # `base` Completion Source
+#
+# [Base](https://github.com/ExtremaIS/base) configures Bash shell
+# environments relative to a directory.  It provides an easy and consistent
+# way to load the configuration for diverse projects.
+#
+# This is the source code for the Bash completion of the `base` command.  It
+# is installed in the `bash-completion` completions directory, so that it is
+# loaded when the `base` command is first completed, or it can be sourced in
+# `${HOME}/.bashrc`.  The source code includes literate-style documentation
+# about the implementation, in Markdown format.  See the `README` or manual
+# (`man base`) for usage documentation.
+
+# ### Function `_base_complete`
+#
+# This function completes the arguments of the `base` command.
+#
+# Arguments that start with `@` are completed with the labels of the Base
+# directories in the registry (see `_base_registry_find` in `base`).  The
+# last record of each path is used, and labels of directories that no longer
+# exist are not completed.  The labels are served from the registry file
+# using only builtins, so no processes are created and the filesystem is not
+# searched.  Since `@` is in `COMP_WORDBREAKS` by default, the current word
+# is determined from `COMP_LINE`, and the `@` prefix is only included in the
+# options when it is part of the word being completed.
+#
+# The first argument is otherwise completed with the options and commands of
+# `base`.  Other arguments are completed using the default completion.
+#
+# Side effects:
+#
+# * The `COMPREPLY` array is set to the completion options.
+_base_complete () {
+  local line="${COMP_LINE:0:${COMP_POINT}}" word file opt
+  local time label path
+  local -A labels
+  COMPREPLY=()
+  word="${line##*[[:space:]]}"
+  if [[ "${word}" == "@"* ]] ; then
+    file="${XDG_STATE_HOME:-${HOME}/.local/state}/base"
+    file="${BASE_STATE_DIR:-${file}}/registry"
+    [ -f "${file}" ] || return 0
+    while IFS=$'\t' read -r time label _ path ; do
+      [[ "${time}" =~ ^[0-9]+$ && "${path}" == /* ]] || continue
+      labels["${path}"]="${label}"
+    done < "${file}"
+    for path in "${!labels[@]}" ; do
+      label="${labels["${path}"]}"
+      [[ -n "${label}" && "${label}" == "${word#@}"* && -d "${path}" ]] \
+        || continue
+      [[ "${COMP_WORDBREAKS}" == *@* ]] || label="@${label}"
+      for opt in "${COMPREPLY[@]}" ; do
+        [ "${opt}" != "${label}" ] || continue 2
+      done
+      COMPREPLY+=( "${label}" )
+    done
+  elif [ "${COMP_CWORD}" -eq "1" ] ; then
+    for opt in "--export" "--help" "--version" "each" "run" ; do
+      [[ "${opt}" != "${word}"* ]] || COMPREPLY+=( "${opt}" )
+    done
+  fi
+}
+
+# ### Configure `base` Completion
+#
+# The `_base_complete` function is registered to complete the `base` command,
+# using the default completion when there are no options.
+complete -o default -F _base_complete base
@@ -28,6 +28,7 @@ make install DESTDIR=%{buildroot} PREFIX=/usr
 %{_bindir}/base
 %{_bindir}/base_activate
 %{_datadir}/%{name}/
+%{_datadir}/bash-completion/completions/base
 %{_mandir}/man1/base.1.gz
 %{_datadir}/doc/%{name}/
 
@@ -25,25 +25,53 @@ if [ -z "${GOROOT}" ] ; then
   fi
 fi
 
-# If environment variable `GOPATH` is not already set, then it is configured
-# by traversing up the directory hierarchy until a `src` directory is found.
-# If a `src` directory is not found, a warning is displayed.
+# The Go workspace and module are discovered by traversing up the directory
+# hierarchy, using parameter expansion and file tests so that no processes are
+# created.  The nearest `src` directory (legacy workspace layout), the nearest
+# `go.work` file, and the nearest `go.mod` file are found.  The result is not
+# cached, since a cached result could only be validated by testing the same
+# directories again, to detect `go.work` and `go.mod` files that are added
+# after the result is cached.
+_base_go_src=""
+_base_go_work=""
+_base_go_mod=""
+_base_go_dir="${PWD%/}"
+while true ; do
+  if [[ -z "${_base_go_src}" && "${_base_go_dir##*/}" == "src" ]] ; then
+    _base_go_src="${_base_go_dir%/*}"
+    _base_go_src="${_base_go_src:-/}"
+  fi
+  if [[ -z "${_base_go_work}" && -f "${_base_go_dir}/go.work" ]] ; then
+    _base_go_work="${_base_go_dir}/go.work"
+  fi
+  if [[ -z "${_base_go_mod}" && -f "${_base_go_dir}/go.mod" ]] ; then
+    _base_go_mod="${_base_go_dir}/go.mod"
+  fi
+  [ -n "${_base_go_dir}" ] || break
+  _base_go_dir="${_base_go_dir%/*}"
+done
+unset _base_go_dir
+
+# If environment variable `GOPATH` is not already set and a `src` directory
+# was found, then `GOPATH` is set to the parent of the `src` directory.  If
+# neither a `src` directory nor a Go module or workspace was found, a warning
+# is displayed.  Go modules and workspaces do not require `GOPATH` to be set.
 if [ -z "${GOPATH}" ] ; then
-  _base_gopath="${PWD}"
-  while true ; do
-    if [ "${_base_gopath}" == "/" ] ; then
-      echo "warning: not in a Go workspace" >&2
-      echo "warning: unable to set GOPATH" >&2
-      break
-    elif [ "$(basename "${_base_gopath}")" == "src" ] ; then
-      _base_var_set "GOPATH" "$(dirname "${_base_gopath}")"
-      break
-    else
-      _base_gopath="$(dirname "${_base_gopath}")"
-    fi
-  done
-  unset _base_gopath
+  if [ -n "${_base_go_src}" ] ; then
+    _base_var_set "GOPATH" "${_base_go_src}"
+  elif [ -z "${_base_go_work}${_base_go_mod}" ] ; then
+    echo "warning: not in a Go workspace" >&2
+    echo "warning: unable to set GOPATH" >&2
+  fi
+fi
+
+# If environment variable `GOWORK` is not already set and a `go.work` file was
+# found, then `GOWORK` is set to the path of the file and exported.
+if [[ -z "${GOWORK}" && -n "${_base_go_work}" ]] ; then
+  _base_var_set "GOWORK" "${_base_go_work}"
+  export GOWORK
 fi
+unset _base_go_src _base_go_work _base_go_mod
 
 # When `GOROOT` is set, it is exported.  When it contains a `bin` directory,
 # that `bin` directory is prepended to the `PATH`.
@@ -63,10 +91,127 @@ if [ -n "${GOPATH}" ] ; then
   fi
 fi
 
-# If the `go` command is found, then `go version` is called so that the user
-# can confirm the selected version.  Otherwise a warning is displayed.
-if command -v go >/dev/null 2>&1 ; then
-  go version
+# The Go build cache (`GOCACHE`) and module cache (`GOMODCACHE`) can be
+# configured using environment variables `BASE_GO_CACHE` and
+# `BASE_GO_MODCACHE`, which may be set by a configuration script that is
+# sourced before this one.  The value `base` selects a location for the Base
+# directory, and the value `toolchain` selects a location that is shared by
+# the Base environments that use the same Go installation.  These locations
+# are in the Base cache directory.  Any other value is used as the path.  When
+# environment variable `BASE_GO_FLAGS` is set, `GOFLAGS` is set to its value.
+# Variables that are already set are not changed, and variables that are set
+# are exported.
+for _base_go_var in "GOCACHE" "GOMODCACHE" ; do
+  _base_go_opt="BASE_GO_${_base_go_var#GO}"
+  [[ -n "${!_base_go_opt}" && -z "${!_base_go_var}" ]] || continue
+  _base_go_sub="mod"
+  [ "${_base_go_var}" != "GOCACHE" ] || _base_go_sub="build"
+  case "${!_base_go_opt}" in
+    "base")
+      _base_cache_file "go" "${BASE}"
+      _base_go_dir="${BASE_CACHE_PATH}/${_base_go_sub}"
+      ;;
+    "toolchain")
+      _base_go_dir="${GOROOT%/}"
+      _base_go_dir="${_base_go_dir##*/}"
+      _base_cache_file "go-toolchain" "${_base_go_dir:-default}"
+      _base_go_dir="${BASE_CACHE_PATH}/${_base_go_sub}"
+      ;;
+    *)
+      _base_go_dir="${!_base_go_opt}"
+      _base_go_sub=""
+      ;;
+  esac
+  [ "${_base_go_sub}" != "build" ] || _base_go_prune=1
+  _base_var_set "${_base_go_var}" "${_base_go_dir}"
+  # shellcheck disable=SC2163
+  export "${_base_go_var}"
+done
+if [[ -n "${BASE_GO_FLAGS}" && -z "${GOFLAGS}" ]] ; then
+  _base_var_set "GOFLAGS" "${BASE_GO_FLAGS}"
+  export GOFLAGS
+fi
+unset _base_go_var _base_go_opt _base_go_sub _base_go_dir
+
+# When `GOCACHE` is set to a location in the Base cache directory and
+# environment variable `BASE_GO_CACHE_MAX` is set to a size in MiB, the build
+# cache is pruned to that size by deleting the least recently used files.  Go
+# updates the modification time of the cache files that it uses, so files are
+# ordered by modification time.  Pruning is done in the background by a
+# deactivation callback.  Since deactivation is not necessary in a new Bash
+# shell, it is done when the environment is configured in that case.  Pruning
+# is not done when running a command (`RUNENV`), and it is done at most once a
+# day: the time of the last pruning is stored in a `base-prune.txt` file in
+# the build cache directory, and it is read using builtins.  The module cache
+# is not pruned, since Go does not support removing individual modules.
+if [[ -n "${_base_go_prune}" && -n "${BASE_GO_CACHE_MAX}" \
+    && "${BASE_MODE}" != "RUNENV" ]] ; then
+  if [[ "${BASE_GO_CACHE_MAX}" =~ ^[0-9]+$ ]] ; then
+    _base_go_cache_prune () {
+      local dir="${GOCACHE}" max="$(( BASE_GO_CACHE_MAX * 1048576 ))"
+      local now last=""
+      unset -f _base_go_cache_prune
+      printf -v now '%(%s)T' -1
+      [ ! -f "${dir}/base-prune.txt" ] \
+        || IFS= read -r last < "${dir}/base-prune.txt"
+      [[ "${last}" =~ ^[0-9]+$ ]] && (( now - last < 86400 )) && return 0
+      (
+        echo "${now}" > "${dir}/base-prune.txt"
+        total=0
+        find "${dir}" -mindepth 2 -type f -printf '%T@ %s %p\n' \
+          | sort -rn \
+          | while read -r _ size path ; do
+            total=$(( total + size ))
+            [ "${total}" -le "${max}" ] || rm -f "${path}"
+          done &
+      ) >/dev/null 2>&1
+    }
+    if [ "${BASE_MODE}" == "CURENV" ] ; then
+      _base_deactivation_callback_register _base_go_cache_prune
+    else
+      _base_go_cache_prune
+    fi
+  else
+    echo "warning: invalid BASE_GO_CACHE_MAX: ${BASE_GO_CACHE_MAX}" >&2
+  fi
+fi
+unset _base_go_prune
+
+# If the `go` command is found, then the Go version is displayed so that the
+# user can confirm the selected version.  When the command is in `GOROOT`, the
+# version is read from the `VERSION` file of the installation.  Otherwise, it
+# is read from a cache that is keyed by the path of the command and used while
+# the modification times of the cache and the command are equal.  When neither
+# is available, `go version` is called in the background, so that the prompt
+# is not delayed, and the result is cached.  Since the `VERSION` file does not
+# include the target platform, it is removed from the `go version` output so
+# that the same `go version goX.Y.Z` string is displayed in either case.  If
+# the `go` command is not found, a warning is displayed.
+if hash go 2>/dev/null ; then
+  _base_go_bin="${BASH_CMDS[go]}"
+  _base_go_version=""
+  if [[ -n "${GOROOT}" && "${_base_go_bin}" == "${GOROOT}/bin/go" \
+      && -f "${GOROOT}/VERSION" ]] ; then
+    IFS= read -r _base_go_version < "${GOROOT}/VERSION"
+    _base_go_version="${_base_go_version:+go version ${_base_go_version}}"
+  fi
+  _base_cache_file "go-version" "${_base_go_bin}"
+  if [[ -z "${_base_go_version}" && -f "${BASE_CACHE_PATH}" \
+      && ! "${BASE_CACHE_PATH}" -nt "${_base_go_bin}" \
+      && ! "${_base_go_bin}" -nt "${BASE_CACHE_PATH}" ]] ; then
+    IFS= read -r _base_go_version < "${BASE_CACHE_PATH}"
+  fi
+  if [ -n "${_base_go_version}" ] ; then
+    echo "${_base_go_version}"
+  else
+    # shellcheck disable=SC2016
+    _base_background sh -c \
+      'v="$(go version)" || exit ;
+       case "${v##* }" in */*) v="${v% *}" ;; esac ; echo "${v}" ;
+       echo "${v}" 2>/dev/null > "${1}" && touch -r "${2}" "${1}"' \
+      sh "${BASE_CACHE_PATH}" "${_base_go_bin}"
+  fi
+  unset _base_go_bin _base_go_version
 else
   echo "warning: go command not found" >&2
 fi
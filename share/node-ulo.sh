@@ -0,0 +1,159 @@
+#!/usr/bin/env bash
+
+# This base configuration script configures an environment for using a
+# Node.js installation in `/usr/local/opt`.  No version manager is used, and
+# no processes are created when the cache is valid.
+
+# If environment variable `NODE_HOME` is not already set, then it is
+# configured.  If a link named `.node` exists, then the linked installation is
+# used.  Otherwise, if a `.nvmrc` or `.node-version` file is found by
+# traversing up the directory hierarchy, then the newest installation in
+# `/usr/local/opt` that matches the version in the file is used.  A version
+# may be specified as `MAJOR`, `MAJOR.MINOR`, or `MAJOR.MINOR.PATCH`, with an
+# optional `v` prefix, and `node` selects the newest installation.
+#
+# The version file and installation are cached for the Base directory.  The
+# cache is used while it is newer than the version file and each directory from
+# the Base directory up to the directory of the version file (so that a version
+# file added on the way is noticed), `/usr/local/opt` has not changed since it
+# was written, and the installation still exists.  Installations are listed
+# using `_base_install_index`, so `/usr/local/opt` is only scanned when it
+# changes.
+#
+# If no version file is found, then the user is prompted to select from all
+# directories in `/usr/local/opt` that start with `node-`.  If there is only
+# one, it is selected automatically.  If there are none, a warning is
+# displayed.
+if [ -z "${NODE_HOME}" ] ; then
+  if [ -h ".node" ] ; then
+    _base_var_set "NODE_HOME" "$(readlink ".node")"
+  elif [ -d "/usr/local/opt" ] ; then
+    _base_node_file=""
+    _base_node_home=""
+    _base_cache_file "node-ulo" "${PWD}"
+    _base_node_cache="${BASE_CACHE_PATH}"
+    if [[ -f "${_base_node_cache}" \
+        && ! "/usr/local/opt" -nt "${_base_node_cache}" ]] ; then
+      {
+        IFS= read -r _base_node_file
+        IFS= read -r _base_node_home
+      } < "${_base_node_cache}"
+      if [[ -z "${_base_node_file}" || -z "${_base_node_home}" \
+          || ! -f "${_base_node_file}" || ! -d "${_base_node_home}" \
+          || "${_base_node_file}" -nt "${_base_node_cache}" ]] ; then
+        _base_node_file=""
+        _base_node_home=""
+      fi
+      _base_node_dir="${PWD%/}"
+      while [ -n "${_base_node_home}" ] ; do
+        if [ ! "${_base_node_cache}" -nt "${_base_node_dir:-/}" ] ; then
+          _base_node_file=""
+          _base_node_home=""
+        elif [ "${_base_node_dir}" == "${_base_node_file%/*}" ] ; then
+          break
+        elif [ -z "${_base_node_dir}" ] ; then
+          _base_node_file=""
+          _base_node_home=""
+        fi
+        _base_node_dir="${_base_node_dir%/*}"
+      done
+      unset _base_node_dir
+    fi
+    if [ -z "${_base_node_home}" ] ; then
+      _base_node_dir="${PWD%/}"
+      while true ; do
+        for _base_node_file in \
+            "${_base_node_dir}/.nvmrc" "${_base_node_dir}/.node-version" ; do
+          [ -f "${_base_node_file}" ] && break 2
+        done
+        _base_node_file=""
+        [ -n "${_base_node_dir}" ] || break
+        _base_node_dir="${_base_node_dir%/*}"
+      done
+      if [ -n "${_base_node_file}" ] ; then
+        _base_node_spec=""
+        IFS=$' \t\r' read -r _base_node_spec _ < "${_base_node_file}"
+        _base_node_spec="${_base_node_spec#v}"
+        if [[ "${_base_node_spec}" =~ ^[0-9]+(\.[0-9]+){0,2}$ \
+            || "${_base_node_spec}" == "node" ]] ; then
+          _base_install_index "/usr/local/opt"
+          for _base_node_idx in "${!BASE_INSTALL_NAMES[@]}" ; do
+            [[ "${BASE_INSTALL_NAMES[${_base_node_idx}]}" == node-* ]] \
+              || continue
+            _base_node_dir="${BASE_INSTALL_VERSIONS[${_base_node_idx}]}"
+            if [[ "${_base_node_spec}" == "node" \
+                || "${_base_node_dir}" == "${_base_node_spec}" \
+                || "${_base_node_dir}" == "${_base_node_spec}"[.-]* ]]
+            then
+              _base_node_home="${BASE_INSTALL_PATHS[${_base_node_idx}]}"
+              break
+            fi
+          done
+          if [ -n "${_base_node_home}" ] ; then
+            printf '%s\n' "${_base_node_file}" "${_base_node_home}" \
+              2>/dev/null > "${_base_node_cache}"
+          else
+            echo "warning: Node.js ${_base_node_spec} not found" >&2
+          fi
+          unset _base_node_idx
+        else
+          echo "warning: unsupported Node.js version: ${_base_node_spec}" >&2
+        fi
+        unset _base_node_spec
+      fi
+      unset _base_node_dir
+    fi
+    if [ -n "${_base_node_home}" ] ; then
+      _base_var_set "NODE_HOME" "${_base_node_home}"
+    elif [ -z "${_base_node_file}" ] \
+        && _base_select_dir "Node.js installation" "/usr/local/opt" "node-*"
+    then
+      _base_var_set "NODE_HOME" "/usr/local/opt/${BASE_SELECTION}"
+      unset BASE_SELECTION
+    else
+      echo "warning: unable to set NODE_HOME" >&2
+    fi
+    unset _base_node_cache _base_node_file _base_node_home
+  else
+    echo "warning: /usr/local/opt not found" >&2
+    echo "warning: unable to set NODE_HOME" >&2
+  fi
+fi
+
+# When `NODE_HOME` is set, it is exported.  When it contains a `bin`
+# directory, that `bin` directory is prepended to the `PATH`.
+if [ -n "${NODE_HOME}" ] ; then
+  export NODE_HOME
+  if [ -d "${NODE_HOME}/bin" ] ; then
+    _base_var_set "PATH" "${NODE_HOME}/bin:${PATH}"
+  fi
+fi
+
+# If the `node` command is found, then the Node.js version is displayed so
+# that the user can confirm the selected version.  When the command is in
+# `NODE_HOME`, the version is read from the `node_version.h` header of the
+# installation, so that no processes are created.  Otherwise, `node --version`
+# is called in the background so that the prompt is not delayed.  If the
+# `node` command is not found, a warning is displayed.
+if hash node 2>/dev/null ; then
+  _base_node_version=()
+  if [[ -n "${NODE_HOME}" && "${BASH_CMDS[node]}" == "${NODE_HOME}/bin/node" \
+      && -f "${NODE_HOME}/include/node/node_version.h" ]] ; then
+    while read -r _base_node_line ; do
+      if [[ "${_base_node_line}" =~ \
+          ^#define\ NODE_(MAJOR|MINOR|PATCH)_VERSION\ +([0-9]+) ]] ; then
+        _base_node_version+=( "${BASH_REMATCH[2]}" )
+        [ "${#_base_node_version[@]}" -lt "3" ] || break
+      fi
+    done < "${NODE_HOME}/include/node/node_version.h"
+    unset _base_node_line
+  fi
+  if [ "${#_base_node_version[@]}" -eq "3" ] ; then
+    printf 'Node.js v%s.%s.%s\n' "${_base_node_version[@]}"
+  else
+    _base_background node --version
+  fi
+  unset _base_node_version
+else
+  echo "warning: node command not found" >&2
+fi
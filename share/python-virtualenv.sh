@@ -7,21 +7,246 @@
 # automatically.
 #
 # Otherwise, the user is prompted to select from all directories that start
-# with `virtualenv`.  If there is only one, it is selected automatically.  If
-# there are none, a warning is displayed.
-#
-# When `PATH` is modified, `python --version` is called so that the user can
-# confirm the selected version.
+# with `virtualenv`, as well as `.venv` and `venv` directories, sorted by
+# version with the newest first.  If there is only one, it is selected
+# automatically.  If there are none, a warning is displayed.  The directories
+# are found using globbing, with the `failglob` shell option disabled, so that
+# no processes are created and no index of the project directory is kept.
+# Links to directories are not included.
 if [ -e "virtualenv" ] ; then
-  _base_var_set "PATH" "$(pwd)/virtualenv/bin:${PATH}"
-  python --version
+  _base_venv="virtualenv"
 else
-  _base_select_dir "Python virtual environment" "." "virtualenv*"
-  if [ -n "${BASE_SELECTION}" ] ; then
-    _base_var_set "PATH" "$(pwd)/${BASE_SELECTION}/bin:${PATH}"
+  _base_venv_opts=()
+  _base_venv_failglob=""
+  if shopt -q failglob ; then
+    _base_venv_failglob=1
+    shopt -u failglob
+  fi
+  for _base_venv in virtualenv* .venv venv ; do
+    if [[ -d "${_base_venv}" && ! -h "${_base_venv}" ]] ; then
+      _base_venv_opts+=( "${_base_venv}" )
+    fi
+  done
+  [ -z "${_base_venv_failglob}" ] || shopt -s failglob
+  _base_lib_version_sort _base_venv_opts
+  _base_venv_sorted=()
+  for (( _base_venv_idx=${#_base_venv_opts[@]}-1 ; _base_venv_idx>=0 ; \
+      _base_venv_idx-- )) ; do
+    _base_venv_sorted+=( "${_base_venv_opts[${_base_venv_idx}]}" )
+  done
+  _base_venv=""
+  if [ "${#_base_venv_sorted[@]}" -eq "0" ] ; then
+    echo "warning: no Python virtual environment directories found" >&2
+  elif _base_select "Python virtual environment" \
+      "${_base_venv_sorted[@]}" ; then
+    _base_venv="${BASE_SELECTION}"
     unset BASE_SELECTION
-    python --version
+  fi
+  [ -n "${_base_venv}" ] \
+    || echo "warning: no Python virtual environment loaded" >&2
+  unset _base_venv_opts _base_venv_failglob _base_venv_sorted _base_venv_idx
+fi
+
+# When a virtual environment is selected, its `bin` directory is prepended to
+# the `PATH`, and the Python version is read from the `pyvenv.cfg` file of the
+# virtual environment, so that no processes are created.
+if [ -n "${_base_venv}" ] ; then
+  _base_venv="${PWD}/${_base_venv}"
+  _base_var_set "PATH" "${_base_venv}/bin:${PATH}"
+  _base_venv_version=""
+  if [ -f "${_base_venv}/pyvenv.cfg" ] ; then
+    while IFS= read -r _base_venv_line ; do
+      if [[ "${_base_venv_line}" =~ \
+          ^version(_info)?\ *=\ *([0-9]+\.[0-9]+(\.[0-9]+)?) ]] ; then
+        _base_venv_version="${BASH_REMATCH[2]}"
+        break
+      fi
+    done < "${_base_venv}/pyvenv.cfg"
+    unset _base_venv_line
+  fi
+fi
+
+# The Python bytecode cache and pip cache can be configured using environment
+# variables, which may be set by a configuration script that is sourced before
+# this one.  Variables that are already set are not changed, and variables
+# that are set are exported.
+#
+# `BASE_PYTHON_PYCACHE` configures `PYTHONPYCACHEPREFIX` (Python 3.8+), so
+# that bytecode is not written next to the sources.  The value `base` selects
+# a location for the Base directory, in `XDG_RUNTIME_DIR` (usually a `tmpfs`)
+# when it is set or in the Base cache directory otherwise.  Any other value is
+# used as the path.
+#
+# `BASE_PYTHON_PIP_CACHE` configures `PIP_CACHE_DIR`.  The value `version`
+# selects a location in the Base cache directory that is shared by the virtual
+# environments for the same Python version (`MAJOR.MINOR`).  Any other value
+# is used as the path.
+if [[ -n "${_base_venv}" && -n "${BASE_PYTHON_PYCACHE}" \
+    && -z "${PYTHONPYCACHEPREFIX}" ]] ; then
+  if [ "${BASE_PYTHON_PYCACHE}" != "base" ] ; then
+    _base_var_set "PYTHONPYCACHEPREFIX" "${BASE_PYTHON_PYCACHE}"
+  elif [[ -n "${XDG_RUNTIME_DIR}" && -d "${XDG_RUNTIME_DIR}" ]] ; then
+    _base_venv_key="${BASE//%/%25}"
+    _base_var_set "PYTHONPYCACHEPREFIX" \
+      "${XDG_RUNTIME_DIR}/base/pycache/${_base_venv_key//\//%2F}"
+    unset _base_venv_key
+  else
+    _base_cache_file "pycache" "${BASE}"
+    _base_var_set "PYTHONPYCACHEPREFIX" "${BASE_CACHE_PATH}"
+  fi
+  export PYTHONPYCACHEPREFIX
+fi
+if [[ -n "${_base_venv}" && -n "${BASE_PYTHON_PIP_CACHE}" \
+    && -z "${PIP_CACHE_DIR}" ]] ; then
+  if [ "${BASE_PYTHON_PIP_CACHE}" != "version" ] ; then
+    _base_var_set "PIP_CACHE_DIR" "${BASE_PYTHON_PIP_CACHE}"
+    export PIP_CACHE_DIR
+  elif [[ "${_base_venv_version}" =~ ^[0-9]+\.[0-9]+ ]] ; then
+    _base_cache_dir "pip"
+    _base_var_set "PIP_CACHE_DIR" "${BASE_CACHE_PATH}/${BASH_REMATCH[0]}"
+    export PIP_CACHE_DIR
+  else
+    echo "warning: Python version unknown; unable to set PIP_CACHE_DIR" >&2
+  fi
+fi
+
+# When environment variable `BASE_PYTHON_COMPILE` is set, the Python sources
+# of the project and the packages installed in the virtual environment are
+# compiled to bytecode in the background, so that the first run after a
+# checkout or upgrade is not delayed.  Files are compiled in parallel, using
+# `BASE_PYTHON_COMPILE_JOBS` processes (default: one per CPU) at a low
+# priority.  Hidden directories, `__pycache__` directories, the virtual
+# environment directory, and other virtual environments (directories that
+# contain a `pyvenv.cfg` file) are not searched in the project.
+#
+# A manifest of source file modification times is saved in the Base cache
+# directory, and only files that changed since the last run are compiled.
+# Compilation is not started again within `BASE_PYTHON_COMPILE_INTERVAL`
+# seconds (default: 300) of the last start, so that opening many shells does
+# not run the search repeatedly.  The start time is read using the `printf`
+# builtin so that no processes are created when compilation is skipped.
+#
+# A check file lists the searched directories and the project source files.
+# Its modification time is set to the end of the run, or to the start of the
+# search when a project source file changed during the run.  Python is only
+# started when the check file is missing or one of the listed paths is newer,
+# so no processes are created when nothing changed.  Compilation is skipped
+# when running a command (`base run` or `base each`).
+if [[ -n "${_base_venv}" && -n "${BASE_PYTHON_COMPILE}" \
+    && "${BASE_MODE}" != "RUNENV" && -x "${_base_venv}/bin/python" ]] \
+    && _base_cache_file "pycompile" "${_base_venv}" ; then
+  printf -v _base_venv_now '%(%s)T' -1
+  _base_venv_last=0
+  if [ -f "${BASE_CACHE_PATH}.time" ] ; then
+    read -r _base_venv_last < "${BASE_CACHE_PATH}.time"
+    [[ "${_base_venv_last}" =~ ^[0-9]+$ ]] || _base_venv_last=0
+  fi
+  if (( _base_venv_now - _base_venv_last \
+      >= ${BASE_PYTHON_COMPILE_INTERVAL:-300} )) ; then
+    printf '%s\n' "${_base_venv_now}" > "${BASE_CACHE_PATH}.time"
+    _base_venv_stale=1
+    if [ -f "${BASE_CACHE_PATH}.check" ] ; then
+      _base_venv_stale=
+      # shellcheck disable=SC2094
+      while IFS= read -r _base_venv_path ; do
+        if [ "${_base_venv_path}" -nt "${BASE_CACHE_PATH}.check" ] ; then
+          _base_venv_stale=1
+          break
+        fi
+      done < "${BASE_CACHE_PATH}.check"
+    fi
+  else
+    _base_venv_stale=
+  fi
+  if [ -n "${_base_venv_stale}" ] ; then
+    (
+      "${_base_venv}/bin/python" -c '
+import compileall, concurrent.futures, functools, os, sys, sysconfig, time
+
+manifest, venv, jobs = sys.argv[1], sys.argv[2], sys.argv[3]
+start = time.time_ns()
+checks, projdirs = [], []
+
+def scan(root, skip, project):
+    for path, dirs, files in os.walk(root):
+        checks.append(path)
+        if project:
+            projdirs.append(path)
+        dirs[:] = [
+            name for name in dirs
+            if not name.startswith(".") and name != "__pycache__"
+            and os.path.join(path, name) != skip
+            and not os.path.isfile(os.path.join(path, name, "pyvenv.cfg"))
+        ]
+        for name in files:
+            if name.endswith(".py"):
+                try:
+                    mtime = os.stat(os.path.join(path, name)).st_mtime_ns
+                except OSError:
+                    continue
+                if project:
+                    checks.append(os.path.join(path, name))
+                yield os.path.join(path, name), str(mtime)
+
+old = {}
+try:
+    with open(manifest) as infile:
+        for line in infile:
+            mtime, _, path = line.rstrip("\n").partition(" ")
+            old[path] = mtime
+except OSError:
+    pass
+
+new = dict(scan(os.getcwd(), venv, True))
+for key in ("purelib", "platlib"):
+    new.update(scan(sysconfig.get_paths()[key], None, False))
+stale = sorted(path for path, mtime in new.items() if old.get(path) != mtime)
+
+if stale:
+    os.nice(10)
+    compile_file = functools.partial(compileall.compile_file, quiet=2)
+    workers = int(jobs) if jobs.isdigit() and int(jobs) > 0 else None
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        for _ in executor.map(compile_file, stale, chunksize=32):
+            pass
+
+with open(manifest + ".tmp", "w") as outfile:
+    for path, mtime in sorted(new.items()):
+        outfile.write(f"{mtime} {path}\n")
+os.replace(manifest + ".tmp", manifest)
+
+def changed(path):
+    try:
+        return any(
+            entry.name.endswith(".py") and entry.is_file()
+            and entry.stat().st_mtime_ns >= start
+            for entry in os.scandir(path)
+        )
+    except OSError:
+        return True
+
+stamp = start if any(map(changed, projdirs)) else time.time_ns()
+with open(manifest + ".check.tmp", "w") as outfile:
+    for path in checks:
+        outfile.write(f"{path}\n")
+os.utime(manifest + ".check.tmp", ns=(stamp, stamp))
+os.replace(manifest + ".check.tmp", manifest + ".check")
+' "${BASE_CACHE_PATH}" "${_base_venv}" "${BASE_PYTHON_COMPILE_JOBS:-0}" &
+    ) >/dev/null 2>&1 </dev/null
+  fi
+  unset _base_venv_now _base_venv_last _base_venv_path _base_venv_stale
+fi
+
+# When `PATH` is modified, the Python version is displayed so that the user
+# can confirm the selected version.  When the version is not available from
+# `pyvenv.cfg`, `python --version` is called in the background so that the
+# prompt is not delayed.
+if [ -n "${_base_venv}" ] ; then
+  if [ -n "${_base_venv_version}" ] ; then
+    echo "Python ${_base_venv_version}"
   else
-    echo "warning: no Python virtual environment loaded" >&2
+    _base_background python --version
   fi
+  unset _base_venv_version
 fi
+unset _base_venv
@@ -11,9 +11,11 @@
 
 # https://docs.python.org/3/
 import contextlib
+import json
 import os
 import re
 import subprocess
+import sys
 import tempfile
 import time
 import unittest
@@ -137,6 +139,16 @@ def sudo_rm_rf(path):
     subprocess.run(['sudo', 'rm', '-rf', path], check=True)
 
 
+def sudo_write(path, content, mode=0o644):
+    subprocess.run(
+        ['sudo', 'tee', path],
+        input=content.encode(),
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    subprocess.run(['sudo', 'chmod', f'{mode:o}', path], check=True)
+
+
 @contextlib.contextmanager
 def temp_project(subdirs=None):
     with tempfile.TemporaryDirectory() as tempdir:
@@ -167,6 +179,55 @@ def temp_project_go(link=None, versions=None):
     sudo_rm_rf('/usr/local/opt')
 
 
+def write_fake_go(goroot, version=None):
+    bindir = os.path.join(goroot, 'bin')
+    mkdir_p(bindir)
+    path = os.path.join(bindir, 'go')
+    with open(path, 'w') as outfile:
+        outfile.write('#!/bin/sh\n')
+        outfile.write(f'echo run >> {goroot}/runs\n')
+        outfile.write('echo "go version go1.0.0 fake/fake"\n')
+    os.chmod(path, 0o755)
+    if version is not None:
+        with open(os.path.join(goroot, 'VERSION'), 'w') as outfile:
+            outfile.write(f'{version}\ntime 2021-01-01T00:00:00Z\n')
+
+
+@contextlib.contextmanager
+def temp_project_node(link=None, versions=None):
+    if versions is None:
+        versions = ('16.20.2', '18.17.1', '18.19.0')
+    for version in versions:
+        nodedir = os.path.join('/usr/local/opt', f'node-v{version}-linux-x64')
+        sudo_mkdir_p(os.path.join(nodedir, 'bin'))
+        sudo_mkdir_p(os.path.join(nodedir, 'include', 'node'))
+        major, minor, patch = version.split('.')
+        sudo_write(
+            os.path.join(nodedir, 'include', 'node', 'node_version.h'),
+            f'#define NODE_MAJOR_VERSION {major}\n'
+            f'#define NODE_MINOR_VERSION {minor}\n'
+            f'#define NODE_PATCH_VERSION {patch}\n',
+        )
+        sudo_write(
+            os.path.join(nodedir, 'bin', 'node'),
+            f'#!/bin/sh\necho v{version}\n',
+            0o755,
+        )
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        projdir = os.path.join(tempdir, 'project')
+        mkdir_p(projdir)
+        if link is not None:
+            os.symlink(
+                os.path.join('/usr/local/opt', f'node-v{link}-linux-x64'),
+                os.path.join(projdir, '.node'),
+                True,
+            )
+        yield projdir
+
+    sudo_rm_rf('/usr/local/opt')
+
+
 @contextlib.contextmanager
 def temp_project_python(link=None, versions=None):
     with tempfile.TemporaryDirectory() as tempdir:
@@ -384,6 +445,343 @@ class TestBase(unittest.TestCase):
         self.assertNotFound('BASE_VERSION')
         self.assertEqual(self.getPID(), pid_initial)
 
+    # --export argument ######################################################
+
+    def test_base_export_sh(self):
+        with temp_project() as projdir:
+            basedir = os.path.join(projdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-vars.env'), 'w') as outfile:
+                outfile.write('FOO="a b"\n')
+            with open(os.path.join(basedir, '20-vars'), 'w') as outfile:
+                outfile.write('echo configured\n')
+                outfile.write('_base_var_set "MODE" "${BASE_MODE}"\n')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            pid_initial = self.getPID()
+            self.sendline('base --export 2>&1 | cat -A')
+            self.expect_exact(b'\r\nconfigured$')
+            self.expect_exact(b'\r\nexport FOO=a\\ b$\r\nMODE=RUNENV$\r\n')
+            self.assertUserPrompt()
+            self.sendline('base --export 2>&1 | cat -A')
+            self.expect_exact(b'\r\nexport FOO=a\\ b$\r\nMODE=RUNENV$\r\n')
+            self.sendline('eval "$(base --export)" ; echo "${FOO}"')
+            self.expect_exact(b'\r\na b\r\n')
+            self.assertEqual(self.getPID(), pid_initial)
+            self.assertNotFound('_base_ps_update')
+
+    def test_base_export_dotenv(self):
+        with temp_project() as projdir:
+            basedir = os.path.join(projdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-vars.env'), 'w') as outfile:
+                outfile.write('export FOO=\'a "$b"\'\n')
+            with open(os.path.join(basedir, '20-vars'), 'w') as outfile:
+                outfile.write('_base_var_set "BAR" "local"\n')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('base --export=dotenv')
+            self.expect_exact(b'\r\nFOO="a \\"\\$b\\""\r\n')
+            self.assertUserPrompt()
+
+    def test_base_export_json(self):
+        with temp_project() as projdir:
+            basedir = os.path.join(projdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-vars'), 'w') as outfile:
+                outfile.write('_base_var_set "FOO" $\'a\\tb\'\n')
+                outfile.write('export FOO\n')
+                outfile.write('_base_var_unset "HOME"\n')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('base --export=json > out.json')
+            self.assertUserPrompt()
+            with open(os.path.join(projdir, 'out.json')) as infile:
+                self.assertEqual(json.load(infile), {
+                    'FOO': {'value': 'a\tb', 'exported': True},
+                    'HOME': {'value': None, 'exported': False},
+                })
+
+    def test_base_export_cache_selection(self):
+        with temp_project() as projdir:
+            basedir = os.path.join(projdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-thing'), 'w') as outfile:
+                outfile.write('_base_select "thing" t-1 t-2\n')
+                outfile.write('_base_var_set THING "${BASE_SELECTION}"\n')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('export BASE_EXPORT_CACHE=1')
+            self.sendline('BASE_SELECT_THING=t-1 base --export')
+            self.expect_exact(b'\r\nTHING=t-1\r\n')
+            self.assertUserPrompt()
+            self.sendline('BASE_SELECT_THING=t-2 base --export')
+            self.expect_exact(b'\r\nTHING=t-2\r\n')
+            self.assertUserPrompt()
+            self.sendline('BASE_SELECT_THING=1 base --export')
+            self.expect_exact(b'\r\nTHING=t-1\r\n')
+            self.assertUserPrompt()
+
+    def test_base_export_no_cache(self):
+        with temp_project() as projdir:
+            with open(os.path.join(projdir, '.base'), 'w') as outfile:
+                outfile.write('_base_var_set "FOO" "${OTHER}"\n')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('OTHER=one base --export')
+            self.expect_exact(b'\r\nFOO=one\r\n')
+            self.assertUserPrompt()
+            self.sendline('OTHER=two base --export')
+            self.expect_exact(b'\r\nFOO=two\r\n')
+            self.assertUserPrompt()
+
+    def test_base_export_invalid_format(self):
+        pid_initial = self.getPID()
+        self.sendline('base --export=xml')
+        self.expect_exact(b'\r\nerror: unknown export format: xml\r\n')
+        self.assertStatus(2)
+        self.assertEqual(self.getPID(), pid_initial)
+
+    def test_source_base_export(self):
+        pid_initial = self.getPID()
+        self.sendline('source base --export')
+        self.assertUsage()
+        self.assertStatus(2)
+        self.assertNotFound('_base_help')
+        self.assertNotFound('_base_export')
+        self.assertEqual(self.getPID(), pid_initial)
+
+    # run command ############################################################
+
+    def test_base_run(self):
+        with temp_project() as projdir:
+            basedir = os.path.join(projdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-vars.env'), 'w') as outfile:
+                outfile.write('FOO="a b"\n')
+            with open(os.path.join(basedir, '20-vars'), 'w') as outfile:
+                outfile.write('echo configured\n')
+                outfile.write('_base_var_set "MODE" "${BASE_MODE}"\n')
+                outfile.write('export MODE\n')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            pid_initial = self.getPID()
+            self.sendline(
+                'base run -- sh -c \'echo "${FOO}/${MODE}/${PROMPT_COMMAND}" ;'
+                ' exit 3\' 2>/dev/null'
+            )
+            self.expect_exact(b'\r\na b/RUNENV/\r\n')
+            self.assertStatus(3)
+            self.assertEqual(self.getPID(), pid_initial)
+            self.assertNotFound('_base_ps_update')
+
+    def test_base_run_label(self):
+        with temp_project() as projdir:
+            with open(os.path.join(projdir, '.base'), 'w') as outfile:
+                outfile.write('_base_var_set "LABEL" "${BASE_LABEL}"\n')
+                outfile.write('export LABEL\n')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('base run example -- sh -c \'echo "[${LABEL}]"\'')
+            self.expect_exact(b'\r\n[example]\r\n')
+            self.assertStatus(0)
+
+    def test_base_run_no_command(self):
+        pid_initial = self.getPID()
+        self.sendline('base run --')
+        self.assertUsage()
+        self.assertStatus(2)
+        self.assertEqual(self.getPID(), pid_initial)
+
+    # each command ###########################################################
+
+    def test_base_each(self):
+        with temp_project(('one', 'two/three', '.hidden')) as rootdir:
+            with open(os.path.join(rootdir, 'one', '.base'), 'w') as outfile:
+                outfile.write('_base_var_set "NAME" "one"\n')
+                outfile.write('export NAME\n')
+            basedir = os.path.join(rootdir, 'two', 'three', '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-vars.env'), 'w') as outfile:
+                outfile.write('NAME=three\n')
+            with open(os.path.join(rootdir, '.hidden', '.base'), 'w'):
+                pass
+            self.sendline(f'cd {rootdir}')
+            self.assertUserPrompt()
+            pid_initial = self.getPID()
+            self.sendline(
+                'base each -j 2 -- sh -c \'echo "name=${NAME}" ;'
+                ' [ "${NAME}" = "one" ]\' | sort'
+            )
+            self.expect_exact(b'\r\none: name=one\r\n')
+            self.expect_exact(b'\r\ntwo/three: name=three\r\n')
+            self.assertUserPrompt()
+            self.sendline('base each -- true > summary.txt ; echo $?')
+            self.expect_exact(b'\r\n0\r\n')
+            with open(os.path.join(rootdir, 'summary.txt')) as infile:
+                lines = infile.read().splitlines()
+            self.assertEqual(lines[0], 'summary:')
+            self.assertEqual(
+                [line.split()[::2] for line in lines[1:]],
+                [['0', 'one'], ['0', 'two/three']],
+            )
+            self.sendline('base each -- false > /dev/null ; echo $?')
+            self.expect_exact(b'\r\n1\r\n')
+            with open(os.path.join(basedir, '20-session'), 'w') as outfile:
+                outfile.write('echo "session=${BASE_SESSION_DIR##*/}"\n')
+            with open(os.path.join(rootdir, 'one', '.base'), 'a') as outfile:
+                outfile.write('echo "session=${BASE_SESSION_DIR##*/}"\n')
+            self.sendline('base each -- true | grep session= | sort')
+            self.expect_exact(b'\r\none: session=session-0\r\n')
+            self.expect_exact(b'two/three: session=session-1\r\n')
+            self.assertUserPrompt()
+            tmpdir = os.path.join(rootdir, 'tmp')
+            mkdir_p(tmpdir)
+            self.sendline(f'TMPDIR={tmpdir} base each -- true > /dev/null')
+            self.assertStatus(0)
+            self.assertEqual(os.listdir(tmpdir), [])
+            self.assertEqual(self.getPID(), pid_initial)
+
+    def test_base_each_no_command(self):
+        pid_initial = self.getPID()
+        self.sendline('base each -j 2 --')
+        self.assertUsage()
+        self.assertStatus(2)
+        self.assertEqual(self.getPID(), pid_initial)
+
+    # registry ###############################################################
+
+    def test_base_registry(self):
+        with temp_project(('proj', 'state')) as tempdir:
+            projdir = os.path.join(tempdir, 'proj')
+            statedir = os.path.join(tempdir, 'state')
+            self.sendline(f'export BASE_STATE_DIR={statedir}')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('base registered')
+            self.assertBasePrompt(b'registered', b'')
+            self.sendline('exit')
+            self.assertUserPrompt()
+            with open(os.path.join(statedir, 'registry')) as infile:
+                fields = infile.read().rstrip('\n').split('\t')
+            self.assertEqual(fields[1:], ['registered', 'NEWENV', projdir])
+            self.sendline('cd /tmp')
+            self.assertUserPrompt()
+            pid_initial = self.getPID()
+            self.sendline('base @registered')
+            self.assertBasePrompt(b'registered', b'')
+            self.assertNotEqual(self.getPID(), pid_initial)
+            self.sendline('echo "${BASE}"')
+            self.expect_exact(f'\r\n{projdir}\r\n'.encode())
+            self.sendline('exit')
+            self.assertUserPrompt()
+            self.assertEqual(self.getPID(), pid_initial)
+            self.sendline('pwd')
+            self.expect_exact(b'\r\n/tmp\r\n')
+            self.sendline('base run @registered -- pwd')
+            self.expect_exact(f'\r\n{projdir}\r\n'.encode())
+            self.assertStatus(0)
+            with open(os.path.join(statedir, 'registry')) as infile:
+                self.assertEqual(len(infile.read().splitlines()), 2)
+
+    def test_source_base_registry(self):
+        with temp_project(('proj', 'state')) as tempdir:
+            projdir = os.path.join(tempdir, 'proj')
+            statedir = os.path.join(tempdir, 'state')
+            self.sendline(f'export BASE_STATE_DIR={statedir}')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base registered')
+            self.assertBasePrompt(b'registered', b'')
+            self.sendline('exit')
+            self.assertUserPrompt()
+            self.sendline('cd /tmp')
+            self.assertUserPrompt()
+            self.sendline('source base @registered')
+            self.assertBasePrompt(b'registered', b'')
+            self.sendline('echo "${BASE}"')
+            self.expect_exact(f'\r\n{projdir}\r\n'.encode())
+            self.sendline('exit')
+            self.assertUserPrompt()
+            self.sendline('echo "${PWD}:${OLDPWD}"')
+            self.expect_exact(f'\r\n/tmp:{projdir}\r\n'.encode())
+            startdir = os.path.join(tempdir, 'start')
+            mkdir_p(startdir)
+            self.sendline(f'cd {startdir}')
+            self.assertUserPrompt()
+            self.sendline('source base @registered')
+            self.assertBasePrompt(b'registered', b'')
+            os.rmdir(startdir)
+            self.sendline('exit')
+            self.assertUserPrompt()
+            self.assertStatus(1)
+            self.assertNotFound('BASE_REGISTRY_RETURN')
+
+    def test_source_base_activate_registry(self):
+        with temp_project(('proj', 'state')) as tempdir:
+            projdir = os.path.join(tempdir, 'proj')
+            statedir = os.path.join(tempdir, 'state')
+            self.sendline(f'export BASE_STATE_DIR={statedir}')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate registered')
+            self.assertBasePrompt(b'registered', b'')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('cd /tmp')
+            self.assertUserPrompt()
+            self.sendline('source base_activate @registered')
+            self.assertBasePrompt(b'registered', b'')
+            self.sendline('echo "${BASE}:${PWD}"')
+            self.expect_exact(f'\r\n{projdir}:{projdir}\r\n'.encode())
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+
+    def test_base_registry_not_found(self):
+        with temp_project(('state',)) as tempdir:
+            statedir = os.path.join(tempdir, 'state')
+            self.sendline(f'export BASE_STATE_DIR={statedir}')
+            self.sendline('cd /tmp')
+            self.assertUserPrompt()
+            pid_initial = self.getPID()
+            self.sendline('base @missing')
+            self.expect_exact(
+                b'\r\nerror: Base not found in registry: missing\r\n')
+            self.assertStatus(1)
+            self.assertEqual(self.getPID(), pid_initial)
+            self.sendline('source base_activate @missing')
+            self.expect_exact(
+                b'\r\nerror: Base not found in registry: missing\r\n')
+            self.assertStatus(1)
+            self.assertNotFound('BASE')
+
+    def test_base_registry_complete(self):
+        with temp_project(('one', 'two', 'gone', 'state')) as tempdir:
+            statedir = os.path.join(tempdir, 'state')
+            with open(os.path.join(statedir, 'registry'), 'w') as outfile:
+                for name in ('one', 'two', 'gone'):
+                    path = os.path.join(tempdir, name)
+                    outfile.write(f'1\tlabel-{name}\tNEWENV\t{path}\n')
+                path = os.path.join(tempdir, 'two')
+                outfile.write(f'2\trenamed\tNEWENV\t{path}\n')
+            os.rmdir(os.path.join(tempdir, 'gone'))
+            self.sendline(f'export BASE_STATE_DIR={statedir}')
+            self.sendline(
+                'source /usr/share/bash-completion/completions/base')
+            self.sendline(
+                'COMP_LINE="base @la" COMP_POINT=8 COMP_CWORD=2'
+                ' _base_complete ; echo "[${COMPREPLY[*]}]"')
+            self.expect_exact(b'\r\n[label-one]\r\n')
+            self.sendline(
+                'COMP_LINE="base @" COMP_POINT=6 COMP_CWORD=2'
+                ' _base_complete ; printf "%s\\n" "${COMPREPLY[@]}" | sort'
+                ' | tr "\\n" " "')
+            self.expect_exact(b'\r\nlabel-one renamed ')
+            self.sendline(
+                'COMP_LINE="base e" COMP_POINT=6 COMP_CWORD=1'
+                ' _base_complete ; echo "[${COMPREPLY[*]}]"')
+            self.expect_exact(b'\r\n[each]\r\n')
+
     # nested bases ###########################################################
 
     def test_base_nested(self):
@@ -502,6 +900,117 @@ class TestBase(unittest.TestCase):
         self.sendline('base_deactivate')
         self.assertNotFound('BASE')
 
+    # BASE_FIND environment variable #########################################
+
+    def test_base_find(self):
+        with temp_project(('base/src/project', 'cache')) as tempdir:
+            basedir = os.path.join(tempdir, 'base')
+            projdir = os.path.join(basedir, 'src', 'project')
+            cachedir = os.path.join(tempdir, 'cache')
+            with open(os.path.join(basedir, '.base'), 'w') as outfile:
+                outfile.write('FOUND="${PWD}"\n')
+            self.sendline(f'export BASE_FIND=1 BASE_CACHE_DIR={cachedir}')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.assertBasePrompt(b'base', b'src/project')
+            self.sendline('echo "${BASE}:${FOUND}:${PWD}"')
+            self.expect_exact(
+                f'\r\n{basedir}:{basedir}:{projdir}\r\n'.encode())
+            self.sendline('exit')
+            self.assertUserPrompt()
+            cache = projdir.replace('%', '%25').replace('/', '%2F')
+            with open(os.path.join(cachedir, 'find', cache)) as infile:
+                self.assertEqual(infile.read(), f'{basedir}\n')
+            self.sendline('base')
+            self.assertBasePrompt(b'base', b'src/project')
+            self.sendline('exit')
+            self.assertUserPrompt()
+            self.sendline('unset BASE_FIND ; base')
+            self.assertBasePrompt(b'project', b'')
+
+    def test_base_find_cache_intermediate(self):
+        with temp_project(('base/src/project', 'cache')) as tempdir:
+            basedir = os.path.join(tempdir, 'base')
+            srcdir = os.path.join(basedir, 'src')
+            projdir = os.path.join(srcdir, 'project')
+            cachedir = os.path.join(tempdir, 'cache')
+            with open(os.path.join(basedir, '.base'), 'w') as outfile:
+                outfile.write('FOUND="${PWD}"\n')
+            mtime = time.time() - 10
+            for path in (projdir, srcdir):
+                os.utime(path, (mtime, mtime))
+            self.sendline(f'export BASE_FIND=1 BASE_CACHE_DIR={cachedir}')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.assertBasePrompt(b'base', b'src/project')
+            self.sendline('exit')
+            self.assertUserPrompt()
+            with open(os.path.join(srcdir, '.base'), 'w') as outfile:
+                outfile.write('FOUND="${PWD}"\n')
+            mtime = time.time() + 2
+            os.utime(srcdir, (mtime, mtime))
+            self.sendline('base')
+            self.assertBasePrompt(b'src', b'project')
+            self.sendline('echo "${BASE}:${FOUND}"')
+            self.expect_exact(f'\r\n{srcdir}:{srcdir}\r\n'.encode())
+
+    def test_source_base_find(self):
+        with temp_project(('base/src/project', 'cache')) as tempdir:
+            basedir = os.path.join(tempdir, 'base')
+            projdir = os.path.join(basedir, 'src', 'project')
+            cachedir = os.path.join(tempdir, 'cache')
+            with open(os.path.join(basedir, '.base'), 'w') as outfile:
+                outfile.write('FOUND="${PWD}"\n')
+            self.sendline(f'export BASE_FIND=1 BASE_CACHE_DIR={cachedir}')
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.assertBasePrompt(b'base', b'src/project')
+            self.sendline('echo "${BASE}:${FOUND}:${PWD}"')
+            self.expect_exact(
+                f'\r\n{basedir}:{basedir}:{projdir}\r\n'.encode())
+
+    def test_source_base_activate_find(self):
+        with temp_project(('base/src/project', 'cache')) as tempdir:
+            basedir = os.path.join(tempdir, 'base')
+            projdir = os.path.join(basedir, 'src', 'project')
+            cachedir = os.path.join(tempdir, 'cache')
+            with open(os.path.join(basedir, '.base'), 'w') as outfile:
+                outfile.write('FOUND="${PWD}"\n')
+            self.sendline(f'export BASE_FIND=1 BASE_CACHE_DIR={cachedir}')
+            self.sendline(f'cd {tempdir} ; cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.assertBasePrompt(b'base', b'src/project')
+            self.sendline('echo "${BASE}:${FOUND}:${PWD}:${OLDPWD}"')
+            self.expect_exact(
+                f'\r\n{basedir}:{basedir}:{projdir}:{tempdir}\r\n'.encode())
+            self.assertNotFound('BASE_FIND_RETURN')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+
+    def test_source_base_activate_find_removed(self):
+        with temp_project(('base/src/project', 'cache')) as tempdir:
+            basedir = os.path.join(tempdir, 'base')
+            projdir = os.path.join(basedir, 'src', 'project')
+            cachedir = os.path.join(tempdir, 'cache')
+            with open(os.path.join(basedir, '.base'), 'w') as outfile:
+                outfile.write('rmdir src/project\n')
+            self.sendline(f'export BASE_FIND=1 BASE_CACHE_DIR={cachedir}')
+            self.sendline(f'cd {tempdir} ; cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(
+                f'warning: unable to return to {projdir}'.encode())
+            self.assertBasePrompt(b'base', b'')
+            self.sendline('echo "${PWD}:${OLDPWD}"')
+            self.expect_exact(f'\r\n{basedir}:{projdir}\r\n'.encode())
+            self.assertNotFound('BASE_FIND_RETURN')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+
     # BASE_LABEL environment variable ########################################
 
     def test_base_label_default(self):
@@ -1328,6 +1837,97 @@ class TestBase(unittest.TestCase):
             self.assertStatus(1)
             self.assertBasePrompt(tempdir_name, b'')
 
+    def test_base_bcd_index(self):
+        with temp_project(('src/project/widgets', 'test')) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('export BASE_BCD_INDEX=1')
+            self.sendline('base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('_base_bcd_index_update')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('bcd widgets')
+            self.assertBasePrompt(tempdir_name, b'src/project/widgets')
+            self.sendline('bcd test')
+            self.assertBasePrompt(tempdir_name, b'test')
+            self.sendline('bcd prjwdg')
+            self.assertBasePrompt(tempdir_name, b'src/project/widgets')
+
+    def test_source_base_bcd_index(self):
+        with temp_project(('src/project/widgets', 'test')) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('export BASE_BCD_INDEX=1')
+            self.sendline('source base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('_base_bcd_index_update')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('bcd widgets')
+            self.assertBasePrompt(tempdir_name, b'src/project/widgets')
+            self.sendline('bcd test')
+            self.assertBasePrompt(tempdir_name, b'test')
+            self.sendline('bcd prjwdg')
+            self.assertBasePrompt(tempdir_name, b'src/project/widgets')
+
+    def test_source_base_activate_bcd_index(self):
+        with temp_project(('src/project/widgets', 'test')) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('export BASE_BCD_INDEX=1')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('_base_bcd_index_update')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('bcd widgets')
+            self.assertBasePrompt(tempdir_name, b'src/project/widgets')
+            self.sendline('bcd test')
+            self.assertBasePrompt(tempdir_name, b'test')
+            self.sendline('bcd prjwdg')
+            self.assertBasePrompt(tempdir_name, b'src/project/widgets')
+
+    def test_base_bcd_index_incremental(self):
+        with temp_project(('src/project/widgets', 'test')) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('export BASE_BCD_INDEX=1')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('_base_bcd_index_update')
+            self.assertBasePrompt(tempdir_name, b'')
+            testdir = os.path.join(tempdir, 'test')
+            mtime = os.stat(testdir).st_mtime
+            mkdir_p(os.path.join(testdir, 'fixtures'))
+            os.utime(testdir, (mtime - 60, mtime - 60))
+            self.sendline('_base_bcd_index_update')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('bcd fixtures')
+            self.expect_exact(b'No such file or directory\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            os.utime(testdir)
+            self.sendline('_base_bcd_index_update')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('bcd fixtures')
+            self.assertBasePrompt(tempdir_name, b'test/fixtures')
+
+    def test_base_bcd_index_disabled(self):
+        with temp_project(('src/project/widgets', 'test')) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('_base_bcd_index_update')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('bcd widgets')
+            self.expect_exact(b'No such file or directory\r\n')
+            self.assertStatus(1)
+            self.assertBasePrompt(tempdir_name, b'')
+
     # bcd completion #########################################################
 
     def test_base_bcd_complete_single(self):
@@ -1405,6 +2005,128 @@ class TestBase(unittest.TestCase):
         self.sendline('echo "${#COMPREPLY[@]}"')
         self.expect_exact(b'\r\n0\r\n')
 
+    def test_base_bcd_complete_max(self):
+        with temp_project(('one', 'two', 'three')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('base')
+            self.sendline('BASE_BCD_COMPLETE_MAX=2')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\n2\r\n')
+
+    def test_source_base_bcd_complete_max(self):
+        with temp_project(('one', 'two', 'three')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base')
+            self.sendline('BASE_BCD_COMPLETE_MAX=2')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\n2\r\n')
+
+    def test_source_base_activate_bcd_complete_max(self):
+        with temp_project(('one', 'two', 'three')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.sendline('BASE_BCD_COMPLETE_MAX=2')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\n2\r\n')
+
+    def test_source_base_activate_bcd_complete_max_invalid(self):
+        with temp_project(('one', 'two', 'three')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.sendline('BASE_BCD_COMPLETE_MAX=many')
+            self.sendline('_base_bcd_complete "" "" ; echo "n=${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\nn=3\r\n')
+
+    def test_source_base_activate_bcd_complete_max_single(self):
+        with temp_project(('one/a', 'one/b', 'one/c')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.sendline('BASE_BCD_COMPLETE_MAX=08')
+            self.sendline('_base_bcd_complete "" "o" ; echo "n=${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\nn=4\r\n')
+            self.sendline('BASE_BCD_COMPLETE_MAX=2')
+            self.sendline('_base_bcd_complete "" "o" ; echo "n=${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\nn=2\r\n')
+
+    def test_base_bcd_complete_cache_update(self):
+        with temp_project(('one', 'two')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('base')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\n2\r\n')
+            self.sendline('mkdir three')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\n3\r\n')
+
+    def test_source_base_bcd_complete_cache_update(self):
+        with temp_project(('one', 'two')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\n2\r\n')
+            self.sendline('mkdir three')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\n3\r\n')
+
+    def test_source_base_activate_bcd_complete_cache_update(self):
+        with temp_project(('one', 'two')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\n2\r\n')
+            self.sendline('mkdir three')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${#COMPREPLY[@]}"')
+            self.expect_exact(b'\r\n3\r\n')
+
+    def test_base_bcd_complete_frecency(self):
+        with temp_project(('one', 'two', 'three')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('base')
+            self.sendline('bcd two')
+            self.sendline('bcd')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${COMPREPLY[0]}"')
+            self.expect_exact(b'\r\ntwo\r\n')
+
+    def test_source_base_bcd_complete_frecency(self):
+        with temp_project(('one', 'two', 'three')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base')
+            self.sendline('bcd two')
+            self.sendline('bcd')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${COMPREPLY[0]}"')
+            self.expect_exact(b'\r\ntwo\r\n')
+
+    def test_source_base_activate_bcd_complete_frecency(self):
+        with temp_project(('one', 'two', 'three')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.sendline('bcd two')
+            self.sendline('bcd')
+            self.sendline('_base_bcd_complete "" ""')
+            self.sendline('echo "${COMPREPLY[0]}"')
+            self.expect_exact(b'\r\ntwo\r\n')
+
+    def test_source_base_activate_bcd_complete_cache_clear(self):
+        with temp_project(('one', 'two')) as tempdir:
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.sendline('_base_bcd_complete "" ""')
+            self.assertFound('BASE_BCD_CACHE_PATHS')
+            self.sendline('base_deactivate')
+            self.assertNotFound('BASE_BCD_CACHE_PATHS')
+            self.assertNotFound('BASE_BCD_CACHE_0')
+
     # _base_deactivation_callback_register ###################################
 
     def test_base_deactivation_callback_register(self):
@@ -1687,41 +2409,1248 @@ class TestBase(unittest.TestCase):
             self.sendline('echo "${TEST_SET_VAR}"')
             self.expect_exact(b'\r\nfoo\r\n')
 
-    # python-virtualenv ######################################################
+    # background configuration ###############################################
 
-    def test_base_python_virtualenv_link(self):
-        with temp_project_python(link='3.8.9') as tempdir:
+    def test_base_background_script(self):
+        with tempfile.TemporaryDirectory() as tempdir:
             tempdir_name = os.path.basename(tempdir).encode()
-            os.symlink(
-                '/usr/share/base/python-virtualenv.sh',
-                os.path.join(tempdir, '.base'),
-            )
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, 'bg'), 'w') as outfile:
+                outfile.write('# base: background\n')
+                outfile.write('sleep 0.5\n')
+                outfile.write('echo "background done"\n')
+                outfile.write('_base_var_set TEST_BG_VAR foo\n')
             self.sendline(f'cd {tempdir}')
-            self.assertUserPrompt()
             self.sendline('base')
             self.assertBasePrompt(tempdir_name, b'')
-            self.sendline('echo "${PATH}"')
-            self.expect_exact(
-                b'\r\n' + tempdir.encode() + b'/virtualenv/bin:')
+            self.sendline(
+                'while [ ! -e "${BASE_SESSION_DIR}/bg-0.done" ] ;'
+                ' do sleep 0.1 ; done')
+            self.expect_exact(b'\r\nbackground done\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_BG_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
 
-    def test_source_base_python_virtualenv_link(self):
-        with temp_project_python(link='3.8.9') as tempdir:
+    def test_base_background_command(self):
+        with tempfile.TemporaryDirectory() as tempdir:
             tempdir_name = os.path.basename(tempdir).encode()
-            os.symlink(
-                '/usr/share/base/python-virtualenv.sh',
-                os.path.join(tempdir, '.base'),
-            )
+            with open(os.path.join(tempdir, '.base'), 'w') as outfile:
+                outfile.write('_bg () { _base_var_set TEST_BG_VAR foo ; }\n')
+                outfile.write('_base_background _bg\n')
+                outfile.write('_base_var_set TEST_SET_VAR bar\n')
             self.sendline(f'cd {tempdir}')
-            self.assertUserPrompt()
+            self.sendline('base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_SET_VAR}"')
+            self.expect_exact(b'\r\nbar\r\n')
+            self.sendline(
+                'while [ ! -e "${BASE_SESSION_DIR}/bg-0.done" ] ;'
+                ' do sleep 0.1 ; done')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_BG_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+
+    def test_source_base_background_script(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, 'bg'), 'w') as outfile:
+                outfile.write('# base: background\n')
+                outfile.write('sleep 0.5\n')
+                outfile.write('echo "background done"\n')
+                outfile.write('_base_var_set TEST_BG_VAR foo\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                'while [ ! -e "${BASE_SESSION_DIR}/bg-0.done" ] ;'
+                ' do sleep 0.1 ; done')
+            self.expect_exact(b'\r\nbackground done\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_BG_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+
+    def test_source_base_background_command(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            with open(os.path.join(tempdir, '.base'), 'w') as outfile:
+                outfile.write('_bg () { _base_var_set TEST_BG_VAR foo ; }\n')
+                outfile.write('_base_background _bg\n')
+                outfile.write('_base_var_set TEST_SET_VAR bar\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_SET_VAR}"')
+            self.expect_exact(b'\r\nbar\r\n')
+            self.sendline(
+                'while [ ! -e "${BASE_SESSION_DIR}/bg-0.done" ] ;'
+                ' do sleep 0.1 ; done')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_BG_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+
+    def test_source_base_activate_background_script(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, 'bg'), 'w') as outfile:
+                outfile.write('# base: background\n')
+                outfile.write('sleep 0.5\n')
+                outfile.write('echo "background done"\n')
+                outfile.write('_base_var_set TEST_BG_VAR foo\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                'while [ ! -e "${BASE_SESSION_DIR}/bg-0.done" ] ;'
+                ' do sleep 0.1 ; done')
+            self.expect_exact(b'\r\nbackground done\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_BG_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+
+    def test_source_base_activate_background_command(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            with open(os.path.join(tempdir, '.base'), 'w') as outfile:
+                outfile.write('_bg () { _base_var_set TEST_BG_VAR foo ; }\n')
+                outfile.write('_base_background _bg\n')
+                outfile.write('_base_var_set TEST_SET_VAR bar\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_SET_VAR}"')
+            self.expect_exact(b'\r\nbar\r\n')
+            self.sendline(
+                'while [ ! -e "${BASE_SESSION_DIR}/bg-0.done" ] ;'
+                ' do sleep 0.1 ; done')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_BG_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+
+    def test_source_base_activate_background_changes(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            for name in ('a', 'b'):
+                with open(os.path.join(basedir, name), 'w') as outfile:
+                    outfile.write('# base: background\n')
+                    outfile.write(
+                        f'_base_var_set PATH "/tmp/bg-{name}:${{PATH}}"\n')
+            with open(os.path.join(basedir, 'a'), 'a') as outfile:
+                outfile.write('_bg_cb () { echo "callback ran" ; }\n')
+                outfile.write('_base_deactivation_callback_register _bg_cb\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('PATH_INITIAL="${PATH}"')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                'while [[ ! -e "${BASE_SESSION_DIR}/bg-0.done"'
+                ' || ! -e "${BASE_SESSION_DIR}/bg-1.done" ]] ;'
+                ' do sleep 0.1 ; done')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                '[ "${PATH}" == "/tmp/bg-b:/tmp/bg-a:${PATH_INITIAL}" ]'
+                ' && echo "path ok"')
+            self.expect_exact(b'\r\npath ok\r\n')
+            self.sendline('base_deactivate')
+            self.expect_exact(b'\r\ncallback ran\r\n')
+            self.assertUserPrompt()
+            self.sendline(
+                '[ "${PATH}" == "${PATH_INITIAL}" ] && echo restored')
+            self.expect_exact(b'\r\nrestored\r\n')
+
+    def test_source_base_activate_background_scalar(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, 'a'), 'w') as outfile:
+                outfile.write('# base: background\n')
+                outfile.write('sleep 0.5\n')
+                outfile.write('_base_var_set NAME "${NAME}-x"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('NAME=foo')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('NAME=bar')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                'while [ ! -e "${BASE_SESSION_DIR}/bg-0.done" ] ;'
+                ' do sleep 0.1 ; done')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "[${NAME}]"')
+            self.expect_exact(b'\r\n[foo-x]\r\n')
+
+    def test_source_base_activate_background_deactivate(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            with open(os.path.join(tempdir, '.base'), 'w') as outfile:
+                outfile.write('# base: background\n')
+                outfile.write('_base_var_set TEST_BG_VAR foo\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                'while [ ! -e "${BASE_SESSION_DIR}/bg-0.done" ] ;'
+                ' do sleep 0.1 ; done')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_BG_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.assertNotFound('TEST_BG_VAR')
+            self.assertNotFound('_base_var_set')
+
+    # concurrent configuration ###############################################
+
+    def test_base_config_concurrent(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-a'), 'w') as outfile:
+                outfile.write('# base: provides a\n')
+                outfile.write('sleep 0.2\n')
+                outfile.write('echo "a done"\n')
+                outfile.write('_base_var_set TEST_A_VAR foo\n')
+            with open(os.path.join(basedir, '20-b'), 'w') as outfile:
+                outfile.write('# base: requires a\n')
+                outfile.write('_base_var_set TEST_B_VAR "${TEST_A_VAR}bar"\n')
+                outfile.write('_base_label_set concurrent\n')
+            with open(os.path.join(basedir, '30-c'), 'w') as outfile:
+                outfile.write('# base: provides c\n')
+                outfile.write('echo "c done"\n')
+            with open(os.path.join(basedir, '40-d'), 'w') as outfile:
+                outfile.write('echo "d sees ${TEST_B_VAR}"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('base')
+            self.expect_exact(b'\r\na done\r\nc done\r\nd sees foobar\r\n')
+            self.assertBasePrompt(b'concurrent', b'')
+            self.sendline('echo "${TEST_A_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+
+    def test_source_base_config_concurrent(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-a'), 'w') as outfile:
+                outfile.write('# base: provides a\n')
+                outfile.write('sleep 0.2\n')
+                outfile.write('echo "a done"\n')
+                outfile.write('_base_var_set TEST_A_VAR foo\n')
+            with open(os.path.join(basedir, '20-b'), 'w') as outfile:
+                outfile.write('# base: requires a\n')
+                outfile.write('_base_var_set TEST_B_VAR "${TEST_A_VAR}bar"\n')
+                outfile.write('_base_label_set concurrent\n')
+            with open(os.path.join(basedir, '30-c'), 'w') as outfile:
+                outfile.write('# base: provides c\n')
+                outfile.write('echo "c done"\n')
+            with open(os.path.join(basedir, '40-d'), 'w') as outfile:
+                outfile.write('echo "d sees ${TEST_B_VAR}"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base')
+            self.expect_exact(b'\r\na done\r\nc done\r\nd sees foobar\r\n')
+            self.assertBasePrompt(b'concurrent', b'')
+            self.sendline('echo "${TEST_A_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+
+    def test_source_base_activate_config_concurrent(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-a'), 'w') as outfile:
+                outfile.write('# base: provides a\n')
+                outfile.write('sleep 0.2\n')
+                outfile.write('echo "a done"\n')
+                outfile.write('_base_var_set TEST_A_VAR foo\n')
+            with open(os.path.join(basedir, '20-b'), 'w') as outfile:
+                outfile.write('# base: requires a\n')
+                outfile.write('_base_var_set TEST_B_VAR "${TEST_A_VAR}bar"\n')
+                outfile.write('_base_label_set concurrent\n')
+            with open(os.path.join(basedir, '30-c'), 'w') as outfile:
+                outfile.write('# base: provides c\n')
+                outfile.write('echo "c done"\n')
+            with open(os.path.join(basedir, '40-d'), 'w') as outfile:
+                outfile.write('echo "d sees ${TEST_B_VAR}"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\na done\r\nc done\r\nd sees foobar\r\n')
+            self.assertBasePrompt(b'concurrent', b'')
+            self.sendline('echo "${TEST_A_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+
+    def test_source_base_activate_config_concurrent_changes(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            for name in ('a', 'b'):
+                with open(os.path.join(basedir, name), 'w') as outfile:
+                    outfile.write(f'# base: provides {name}\n')
+                    outfile.write(
+                        f'_base_var_set PATH "/tmp/cc-{name}:${{PATH}}"\n')
+            with open(os.path.join(basedir, 'a'), 'a') as outfile:
+                outfile.write('_cc_cb () { echo "callback ran" ; }\n')
+                outfile.write('_base_deactivation_callback_register _cc_cb\n')
+            with open(os.path.join(basedir, 'b'), 'a') as outfile:
+                outfile.write('_cc_init () { cctest () { echo lazy ; } ; }\n')
+                outfile.write('_base_lazy cctest _cc_init\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('PATH_INITIAL="${PATH}"')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                '[ "${PATH}" == "/tmp/cc-b:/tmp/cc-a:${PATH_INITIAL}" ]'
+                ' && echo "path ok"')
+            self.expect_exact(b'\r\npath ok\r\n')
+            self.sendline('cctest')
+            self.expect_exact(b'\r\nlazy\r\n')
+            self.sendline('base_deactivate')
+            self.expect_exact(b'\r\ncallback ran\r\n')
+            self.assertUserPrompt()
+            self.sendline(
+                '[ "${PATH}" == "${PATH_INITIAL}" ] && echo restored')
+            self.expect_exact(b'\r\nrestored\r\n')
+
+    def test_base_config_timeout(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-hang'), 'w') as outfile:
+                outfile.write('# base: timeout 1\n')
+                outfile.write('_base_var_set TEST_HANG_VAR foo\n')
+                outfile.write('_base_label_set hang\n')
+                outfile.write('sleep 10\n')
+                outfile.write('_base_var_set TEST_AFTER_VAR bar\n')
+            with open(os.path.join(basedir, '20-next'), 'w') as outfile:
+                outfile.write('echo "next: ${TEST_HANG_VAR-unset}"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('base')
+            self.expect_exact(
+                b'warning: configuration script timed out: .base/10-hang',
+                timeout=5)
+            self.expect_exact(b'\r\nnext: unset\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_HANG_VAR-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+            self.sendline('echo "${TEST_AFTER_VAR-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+            self.sendline('echo "${BASE_VAR_VARS-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+
+    def test_source_base_config_timeout(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-hang'), 'w') as outfile:
+                outfile.write('# base: timeout 1\n')
+                outfile.write('_base_var_set TEST_HANG_VAR foo\n')
+                outfile.write('_base_label_set hang\n')
+                outfile.write('sleep 10\n')
+                outfile.write('_base_var_set TEST_AFTER_VAR bar\n')
+            with open(os.path.join(basedir, '20-next'), 'w') as outfile:
+                outfile.write('echo "next: ${TEST_HANG_VAR-unset}"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base')
+            self.expect_exact(
+                b'warning: configuration script timed out: .base/10-hang',
+                timeout=5)
+            self.expect_exact(b'\r\nnext: unset\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_HANG_VAR-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+            self.sendline('echo "${TEST_AFTER_VAR-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+
+    def test_source_base_activate_config_timeout(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-hang'), 'w') as outfile:
+                outfile.write('# base: timeout 1\n')
+                outfile.write('_base_var_set TEST_HANG_VAR foo\n')
+                outfile.write('_base_label_set hang\n')
+                outfile.write('sleep 10\n')
+                outfile.write('_base_var_set TEST_AFTER_VAR bar\n')
+            with open(os.path.join(basedir, '20-next'), 'w') as outfile:
+                outfile.write('echo "next: ${TEST_HANG_VAR-unset}"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.expect_exact(
+                b'warning: configuration script timed out: .base/10-hang',
+                timeout=5)
+            self.expect_exact(b'\r\nnext: unset\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_HANG_VAR-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+            self.sendline('echo "${TEST_AFTER_VAR-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+
+    def test_source_base_activate_config_timeout_deactivate(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-hang'), 'w') as outfile:
+                outfile.write('# base: timeout 1\n')
+                outfile.write('_base_var_set TEST_HANG_VAR foo\n')
+                outfile.write('sleep 10\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('export TEST_HANG_VAR=orig')
+            self.sendline('source base_activate')
+            self.expect_exact(
+                b'warning: configuration script timed out: .base/10-hang',
+                timeout=5)
+            self.assertNotIn(b'Terminated', self.shell.before)
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('echo "${TEST_HANG_VAR-unset}"')
+            self.expect_exact(b'\r\norig\r\n')
+            self.sendline('bash -c \'echo "${TEST_HANG_VAR-unset}"\'')
+            self.expect_exact(b'\r\norig\r\n')
+
+    def test_source_base_activate_config_timeout_restore(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-set'), 'w') as outfile:
+                outfile.write('_base_var_set TEST_FOO ten\n')
+            with open(os.path.join(basedir, '20-hang'), 'w') as outfile:
+                outfile.write('# base: timeout 1\n')
+                outfile.write('_base_var_set TEST_FOO twenty\n')
+                outfile.write('_base_var_set TEST_BAR twenty\n')
+                outfile.write('sleep 10\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('TEST_FOO=orig')
+            self.sendline('trap ":" DEBUG')
+            self.sendline('source base_activate')
+            self.expect_exact(
+                b'warning: configuration script timed out: .base/20-hang',
+                timeout=5)
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_FOO}/${TEST_BAR-unset}"')
+            self.expect_exact(b'\r\nten/unset\r\n')
+            self.sendline('trap -p DEBUG ; shopt -q extdebug || echo off')
+            self.expect_exact(b'\r\ntrap -- \':\' DEBUG\r\noff\r\n')
+            self.sendline('trap - DEBUG ; base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('echo "${TEST_FOO}/${TEST_BAR-unset}"')
+            self.expect_exact(b'\r\norig/unset\r\n')
+
+    def test_source_base_activate_config_timeout_background(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-hang'), 'w') as outfile:
+                outfile.write('# base: background\n')
+                outfile.write('# base: timeout 1\n')
+                outfile.write('_base_var_set TEST_HANG_VAR foo\n')
+                outfile.write('export TEST_HANG_VAR\n')
+                outfile.write('sleep 10\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                'while [ ! -e "${BASE_SESSION_DIR}/bg-0.done" ] ;'
+                ' do sleep 0.1 ; done')
+            self.expect_exact(
+                b'warning: configuration script timed out: .base/10-hang',
+                timeout=5)
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_HANG_VAR-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+
+    def test_source_base_activate_config_timeout_total(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-hang'), 'w') as outfile:
+                outfile.write('sleep 10\n')
+            with open(os.path.join(basedir, '20-next'), 'w') as outfile:
+                outfile.write('echo "next done"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('BASE_CONFIG_TIMEOUT_TOTAL=1 source base_activate')
+            self.expect_exact(
+                b'warning: configuration script timed out: .base/10-hang',
+                timeout=5)
+            self.expect_exact(
+                b'warning: configuration time limit exceeded, skipping '
+                b'.base/20-next')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('base_deactivate')
+            self.assertNotFound('_base_config_timer_stop')
+
+    def test_base_config_predicates(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(tempdir, 'marker'), 'w') as outfile:
+                outfile.write('')
+            with open(os.path.join(basedir, '10-run'), 'w') as outfile:
+                outfile.write('# base: if-exists missing marker\n')
+                outfile.write('# base: if-command bash\n')
+                outfile.write('echo "run done"\n')
+            with open(os.path.join(basedir, '20-skip'), 'w') as outfile:
+                outfile.write('# base: if-command bash\n')
+                outfile.write('# base: if-exists missing\n')
+                outfile.write('echo "skip done"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('BASE_CONFIG_PROFILE=1 base')
+            self.expect_exact(b'\r\nrun done\r\n')
+            self.expect(rb'profile: [0-9]+\.[0-9]{3} ms \.base/10-run\r\n')
+            self.expect_exact(
+                b'profile: skipped .base/20-skip: if-exists missing\r\n')
+            self.expect(rb'profile: [0-9]+\.[0-9]{3} ms total\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+
+    def test_source_base_config_predicates(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(tempdir, 'marker'), 'w') as outfile:
+                outfile.write('')
+            with open(os.path.join(basedir, '10-run'), 'w') as outfile:
+                outfile.write('# base: if-exists missing marker\n')
+                outfile.write('# base: if-command bash\n')
+                outfile.write('echo "run done"\n')
+            with open(os.path.join(basedir, '20-skip'), 'w') as outfile:
+                outfile.write('# base: if-command bash\n')
+                outfile.write('# base: if-exists missing\n')
+                outfile.write('echo "skip done"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('BASE_CONFIG_PROFILE=1 source base')
+            self.expect_exact(b'\r\nrun done\r\n')
+            self.expect(rb'profile: [0-9]+\.[0-9]{3} ms \.base/10-run\r\n')
+            self.expect_exact(
+                b'profile: skipped .base/20-skip: if-exists missing\r\n')
+            self.expect(rb'profile: [0-9]+\.[0-9]{3} ms total\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+
+    def test_source_base_activate_config_predicates(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(tempdir, 'marker'), 'w') as outfile:
+                outfile.write('')
+            with open(os.path.join(basedir, '10-run'), 'w') as outfile:
+                outfile.write('# base: if-exists missing marker\n')
+                outfile.write('# base: if-command bash\n')
+                outfile.write('echo "run done"\n')
+            with open(os.path.join(basedir, '20-skip'), 'w') as outfile:
+                outfile.write('# base: if-command bash\n')
+                outfile.write('# base: if-exists missing\n')
+                outfile.write('echo "skip done"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('BASE_CONFIG_PROFILE=1 source base_activate')
+            self.expect_exact(b'\r\nrun done\r\n')
+            self.expect(rb'profile: [0-9]+\.[0-9]{3} ms \.base/10-run\r\n')
+            self.expect_exact(
+                b'profile: skipped .base/20-skip: if-exists missing\r\n')
+            self.expect(rb'profile: [0-9]+\.[0-9]{3} ms total\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+
+    def test_source_base_activate_config_predicates_glob(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(tempdir, 'marker'), 'w') as outfile:
+                outfile.write('')
+            with open(os.path.join(basedir, '10-skip'), 'w') as outfile:
+                outfile.write('# base: if-exists mark* none*\n')
+                outfile.write('echo "skip done"\n')
+            with open(os.path.join(basedir, '20-run'), 'w') as outfile:
+                outfile.write('echo "run done"\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('shopt -s failglob')
+            self.sendline('BASE_CONFIG_PROFILE=1 source base_activate')
+            self.expect_exact(
+                b'profile: skipped .base/10-skip: if-exists mark* none*\r\n')
+            self.expect_exact(b'run done\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('shopt -u failglob')
+            self.assertBasePrompt(tempdir_name, b'')
+
+    def test_base_config_env(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-vars.env'), 'w') as outfile:
+                outfile.write('# comment\n')
+                outfile.write('TEST_ENV_A=foo\n')
+                outfile.write('export TEST_ENV_B="${TEST_ENV_A} \\$bar"\n')
+                outfile.write("TEST_ENV_C='$TEST_ENV_A'\n")
+                outfile.write('PATH+=bin\n')
+                outfile.write('unset TEST_ENV_D\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('export TEST_ENV_D=baz')
+            self.sendline('base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_ENV_B}|${TEST_ENV_C}"')
+            self.expect_exact(b'\r\nfoo $bar|$TEST_ENV_A\r\n')
+            self.sendline('echo "${TEST_ENV_D-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+            self.sendline('echo "${PATH%%:*}"')
+            self.expect_exact(f'\r\n{tempdir}/bin\r\n'.encode())
+            self.sendline('bash -c \'echo "${TEST_ENV_A}"\'')
+            self.expect_exact(b'\r\nfoo\r\n')
+
+    def test_source_base_config_env(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-vars.env'), 'w') as outfile:
+                outfile.write('# comment\n')
+                outfile.write('TEST_ENV_A=foo\n')
+                outfile.write('export TEST_ENV_B="${TEST_ENV_A} \\$bar"\n')
+                outfile.write("TEST_ENV_C='$TEST_ENV_A'\n")
+                outfile.write('PATH+=bin\n')
+                outfile.write('unset TEST_ENV_D\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('export TEST_ENV_D=baz')
+            self.sendline('source base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_ENV_B}|${TEST_ENV_C}"')
+            self.expect_exact(b'\r\nfoo $bar|$TEST_ENV_A\r\n')
+            self.sendline('echo "${TEST_ENV_D-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+            self.sendline('echo "${PATH%%:*}"')
+            self.expect_exact(f'\r\n{tempdir}/bin\r\n'.encode())
+            self.sendline('bash -c \'echo "${TEST_ENV_A}"\'')
+            self.expect_exact(b'\r\nfoo\r\n')
+
+    def test_source_base_activate_config_env(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-vars.env'), 'w') as outfile:
+                outfile.write('# comment\n')
+                outfile.write('TEST_ENV_A=foo\n')
+                outfile.write('export TEST_ENV_B="${TEST_ENV_A} \\$bar"\n')
+                outfile.write("TEST_ENV_C='$TEST_ENV_A'\n")
+                outfile.write('PATH+=bin\n')
+                outfile.write('unset TEST_ENV_D\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('export TEST_ENV_D=baz')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_ENV_B}|${TEST_ENV_C}"')
+            self.expect_exact(b'\r\nfoo $bar|$TEST_ENV_A\r\n')
+            self.sendline('echo "${TEST_ENV_D-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+            self.sendline('echo "${PATH%%:*}"')
+            self.expect_exact(f'\r\n{tempdir}/bin\r\n'.encode())
+            self.sendline('bash -c \'echo "${TEST_ENV_A}"\'')
+            self.expect_exact(b'\r\nfoo\r\n')
+            self.sendline('base_deactivate')
+            self.sendline('echo "${TEST_ENV_A-unset}|${TEST_ENV_D}"')
+            self.expect_exact(b'\r\nunset|baz\r\n')
+
+    # _base_lazy #############################################################
+
+    def test_base_lazy(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            with open(os.path.join(tempdir, '.base'), 'w') as outfile:
+                outfile.write('_lazy_init () {\n')
+                outfile.write('  _base_var_set TEST_LAZY_VAR foo\n')
+                outfile.write('  lazytest () { echo "lazy $1" ; }\n')
+                outfile.write('}\n')
+                outfile.write('_base_lazy lazytest _lazy_init\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_LAZY_VAR:-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+            self.sendline('lazytest one')
+            self.expect_exact(b'\r\nlazy one\r\n')
+            self.sendline('echo "${TEST_LAZY_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+            self.sendline('lazytest two')
+            self.expect_exact(b'\r\nlazy two\r\n')
+            self.assertNotFound('_base_var_set')
+
+    def test_source_base_lazy(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            with open(os.path.join(tempdir, '.base'), 'w') as outfile:
+                outfile.write('_lazy_init () {\n')
+                outfile.write('  _base_var_set TEST_LAZY_VAR foo\n')
+                outfile.write('  lazytest () { echo "lazy $1" ; }\n')
+                outfile.write('}\n')
+                outfile.write('_base_lazy lazytest _lazy_init\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_LAZY_VAR:-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+            self.sendline('lazytest one')
+            self.expect_exact(b'\r\nlazy one\r\n')
+            self.sendline('echo "${TEST_LAZY_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+            self.sendline('lazytest two')
+            self.expect_exact(b'\r\nlazy two\r\n')
+            self.assertNotFound('_base_var_set')
+
+    def test_source_base_activate_lazy(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            with open(os.path.join(tempdir, '.base'), 'w') as outfile:
+                outfile.write('_lazy_init () {\n')
+                outfile.write('  _base_var_set TEST_LAZY_VAR foo\n')
+                outfile.write('  lazytest () { echo "lazy $1" ; }\n')
+                outfile.write('}\n')
+                outfile.write('_base_lazy lazytest _lazy_init\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${TEST_LAZY_VAR:-unset}"')
+            self.expect_exact(b'\r\nunset\r\n')
+            self.sendline('lazytest one')
+            self.expect_exact(b'\r\nlazy one\r\n')
+            self.sendline('echo "${TEST_LAZY_VAR}"')
+            self.expect_exact(b'\r\nfoo\r\n')
+            self.sendline('lazytest two')
+            self.expect_exact(b'\r\nlazy two\r\n')
+            self.assertNotFound('_base_var_set')
+
+    def test_source_base_activate_lazy_deactivate(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            with open(os.path.join(tempdir, '.base'), 'w') as outfile:
+                outfile.write('_base_lazy lazytest true\n')
+            self.sendline(f'cd {tempdir}')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.assertFunction('lazytest')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.assertNotFound('lazytest')
+            self.assertNotFound('_base_lazy_run')
+            self.assertNotFound('_base_var_set')
+
+    # python-virtualenv ######################################################
+
+    def test_base_python_virtualenv_link(self):
+        with temp_project_python(link='3.8.9') as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv/bin:')
+
+    def test_source_base_python_virtualenv_link(self):
+        with temp_project_python(link='3.8.9') as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv/bin:')
+
+    def test_source_base_activate_python_virtualenv_link(self):
+        with temp_project_python(link='3.8.9') as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv/bin:')
+
+    def test_base_python_virtualenv_single(self):
+        with temp_project_python(versions=('3.8.9',)) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+
+    def test_source_base_python_virtualenv_single(self):
+        with temp_project_python(versions=('3.8.9',)) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+
+    def test_source_base_activate_python_virtualenv_single(self):
+        with temp_project_python(versions=('3.8.9',)) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+
+    def test_base_python_virtualenv_multiple(self):
+        with temp_project_python() as tempdir, \
+                tempfile.TemporaryDirectory() as cachedir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline(f'BASE_CACHE_DIR={cachedir} base')
+            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
+            self.sendline('2')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+            self.assertFalse(
+                os.path.exists(os.path.join(cachedir, 'install-index')))
+
+    def test_source_base_python_virtualenv_multiple(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
+            self.sendline('2')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+
+    def test_source_base_activate_python_virtualenv_multiple(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
+            self.sendline('2')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+
+    def test_base_python_virtualenv_version_order(self):
+        with temp_project_python(versions=('3.9.4', '3.10.1')) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.expect_exact(
+                b'\r\n1) virtualenv-3.10.1\r\n2) virtualenv-3.9.4\r\n')
+            self.expect_exact(b'Select Python virtual environment [1]:')
+            self.sendline('1')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.10.1/bin:')
+
+    def test_source_base_python_virtualenv_version_order(self):
+        with temp_project_python(versions=('3.9.4', '3.10.1')) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
             self.sendline('source base')
+            self.expect_exact(
+                b'\r\n1) virtualenv-3.10.1\r\n2) virtualenv-3.9.4\r\n')
+            self.expect_exact(b'Select Python virtual environment [1]:')
+            self.sendline('1')
             self.assertBasePrompt(tempdir_name, b'')
             self.sendline('echo "${PATH}"')
             self.expect_exact(
-                b'\r\n' + tempdir.encode() + b'/virtualenv/bin:')
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.10.1/bin:')
 
-    def test_source_base_activate_python_virtualenv_link(self):
-        with temp_project_python(link='3.8.9') as tempdir:
+    def test_source_base_activate_python_virtualenv_version_order(self):
+        with temp_project_python(versions=('3.9.4', '3.10.1')) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(
+                b'\r\n1) virtualenv-3.10.1\r\n2) virtualenv-3.9.4\r\n')
+            self.expect_exact(b'Select Python virtual environment [1]:')
+            self.sendline('1')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.10.1/bin:')
+
+    def test_base_python_virtualenv_install_index(self):
+        with temp_project_python(versions=('3.8.9', '3.9.4')) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.expect_exact(b'Select Python virtual environment [1]:')
+            self.sendline('1')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('mkdir virtualenv-3.10.1')
+            self.sendline('base')
+            self.expect_exact(b'\r\n1) virtualenv-3.10.1\r\n')
+            self.expect_exact(b'Select Python virtual environment [1]:')
+            self.sendline('1')
+            self.assertBasePrompt(tempdir_name, b'')
+
+    def test_source_base_python_virtualenv_install_index(self):
+        with temp_project_python(versions=('3.8.9', '3.9.4')) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.expect_exact(b'Select Python virtual environment [1]:')
+            self.sendline('1')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('mkdir virtualenv-3.10.1')
+            self.sendline('source base')
+            self.expect_exact(b'\r\n1) virtualenv-3.10.1\r\n')
+            self.expect_exact(b'Select Python virtual environment [1]:')
+            self.sendline('1')
+            self.assertBasePrompt(tempdir_name, b'')
+
+    def test_source_base_activate_python_virtualenv_install_index(self):
+        with temp_project_python(versions=('3.8.9', '3.9.4')) as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'Select Python virtual environment [1]:')
+            self.sendline('1')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('mkdir virtualenv-3.10.1')
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\n1) virtualenv-3.10.1\r\n')
+            self.expect_exact(b'Select Python virtual environment [1]:')
+            self.sendline('1')
+            self.assertBasePrompt(tempdir_name, b'')
+
+    def test_base_python_virtualenv_default(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
+            self.sendline('')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.9.4/bin:')
+
+    def test_source_base_python_virtualenv_default(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
+            self.sendline('')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.9.4/bin:')
+
+    def test_source_base_activate_python_virtualenv_default(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
+            self.sendline('')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.9.4/bin:')
+
+    def test_base_python_virtualenv_remembered(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
+            self.sendline('2')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+
+    def test_source_base_python_virtualenv_remembered(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
+            self.sendline('2')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+
+    def test_source_base_activate_python_virtualenv_remembered(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
+            self.sendline('2')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+
+    def test_base_python_virtualenv_override(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline(
+                'export BASE_SELECT_PYTHON_VIRTUAL_ENVIRONMENT='
+                'virtualenv-3.7.10')
+            self.sendline('base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.7.10/bin:')
+
+    def test_source_base_python_virtualenv_override(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline(
+                'export BASE_SELECT_PYTHON_VIRTUAL_ENVIRONMENT='
+                'virtualenv-3.7.10')
+            self.sendline('source base')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.7.10/bin:')
+
+    def test_source_base_activate_python_virtualenv_override(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline(
+                'export BASE_SELECT_PYTHON_VIRTUAL_ENVIRONMENT='
+                'virtualenv-3.7.10')
+            self.sendline('source base_activate')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.7.10/bin:')
+
+    def test_source_base_activate_python_virtualenv_non_interactive(self):
+        with temp_project_python() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate < /dev/null')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/virtualenv-3.9.4/bin:')
+
+    def test_base_python_virtualenv_pyvenv_cfg(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            venvdir = os.path.join(tempdir, '.venv')
+            mkdir_p(venvdir)
+            with open(os.path.join(venvdir, 'pyvenv.cfg'), 'w') as outfile:
+                outfile.write('home = /usr/bin\n')
+                outfile.write('include-system-site-packages = false\n')
+                outfile.write('version = 3.11.2\n')
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.expect_exact(b'\r\nPython 3.11.2\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/.venv/bin:')
+
+    def test_source_base_python_virtualenv_pyvenv_cfg(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            venvdir = os.path.join(tempdir, '.venv')
+            mkdir_p(venvdir)
+            with open(os.path.join(venvdir, 'pyvenv.cfg'), 'w') as outfile:
+                outfile.write('home = /usr/bin\n')
+                outfile.write('include-system-site-packages = false\n')
+                outfile.write('version = 3.11.2\n')
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(tempdir, '.base'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.expect_exact(b'\r\nPython 3.11.2\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n' + tempdir.encode() + b'/.venv/bin:')
+
+    def test_source_base_activate_python_virtualenv_pyvenv_cfg(self):
+        with tempfile.TemporaryDirectory() as tempdir:
             tempdir_name = os.path.basename(tempdir).encode()
+            venvdir = os.path.join(tempdir, '.venv')
+            mkdir_p(venvdir)
+            with open(os.path.join(venvdir, 'pyvenv.cfg'), 'w') as outfile:
+                outfile.write('home = /usr/bin\n')
+                outfile.write('include-system-site-packages = false\n')
+                outfile.write('version = 3.11.2\n')
             os.symlink(
                 '/usr/share/base/python-virtualenv.sh',
                 os.path.join(tempdir, '.base'),
@@ -1729,106 +3658,281 @@ class TestBase(unittest.TestCase):
             self.sendline(f'cd {tempdir}')
             self.assertUserPrompt()
             self.sendline('source base_activate')
+            self.expect_exact(b'\r\nPython 3.11.2\r\n')
             self.assertBasePrompt(tempdir_name, b'')
             self.sendline('echo "${PATH}"')
             self.expect_exact(
-                b'\r\n' + tempdir.encode() + b'/virtualenv/bin:')
+                b'\r\n' + tempdir.encode() + b'/.venv/bin:')
 
-    def test_base_python_virtualenv_single(self):
-        with temp_project_python(versions=('3.8.9',)) as tempdir:
+    def test_base_python_virtualenv_caches(self):
+        with tempfile.TemporaryDirectory() as tempdir:
             tempdir_name = os.path.basename(tempdir).encode()
+            venvdir = os.path.join(tempdir, '.venv')
+            mkdir_p(venvdir)
+            with open(os.path.join(venvdir, 'pyvenv.cfg'), 'w') as outfile:
+                outfile.write('version_info = 3.9.4.final.0\n')
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-opts.env'), 'w') as outfile:
+                outfile.write(f'XDG_RUNTIME_DIR={tempdir}\n')
+                outfile.write('BASE_PYTHON_PYCACHE=base\n')
+                outfile.write('BASE_PYTHON_PIP_CACHE=version\n')
             os.symlink(
                 '/usr/share/base/python-virtualenv.sh',
-                os.path.join(tempdir, '.base'),
+                os.path.join(basedir, '20-venv'),
             )
             self.sendline(f'cd {tempdir}')
             self.assertUserPrompt()
             self.sendline('base')
+            self.expect_exact(b'\r\nPython 3.9.4\r\n')
             self.assertBasePrompt(tempdir_name, b'')
-            self.sendline('echo "${PATH}"')
-            self.expect_exact(
-                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+            self.sendline('echo "${PYTHONPYCACHEPREFIX}"')
+            self.expect_exact('\r\n{}/base/pycache/{}\r\n'.format(
+                tempdir,
+                tempdir.replace('%', '%25').replace('/', '%2F'),
+            ).encode())
+            self.sendline('bash -c \'echo "${PIP_CACHE_DIR}"\'')
+            self.expect_exact('\r\n{}/pip/3.9\r\n'.format(
+                os.path.join(os.environ['HOME'], '.cache', 'base'),
+            ).encode())
 
-    def test_source_base_python_virtualenv_single(self):
-        with temp_project_python(versions=('3.8.9',)) as tempdir:
+    def test_source_base_python_virtualenv_caches(self):
+        with tempfile.TemporaryDirectory() as tempdir:
             tempdir_name = os.path.basename(tempdir).encode()
+            venvdir = os.path.join(tempdir, '.venv')
+            mkdir_p(venvdir)
+            with open(os.path.join(venvdir, 'pyvenv.cfg'), 'w') as outfile:
+                outfile.write('version_info = 3.9.4.final.0\n')
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-opts.env'), 'w') as outfile:
+                outfile.write(f'XDG_RUNTIME_DIR={tempdir}\n')
+                outfile.write('BASE_PYTHON_PYCACHE=base\n')
+                outfile.write('BASE_PYTHON_PIP_CACHE=version\n')
             os.symlink(
                 '/usr/share/base/python-virtualenv.sh',
-                os.path.join(tempdir, '.base'),
+                os.path.join(basedir, '20-venv'),
             )
             self.sendline(f'cd {tempdir}')
             self.assertUserPrompt()
             self.sendline('source base')
+            self.expect_exact(b'\r\nPython 3.9.4\r\n')
             self.assertBasePrompt(tempdir_name, b'')
-            self.sendline('echo "${PATH}"')
-            self.expect_exact(
-                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+            self.sendline('echo "${PYTHONPYCACHEPREFIX}"')
+            self.expect_exact('\r\n{}/base/pycache/{}\r\n'.format(
+                tempdir,
+                tempdir.replace('%', '%25').replace('/', '%2F'),
+            ).encode())
+            self.sendline('bash -c \'echo "${PIP_CACHE_DIR}"\'')
+            self.expect_exact('\r\n{}/pip/3.9\r\n'.format(
+                os.path.join(os.environ['HOME'], '.cache', 'base'),
+            ).encode())
 
-    def test_source_base_activate_python_virtualenv_single(self):
-        with temp_project_python(versions=('3.8.9',)) as tempdir:
+    def test_source_base_activate_python_virtualenv_caches(self):
+        with tempfile.TemporaryDirectory() as tempdir:
             tempdir_name = os.path.basename(tempdir).encode()
+            venvdir = os.path.join(tempdir, '.venv')
+            mkdir_p(venvdir)
+            with open(os.path.join(venvdir, 'pyvenv.cfg'), 'w') as outfile:
+                outfile.write('version_info = 3.9.4.final.0\n')
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-opts.env'), 'w') as outfile:
+                outfile.write(f'XDG_RUNTIME_DIR={tempdir}\n')
+                outfile.write('BASE_PYTHON_PYCACHE=base\n')
+                outfile.write('BASE_PYTHON_PIP_CACHE=version\n')
             os.symlink(
                 '/usr/share/base/python-virtualenv.sh',
-                os.path.join(tempdir, '.base'),
+                os.path.join(basedir, '20-venv'),
             )
             self.sendline(f'cd {tempdir}')
             self.assertUserPrompt()
             self.sendline('source base_activate')
+            self.expect_exact(b'\r\nPython 3.9.4\r\n')
             self.assertBasePrompt(tempdir_name, b'')
-            self.sendline('echo "${PATH}"')
-            self.expect_exact(
-                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+            self.sendline('echo "${PYTHONPYCACHEPREFIX}"')
+            self.expect_exact('\r\n{}/base/pycache/{}\r\n'.format(
+                tempdir,
+                tempdir.replace('%', '%25').replace('/', '%2F'),
+            ).encode())
+            self.sendline('bash -c \'echo "${PIP_CACHE_DIR}"\'')
+            self.expect_exact('\r\n{}/pip/3.9\r\n'.format(
+                os.path.join(os.environ['HOME'], '.cache', 'base'),
+            ).encode())
 
-    def test_base_python_virtualenv_multiple(self):
-        with temp_project_python() as tempdir:
+    def test_base_python_virtualenv_compile(self):
+        with tempfile.TemporaryDirectory() as tempdir:
             tempdir_name = os.path.basename(tempdir).encode()
+            venvdir = os.path.join(tempdir, '.venv')
+            mkdir_p(os.path.join(venvdir, 'bin'))
+            os.symlink(sys.executable, os.path.join(venvdir, 'bin', 'python'))
+            with open(os.path.join(venvdir, 'pyvenv.cfg'), 'w') as outfile:
+                outfile.write('home = {}\n'.format(
+                    os.path.dirname(sys.executable),
+                ))
+                outfile.write('version = 3.9.4\n')
+            mkdir_p(os.path.join(tempdir, 'pkg'))
+            with open(os.path.join(tempdir, 'pkg', 'mod.py'), 'w') as outfile:
+                outfile.write('VALUE = 1\n')
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-opts.env'), 'w') as outfile:
+                outfile.write('BASE_PYTHON_COMPILE=1\n')
             os.symlink(
                 '/usr/share/base/python-virtualenv.sh',
-                os.path.join(tempdir, '.base'),
+                os.path.join(basedir, '20-venv'),
             )
             self.sendline(f'cd {tempdir}')
             self.assertUserPrompt()
             self.sendline('base')
-            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
-            self.sendline('2')
+            self.expect_exact(b'\r\nPython 3.9.4\r\n')
             self.assertBasePrompt(tempdir_name, b'')
-            self.sendline('echo "${PATH}"')
-            self.expect_exact(
-                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+            self.sendline(
+                'for _ in {1..50} ; do [ -d pkg/__pycache__ ] && break ; '
+                'sleep 0.2 ; done ; ls pkg/__pycache__'
+            )
+            self.expect_exact(b'\r\nmod.cpython-')
 
-    def test_source_base_python_virtualenv_multiple(self):
-        with temp_project_python() as tempdir:
+    def test_source_base_python_virtualenv_compile(self):
+        with tempfile.TemporaryDirectory() as tempdir:
             tempdir_name = os.path.basename(tempdir).encode()
+            venvdir = os.path.join(tempdir, '.venv')
+            mkdir_p(os.path.join(venvdir, 'bin'))
+            os.symlink(sys.executable, os.path.join(venvdir, 'bin', 'python'))
+            with open(os.path.join(venvdir, 'pyvenv.cfg'), 'w') as outfile:
+                outfile.write('home = {}\n'.format(
+                    os.path.dirname(sys.executable),
+                ))
+                outfile.write('version = 3.9.4\n')
+            mkdir_p(os.path.join(tempdir, 'pkg'))
+            with open(os.path.join(tempdir, 'pkg', 'mod.py'), 'w') as outfile:
+                outfile.write('VALUE = 1\n')
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-opts.env'), 'w') as outfile:
+                outfile.write('BASE_PYTHON_COMPILE=1\n')
             os.symlink(
                 '/usr/share/base/python-virtualenv.sh',
-                os.path.join(tempdir, '.base'),
+                os.path.join(basedir, '20-venv'),
             )
             self.sendline(f'cd {tempdir}')
             self.assertUserPrompt()
             self.sendline('source base')
-            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
-            self.sendline('2')
+            self.expect_exact(b'\r\nPython 3.9.4\r\n')
             self.assertBasePrompt(tempdir_name, b'')
-            self.sendline('echo "${PATH}"')
-            self.expect_exact(
-                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
+            self.sendline(
+                'for _ in {1..50} ; do [ -d pkg/__pycache__ ] && break ; '
+                'sleep 0.2 ; done ; ls pkg/__pycache__'
+            )
+            self.expect_exact(b'\r\nmod.cpython-')
 
-    def test_source_base_activate_python_virtualenv_multiple(self):
-        with temp_project_python() as tempdir:
+    def test_source_base_activate_python_virtualenv_compile(self):
+        with tempfile.TemporaryDirectory() as tempdir:
             tempdir_name = os.path.basename(tempdir).encode()
+            venvdir = os.path.join(tempdir, '.venv')
+            mkdir_p(os.path.join(venvdir, 'bin'))
+            os.symlink(sys.executable, os.path.join(venvdir, 'bin', 'python'))
+            with open(os.path.join(venvdir, 'pyvenv.cfg'), 'w') as outfile:
+                outfile.write('home = {}\n'.format(
+                    os.path.dirname(sys.executable),
+                ))
+                outfile.write('version = 3.9.4\n')
+            mkdir_p(os.path.join(tempdir, 'pkg'))
+            with open(os.path.join(tempdir, 'pkg', 'mod.py'), 'w') as outfile:
+                outfile.write('VALUE = 1\n')
+            otherdir = os.path.join(tempdir, 'other', 'lib')
+            mkdir_p(otherdir)
+            with open(os.path.join(tempdir, 'other', 'pyvenv.cfg'), 'w'):
+                pass
+            with open(os.path.join(otherdir, 'other.py'), 'w') as outfile:
+                outfile.write('VALUE = 1\n')
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-opts.env'), 'w') as outfile:
+                outfile.write('BASE_PYTHON_COMPILE=1\n')
             os.symlink(
                 '/usr/share/base/python-virtualenv.sh',
-                os.path.join(tempdir, '.base'),
+                os.path.join(basedir, '20-venv'),
             )
             self.sendline(f'cd {tempdir}')
             self.assertUserPrompt()
             self.sendline('source base_activate')
-            self.expect_exact(b'\r\nSelect Python virtual environment [1]:')
-            self.sendline('2')
+            self.expect_exact(b'\r\nPython 3.9.4\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                'for _ in {1..50} ; do [ -d pkg/__pycache__ ] && break ; '
+                'sleep 0.2 ; done ; ls pkg/__pycache__'
+            )
+            self.expect_exact(b'\r\nmod.cpython-')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                '_base_cache_file pycompile "${PWD}/.venv" ; '
+                'for _ in {1..50} ; do [ -f "${BASE_CACHE_PATH}" ] && break ; '
+                'sleep 0.2 ; done ; grep -c /other/ "${BASE_CACHE_PATH}"'
+            )
+            self.expect_exact(b'\r\n0\r\n')
+            self.assertFalse(
+                os.path.exists(os.path.join(otherdir, '__pycache__')))
+
+    def test_source_base_activate_python_virtualenv_compile_unchanged(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tempdir_name = os.path.basename(tempdir).encode()
+            venvdir = os.path.join(tempdir, '.venv')
+            mkdir_p(os.path.join(venvdir, 'bin'))
+            os.symlink(sys.executable, os.path.join(venvdir, 'bin', 'python'))
+            with open(os.path.join(venvdir, 'pyvenv.cfg'), 'w') as outfile:
+                outfile.write('home = {}\n'.format(
+                    os.path.dirname(sys.executable),
+                ))
+                outfile.write('version = 3.9.4\n')
+            mkdir_p(os.path.join(tempdir, 'pkg'))
+            with open(os.path.join(tempdir, 'pkg', 'mod.py'), 'w') as outfile:
+                outfile.write('VALUE = 1\n')
+            basedir = os.path.join(tempdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-opts.env'), 'w') as outfile:
+                outfile.write('BASE_PYTHON_COMPILE=1\n')
+                outfile.write('BASE_PYTHON_COMPILE_INTERVAL=0\n')
+            os.symlink(
+                '/usr/share/base/python-virtualenv.sh',
+                os.path.join(basedir, '20-venv'),
+            )
+            self.sendline(f'cd {tempdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nPython 3.9.4\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                '_base_cache_file pycompile "${PWD}/.venv" ; '
+                'for _ in {1..50} ; do '
+                '[ -f "${BASE_CACHE_PATH}.check" ] && break ; '
+                'sleep 0.2 ; done ; rm "${BASE_CACHE_PATH}" ; '
+                'echo "cache: ${BASE_CACHE_PATH}"'
+            )
+            self.expect(rb'\r\ncache: (\S+)\r\n')
+            manifest = self.shell.match.group(1).decode()
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nPython 3.9.4\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            time.sleep(1)
+            self.assertFalse(os.path.exists(manifest))
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('touch pkg/mod.py')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nPython 3.9.4\r\n')
+            self.assertBasePrompt(tempdir_name, b'')
+            self.sendline(
+                '_base_cache_file pycompile "${PWD}/.venv" ; '
+                'for _ in {1..50} ; do [ -f "${BASE_CACHE_PATH}" ] && break ; '
+                'sleep 0.2 ; done ; grep -c /pkg/mod.py "${BASE_CACHE_PATH}"'
+            )
+            self.expect_exact(b'\r\n1\r\n')
             self.assertBasePrompt(tempdir_name, b'')
-            self.sendline('echo "${PATH}"')
-            self.expect_exact(
-                b'\r\n' + tempdir.encode() + b'/virtualenv-3.8.9/bin:')
 
     def test_base_python_virtualenv_none(self):
         with tempfile.TemporaryDirectory() as tempdir:
@@ -2109,121 +4213,433 @@ class TestBase(unittest.TestCase):
                 os.path.join(godir, 'bin'),
             ).encode())
 
-    def test_source_base_go_ulo_none(self):
-        with temp_project_go(versions=()) as projdir:
-            godir = os.path.dirname(os.path.dirname(projdir))
+    def test_source_base_go_ulo_none(self):
+        with temp_project_go(versions=()) as projdir:
+            godir = os.path.dirname(os.path.dirname(projdir))
+            projdir_name = os.path.basename(projdir).encode()
+            os.symlink(
+                '/usr/share/base/go-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.expect_exact(b'\r\nwarning: unable to set GOROOT')
+            self.expect_exact(b'\r\nwarning: go command not found\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.assertNotFound('GOROOT')
+            self.sendline('echo "${GOPATH}"')
+            self.expect_exact(f'\r\n{godir}\r\n'.encode())
+            self.sendline('echo "${PATH}"')
+            self.expect_exact('\r\n{}:'.format(
+                os.path.join(godir, 'bin'),
+            ).encode())
+
+    def test_source_base_activate_go_ulo_none(self):
+        with temp_project_go(versions=()) as projdir:
+            godir = os.path.dirname(os.path.dirname(projdir))
+            projdir_name = os.path.basename(projdir).encode()
+            os.symlink(
+                '/usr/share/base/go-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nwarning: unable to set GOROOT')
+            self.expect_exact(b'\r\nwarning: go command not found\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.assertNotFound('GOROOT')
+            self.sendline('echo "${GOPATH}"')
+            self.expect_exact(f'\r\n{godir}\r\n'.encode())
+            self.sendline('echo "${PATH}"')
+            self.expect_exact('\r\n{}:'.format(
+                os.path.join(godir, 'bin'),
+            ).encode())
+
+    def test_base_go_ulo_no_ulo(self):
+        with temp_project_go(versions=()) as projdir:
+            sudo_rm_rf('/usr/local/opt')
+            godir = os.path.dirname(os.path.dirname(projdir))
+            projdir_name = os.path.basename(projdir).encode()
+            os.symlink(
+                '/usr/share/base/go-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.expect_exact(b'\r\nwarning: /usr/local/opt not found')
+            self.expect_exact(b'\r\nwarning: unable to set GOROOT')
+            self.expect_exact(b'\r\nwarning: go command not found\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.assertNotFound('GOROOT')
+            self.sendline('echo "${GOPATH}"')
+            self.expect_exact(f'\r\n{godir}\r\n'.encode())
+            self.sendline('echo "${PATH}"')
+            self.expect_exact('\r\n{}:'.format(
+                os.path.join(godir, 'bin'),
+            ).encode())
+
+    def test_source_base_go_ulo_no_ulo(self):
+        with temp_project_go(versions=()) as projdir:
+            sudo_rm_rf('/usr/local/opt')
+            godir = os.path.dirname(os.path.dirname(projdir))
+            projdir_name = os.path.basename(projdir).encode()
+            os.symlink(
+                '/usr/share/base/go-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.expect_exact(b'\r\nwarning: /usr/local/opt not found')
+            self.expect_exact(b'\r\nwarning: unable to set GOROOT')
+            self.expect_exact(b'\r\nwarning: go command not found\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.assertNotFound('GOROOT')
+            self.sendline('echo "${GOPATH}"')
+            self.expect_exact(f'\r\n{godir}\r\n'.encode())
+            self.sendline('echo "${PATH}"')
+            self.expect_exact('\r\n{}:'.format(
+                os.path.join(godir, 'bin'),
+            ).encode())
+
+    def test_source_base_activate_go_ulo_no_ulo(self):
+        with temp_project_go(versions=()) as projdir:
+            sudo_rm_rf('/usr/local/opt')
+            godir = os.path.dirname(os.path.dirname(projdir))
+            projdir_name = os.path.basename(projdir).encode()
+            os.symlink(
+                '/usr/share/base/go-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nwarning: /usr/local/opt not found')
+            self.expect_exact(b'\r\nwarning: unable to set GOROOT')
+            self.expect_exact(b'\r\nwarning: go command not found\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.assertNotFound('GOROOT')
+            self.sendline('echo "${GOPATH}"')
+            self.expect_exact(f'\r\n{godir}\r\n'.encode())
+            self.sendline('echo "${PATH}"')
+            self.expect_exact('\r\n{}:'.format(
+                os.path.join(godir, 'bin'),
+            ).encode())
+
+    def test_base_go_ulo_module(self):
+        with temp_project_go(versions=('1.15.11',)):
+            with tempfile.TemporaryDirectory() as tempdir:
+                projdir = os.path.join(tempdir, 'work', 'project')
+                projdir_name = os.path.basename(projdir).encode()
+                mkdir_p(projdir)
+                gowork = os.path.join(tempdir, 'work', 'go.work')
+                with open(gowork, 'w') as outfile:
+                    outfile.write('go 1.18\n')
+                with open(os.path.join(projdir, 'go.mod'), 'w') as outfile:
+                    outfile.write('module example.com/project\n')
+                os.symlink(
+                    '/usr/share/base/go-ulo.sh',
+                    os.path.join(projdir, '.base'),
+                )
+                self.sendline(f'cd {projdir}')
+                self.assertUserPrompt()
+                self.sendline('base')
+                self.expect_exact(b'\r\nwarning: go command not found\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                self.assertNotFound('GOPATH')
+                self.sendline('echo "${GOWORK}"')
+                self.expect_exact(f'\r\n{gowork}\r\n'.encode())
+
+    def test_source_base_go_ulo_module(self):
+        with temp_project_go(versions=('1.15.11',)):
+            with tempfile.TemporaryDirectory() as tempdir:
+                projdir = os.path.join(tempdir, 'work', 'project')
+                projdir_name = os.path.basename(projdir).encode()
+                mkdir_p(projdir)
+                gowork = os.path.join(tempdir, 'work', 'go.work')
+                with open(gowork, 'w') as outfile:
+                    outfile.write('go 1.18\n')
+                with open(os.path.join(projdir, 'go.mod'), 'w') as outfile:
+                    outfile.write('module example.com/project\n')
+                os.symlink(
+                    '/usr/share/base/go-ulo.sh',
+                    os.path.join(projdir, '.base'),
+                )
+                self.sendline(f'cd {projdir}')
+                self.assertUserPrompt()
+                self.sendline('source base')
+                self.expect_exact(b'\r\nwarning: go command not found\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                self.assertNotFound('GOPATH')
+                self.sendline('echo "${GOWORK}"')
+                self.expect_exact(f'\r\n{gowork}\r\n'.encode())
+
+    def test_source_base_activate_go_ulo_module(self):
+        with temp_project_go(versions=('1.15.11',)):
+            with tempfile.TemporaryDirectory() as tempdir:
+                projdir = os.path.join(tempdir, 'work', 'project')
+                projdir_name = os.path.basename(projdir).encode()
+                mkdir_p(projdir)
+                gowork = os.path.join(tempdir, 'work', 'go.work')
+                with open(gowork, 'w') as outfile:
+                    outfile.write('go 1.18\n')
+                with open(os.path.join(projdir, 'go.mod'), 'w') as outfile:
+                    outfile.write('module example.com/project\n')
+                os.symlink(
+                    '/usr/share/base/go-ulo.sh',
+                    os.path.join(projdir, '.base'),
+                )
+                self.sendline(f'cd {projdir}')
+                self.assertUserPrompt()
+                self.sendline('source base_activate')
+                self.expect_exact(b'\r\nwarning: go command not found\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                self.assertNotFound('GOPATH')
+                self.sendline('echo "${GOWORK}"')
+                self.expect_exact(f'\r\n{gowork}\r\n'.encode())
+                self.sendline('base_deactivate')
+                self.assertNotFound('GOWORK')
+                os.remove(gowork)
+                self.sendline('source base_activate')
+                self.expect_exact(b'\r\nwarning: go command not found\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                self.sendline('echo "${GOWORK-unset}"')
+                self.expect_exact(b'\r\nunset\r\n')
+                self.sendline('base_deactivate')
+                with open(gowork, 'w') as outfile:
+                    outfile.write('go 1.18\n')
+                self.sendline('source base_activate')
+                self.expect_exact(b'\r\nwarning: go command not found\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                self.sendline('echo "${GOWORK}"')
+                self.expect_exact(f'\r\n{gowork}\r\n'.encode())
+
+    def test_base_go_ulo_version_file(self):
+        with temp_project_go(versions=('1.15.11',)) as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            with tempfile.TemporaryDirectory() as goroot:
+                write_fake_go(goroot, version='go1.15.11')
+                os.symlink(goroot, os.path.join(projdir, '.go'))
+                os.symlink(
+                    '/usr/share/base/go-ulo.sh',
+                    os.path.join(projdir, '.base'),
+                )
+                self.sendline(f'cd {projdir}')
+                self.assertUserPrompt()
+                self.sendline('base')
+                self.expect_exact(b'\r\ngo version go1.15.11\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                self.assertFalse(
+                    os.path.exists(os.path.join(goroot, 'runs')))
+
+    def test_source_base_go_ulo_version_file(self):
+        with temp_project_go(versions=('1.15.11',)) as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            with tempfile.TemporaryDirectory() as goroot:
+                write_fake_go(goroot, version='go1.15.11')
+                os.symlink(goroot, os.path.join(projdir, '.go'))
+                os.symlink(
+                    '/usr/share/base/go-ulo.sh',
+                    os.path.join(projdir, '.base'),
+                )
+                self.sendline(f'cd {projdir}')
+                self.assertUserPrompt()
+                self.sendline('source base')
+                self.expect_exact(b'\r\ngo version go1.15.11\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                self.assertFalse(
+                    os.path.exists(os.path.join(goroot, 'runs')))
+
+    def test_source_base_activate_go_ulo_version_file(self):
+        with temp_project_go(versions=('1.15.11',)) as projdir:
             projdir_name = os.path.basename(projdir).encode()
-            os.symlink(
-                '/usr/share/base/go-ulo.sh',
-                os.path.join(projdir, '.base'),
-            )
-            self.sendline(f'cd {projdir}')
-            self.assertUserPrompt()
-            self.sendline('source base')
-            self.expect_exact(b'\r\nwarning: unable to set GOROOT')
-            self.expect_exact(b'\r\nwarning: go command not found\r\n')
-            self.assertBasePrompt(projdir_name, b'')
-            self.assertNotFound('GOROOT')
-            self.sendline('echo "${GOPATH}"')
-            self.expect_exact(f'\r\n{godir}\r\n'.encode())
-            self.sendline('echo "${PATH}"')
-            self.expect_exact('\r\n{}:'.format(
-                os.path.join(godir, 'bin'),
-            ).encode())
+            with tempfile.TemporaryDirectory() as goroot:
+                write_fake_go(goroot, version='go1.15.11')
+                os.symlink(goroot, os.path.join(projdir, '.go'))
+                os.symlink(
+                    '/usr/share/base/go-ulo.sh',
+                    os.path.join(projdir, '.base'),
+                )
+                self.sendline(f'cd {projdir}')
+                self.assertUserPrompt()
+                self.sendline('source base_activate')
+                self.expect_exact(b'\r\ngo version go1.15.11\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                self.assertFalse(
+                    os.path.exists(os.path.join(goroot, 'runs')))
 
-    def test_source_base_activate_go_ulo_none(self):
-        with temp_project_go(versions=()) as projdir:
-            godir = os.path.dirname(os.path.dirname(projdir))
+    def test_source_base_activate_go_ulo_version_cache(self):
+        with temp_project_go(versions=('1.15.11',)) as projdir:
             projdir_name = os.path.basename(projdir).encode()
-            os.symlink(
-                '/usr/share/base/go-ulo.sh',
-                os.path.join(projdir, '.base'),
-            )
-            self.sendline(f'cd {projdir}')
-            self.assertUserPrompt()
-            self.sendline('source base_activate')
-            self.expect_exact(b'\r\nwarning: unable to set GOROOT')
-            self.expect_exact(b'\r\nwarning: go command not found\r\n')
-            self.assertBasePrompt(projdir_name, b'')
-            self.assertNotFound('GOROOT')
-            self.sendline('echo "${GOPATH}"')
-            self.expect_exact(f'\r\n{godir}\r\n'.encode())
-            self.sendline('echo "${PATH}"')
-            self.expect_exact('\r\n{}:'.format(
-                os.path.join(godir, 'bin'),
-            ).encode())
+            with tempfile.TemporaryDirectory() as goroot:
+                write_fake_go(goroot)
+                os.symlink(goroot, os.path.join(projdir, '.go'))
+                os.symlink(
+                    '/usr/share/base/go-ulo.sh',
+                    os.path.join(projdir, '.base'),
+                )
+                self.sendline(f'cd {projdir}')
+                self.assertUserPrompt()
+                self.sendline('source base_activate')
+                self.assertBasePrompt(projdir_name, b'')
+                self.sendline(
+                    'while [ ! -e "${BASE_SESSION_DIR}/bg-0.done" ] ;'
+                    ' do sleep 0.1 ; done')
+                self.expect_exact(b'\r\ngo version go1.0.0\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                self.sendline('base_deactivate')
+                self.assertUserPrompt()
+                self.sendline('source base_activate')
+                self.expect_exact(b'\r\ngo version go1.0.0\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                with open(os.path.join(goroot, 'runs')) as infile:
+                    self.assertEqual(1, len(infile.readlines()))
 
-    def test_base_go_ulo_no_ulo(self):
-        with temp_project_go(versions=()) as projdir:
-            sudo_rm_rf('/usr/local/opt')
-            godir = os.path.dirname(os.path.dirname(projdir))
+    def test_base_go_ulo_caches(self):
+        with temp_project_go(versions=('1.15.11',)) as projdir:
             projdir_name = os.path.basename(projdir).encode()
+            basedir = os.path.join(projdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-opts.env'), 'w') as outfile:
+                outfile.write('BASE_GO_CACHE=base\n')
+                outfile.write('BASE_GO_MODCACHE=toolchain\n')
+                outfile.write('BASE_GO_FLAGS=-mod=mod\n')
             os.symlink(
                 '/usr/share/base/go-ulo.sh',
-                os.path.join(projdir, '.base'),
+                os.path.join(basedir, '20-go'),
             )
             self.sendline(f'cd {projdir}')
             self.assertUserPrompt()
             self.sendline('base')
-            self.expect_exact(b'\r\nwarning: /usr/local/opt not found')
-            self.expect_exact(b'\r\nwarning: unable to set GOROOT')
             self.expect_exact(b'\r\nwarning: go command not found\r\n')
             self.assertBasePrompt(projdir_name, b'')
-            self.assertNotFound('GOROOT')
-            self.sendline('echo "${GOPATH}"')
-            self.expect_exact(f'\r\n{godir}\r\n'.encode())
-            self.sendline('echo "${PATH}"')
-            self.expect_exact('\r\n{}:'.format(
-                os.path.join(godir, 'bin'),
+            self.sendline('echo "${GOCACHE}"')
+            self.expect_exact('\r\n{}/go/{}/build\r\n'.format(
+                os.path.join(os.environ['HOME'], '.cache', 'base'),
+                projdir.replace('%', '%25').replace('/', '%2F'),
             ).encode())
+            self.sendline('echo "${GOMODCACHE}"')
+            self.expect_exact('\r\n{}/go-toolchain/go-1.15.11/mod\r\n'.format(
+                os.path.join(os.environ['HOME'], '.cache', 'base'),
+            ).encode())
+            self.sendline('bash -c \'echo "${GOFLAGS}"\'')
+            self.expect_exact(b'\r\n-mod=mod\r\n')
 
-    def test_source_base_go_ulo_no_ulo(self):
-        with temp_project_go(versions=()) as projdir:
-            sudo_rm_rf('/usr/local/opt')
-            godir = os.path.dirname(os.path.dirname(projdir))
+    def test_source_base_go_ulo_caches(self):
+        with temp_project_go(versions=('1.15.11',)) as projdir:
             projdir_name = os.path.basename(projdir).encode()
+            basedir = os.path.join(projdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-opts.env'), 'w') as outfile:
+                outfile.write('BASE_GO_CACHE=base\n')
+                outfile.write('BASE_GO_MODCACHE=toolchain\n')
+                outfile.write('BASE_GO_FLAGS=-mod=mod\n')
             os.symlink(
                 '/usr/share/base/go-ulo.sh',
-                os.path.join(projdir, '.base'),
+                os.path.join(basedir, '20-go'),
             )
             self.sendline(f'cd {projdir}')
             self.assertUserPrompt()
             self.sendline('source base')
-            self.expect_exact(b'\r\nwarning: /usr/local/opt not found')
-            self.expect_exact(b'\r\nwarning: unable to set GOROOT')
             self.expect_exact(b'\r\nwarning: go command not found\r\n')
             self.assertBasePrompt(projdir_name, b'')
-            self.assertNotFound('GOROOT')
-            self.sendline('echo "${GOPATH}"')
-            self.expect_exact(f'\r\n{godir}\r\n'.encode())
-            self.sendline('echo "${PATH}"')
-            self.expect_exact('\r\n{}:'.format(
-                os.path.join(godir, 'bin'),
+            self.sendline('echo "${GOCACHE}"')
+            self.expect_exact('\r\n{}/go/{}/build\r\n'.format(
+                os.path.join(os.environ['HOME'], '.cache', 'base'),
+                projdir.replace('%', '%25').replace('/', '%2F'),
             ).encode())
+            self.sendline('echo "${GOMODCACHE}"')
+            self.expect_exact('\r\n{}/go-toolchain/go-1.15.11/mod\r\n'.format(
+                os.path.join(os.environ['HOME'], '.cache', 'base'),
+            ).encode())
+            self.sendline('bash -c \'echo "${GOFLAGS}"\'')
+            self.expect_exact(b'\r\n-mod=mod\r\n')
 
-    def test_source_base_activate_go_ulo_no_ulo(self):
-        with temp_project_go(versions=()) as projdir:
-            sudo_rm_rf('/usr/local/opt')
-            godir = os.path.dirname(os.path.dirname(projdir))
+    def test_source_base_activate_go_ulo_caches(self):
+        with temp_project_go(versions=('1.15.11',)) as projdir:
             projdir_name = os.path.basename(projdir).encode()
+            basedir = os.path.join(projdir, '.base')
+            mkdir_p(basedir)
+            with open(os.path.join(basedir, '10-opts.env'), 'w') as outfile:
+                outfile.write('BASE_GO_CACHE=base\n')
+                outfile.write('BASE_GO_MODCACHE=toolchain\n')
+                outfile.write('BASE_GO_FLAGS=-mod=mod\n')
             os.symlink(
                 '/usr/share/base/go-ulo.sh',
-                os.path.join(projdir, '.base'),
+                os.path.join(basedir, '20-go'),
             )
             self.sendline(f'cd {projdir}')
             self.assertUserPrompt()
             self.sendline('source base_activate')
-            self.expect_exact(b'\r\nwarning: /usr/local/opt not found')
-            self.expect_exact(b'\r\nwarning: unable to set GOROOT')
             self.expect_exact(b'\r\nwarning: go command not found\r\n')
             self.assertBasePrompt(projdir_name, b'')
-            self.assertNotFound('GOROOT')
-            self.sendline('echo "${GOPATH}"')
-            self.expect_exact(f'\r\n{godir}\r\n'.encode())
-            self.sendline('echo "${PATH}"')
-            self.expect_exact('\r\n{}:'.format(
-                os.path.join(godir, 'bin'),
+            self.sendline('echo "${GOCACHE}"')
+            self.expect_exact('\r\n{}/go/{}/build\r\n'.format(
+                os.path.join(os.environ['HOME'], '.cache', 'base'),
+                projdir.replace('%', '%25').replace('/', '%2F'),
             ).encode())
+            self.sendline('echo "${GOMODCACHE}"')
+            self.expect_exact('\r\n{}/go-toolchain/go-1.15.11/mod\r\n'.format(
+                os.path.join(os.environ['HOME'], '.cache', 'base'),
+            ).encode())
+            self.sendline('bash -c \'echo "${GOFLAGS}"\'')
+            self.expect_exact(b'\r\n-mod=mod\r\n')
+
+    def test_source_base_activate_go_ulo_cache_prune(self):
+        with temp_project_go(versions=('1.15.11',)) as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            basedir = os.path.join(projdir, '.base')
+            mkdir_p(basedir)
+            with tempfile.TemporaryDirectory() as cachedir:
+                with open(os.path.join(basedir, '10-opts'), 'w') as outfile:
+                    outfile.write(f'BASE_CACHE_DIR={cachedir}\n')
+                    outfile.write('BASE_GO_CACHE=base\n')
+                    outfile.write('BASE_GO_CACHE_MAX=1\n')
+                os.symlink(
+                    '/usr/share/base/go-ulo.sh',
+                    os.path.join(basedir, '20-go'),
+                )
+                builddir = os.path.join(
+                    cachedir,
+                    'go',
+                    projdir.replace('%', '%25').replace('/', '%2F'),
+                    'build',
+                )
+                mkdir_p(os.path.join(builddir, 'aa'))
+                for idx in range(3):
+                    path = os.path.join(builddir, 'aa', f'{idx}-d')
+                    with open(path, 'wb') as outfile:
+                        outfile.write(b'x' * 600000)
+                    os.utime(path, (2000000000 - idx, 1000000000 + idx))
+                self.sendline(f'cd {projdir}')
+                self.assertUserPrompt()
+                self.sendline('source base_activate')
+                self.expect_exact(b'\r\nwarning: go command not found\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                self.sendline('base_deactivate')
+                self.assertUserPrompt()
+                time.sleep(1)
+                self.assertEqual(
+                    ['2-d'], sorted(os.listdir(os.path.join(builddir, 'aa'))))
+                self.assertTrue(
+                    os.path.isfile(os.path.join(builddir, 'base-prune.txt')))
+                path = os.path.join(builddir, 'aa', '3-d')
+                with open(path, 'wb') as outfile:
+                    outfile.write(b'x' * 600000)
+                os.utime(path, (1000000003, 1000000003))
+                self.sendline('source base_activate')
+                self.expect_exact(b'\r\nwarning: go command not found\r\n')
+                self.assertBasePrompt(projdir_name, b'')
+                self.sendline('base_deactivate')
+                self.assertUserPrompt()
+                time.sleep(1)
+                self.assertEqual(
+                    ['2-d', '3-d'],
+                    sorted(os.listdir(os.path.join(builddir, 'aa'))),
+                )
 
     def test_base_go_ulo_no_go_workspace(self):
         with temp_project_go(versions=('1.15.11',)):
@@ -2340,6 +4756,244 @@ class TestBase(unittest.TestCase):
                 '/usr/local/opt/go-1.15.11/bin',
             ).encode())
 
+    def test_base_node_ulo_link(self):
+        with temp_project_node(link='16.20.2') as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            os.symlink(
+                '/usr/share/base/node-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.expect_exact(b'\r\nNode.js v16.20.2\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.sendline('echo "${NODE_HOME}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v16.20.2-linux-x64\r\n',
+            )
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v16.20.2-linux-x64/bin:',
+            )
+
+    def test_base_node_ulo_nvmrc(self):
+        with temp_project_node() as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            nvmrc = os.path.join(os.path.dirname(projdir), '.nvmrc')
+            with open(nvmrc, 'w') as outfile:
+                outfile.write('v18\n')
+            os.symlink(
+                '/usr/share/base/node-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.expect_exact(b'\r\nNode.js v18.19.0\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.sendline('echo "${NODE_HOME}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v18.19.0-linux-x64\r\n',
+            )
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v18.19.0-linux-x64/bin:',
+            )
+            self.sendline('node --version')
+            self.expect_exact(b'\r\nv18.19.0\r\n')
+
+    def test_base_node_ulo_multiple(self):
+        with temp_project_node() as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            os.symlink(
+                '/usr/share/base/node-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('base')
+            self.expect_exact(b'\r\nSelect Node.js installation [1]:')
+            self.sendline('2')
+            self.expect_exact(b'\r\nNode.js v18.17.1\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.sendline('echo "${NODE_HOME}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v18.17.1-linux-x64\r\n',
+            )
+
+    def test_source_base_node_ulo_link(self):
+        with temp_project_node(link='16.20.2') as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            os.symlink(
+                '/usr/share/base/node-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.expect_exact(b'\r\nNode.js v16.20.2\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.sendline('echo "${NODE_HOME}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v16.20.2-linux-x64\r\n',
+            )
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v16.20.2-linux-x64/bin:',
+            )
+
+    def test_source_base_node_ulo_nvmrc(self):
+        with temp_project_node() as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            nvmrc = os.path.join(os.path.dirname(projdir), '.nvmrc')
+            with open(nvmrc, 'w') as outfile:
+                outfile.write('v18\n')
+            os.symlink(
+                '/usr/share/base/node-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.expect_exact(b'\r\nNode.js v18.19.0\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.sendline('echo "${NODE_HOME}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v18.19.0-linux-x64\r\n',
+            )
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v18.19.0-linux-x64/bin:',
+            )
+            self.sendline('node --version')
+            self.expect_exact(b'\r\nv18.19.0\r\n')
+
+    def test_source_base_node_ulo_multiple(self):
+        with temp_project_node() as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            os.symlink(
+                '/usr/share/base/node-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base')
+            self.expect_exact(b'\r\nSelect Node.js installation [1]:')
+            self.sendline('2')
+            self.expect_exact(b'\r\nNode.js v18.17.1\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.sendline('echo "${NODE_HOME}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v18.17.1-linux-x64\r\n',
+            )
+
+    def test_source_base_activate_node_ulo_link(self):
+        with temp_project_node(link='16.20.2') as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            os.symlink(
+                '/usr/share/base/node-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nNode.js v16.20.2\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.sendline('echo "${NODE_HOME}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v16.20.2-linux-x64\r\n',
+            )
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v16.20.2-linux-x64/bin:',
+            )
+
+    def test_source_base_activate_node_ulo_nvmrc(self):
+        with temp_project_node() as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            nvmrc = os.path.join(os.path.dirname(projdir), '.nvmrc')
+            with open(nvmrc, 'w') as outfile:
+                outfile.write('v18\n')
+            os.symlink(
+                '/usr/share/base/node-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nNode.js v18.19.0\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.sendline('echo "${NODE_HOME}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v18.19.0-linux-x64\r\n',
+            )
+            self.sendline('echo "${PATH}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v18.19.0-linux-x64/bin:',
+            )
+            self.sendline('node --version')
+            self.expect_exact(b'\r\nv18.19.0\r\n')
+
+    def test_source_base_activate_node_ulo_cache_parent(self):
+        with temp_project_node() as projdir:
+            nvmrc = os.path.join(os.path.dirname(projdir), '.nvmrc')
+            with open(nvmrc, 'w') as outfile:
+                outfile.write('v18\n')
+            subdir = os.path.join(projdir, 'sub')
+            mkdir_p(subdir)
+            os.symlink(
+                '/usr/share/base/node-ulo.sh',
+                os.path.join(subdir, '.base'),
+            )
+            mtime = time.time() - 10
+            for path in (nvmrc, subdir, projdir, os.path.dirname(projdir)):
+                os.utime(path, (mtime, mtime))
+            self.sendline(f'cd {subdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nNode.js v18.19.0\r\n')
+            self.assertBasePrompt(b'sub', b'')
+            self.sendline(
+                '_base_cache_file node-ulo "${PWD}" ; '
+                'head -n 1 "${BASE_CACHE_PATH}"'
+            )
+            self.expect_exact(f'\r\n{nvmrc}\r\n'.encode())
+            self.assertBasePrompt(b'sub', b'')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nNode.js v18.19.0\r\n')
+            self.assertBasePrompt(b'sub', b'')
+            self.sendline('base_deactivate')
+            self.assertUserPrompt()
+            with open(os.path.join(projdir, '.node-version'), 'w') as outfile:
+                outfile.write('16\n')
+            mtime = time.time() + 2
+            os.utime(projdir, (mtime, mtime))
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nNode.js v16.20.2\r\n')
+            self.assertBasePrompt(b'sub', b'')
+
+    def test_source_base_activate_node_ulo_multiple(self):
+        with temp_project_node() as projdir:
+            projdir_name = os.path.basename(projdir).encode()
+            os.symlink(
+                '/usr/share/base/node-ulo.sh',
+                os.path.join(projdir, '.base'),
+            )
+            self.sendline(f'cd {projdir}')
+            self.assertUserPrompt()
+            self.sendline('source base_activate')
+            self.expect_exact(b'\r\nSelect Node.js installation [1]:')
+            self.sendline('2')
+            self.expect_exact(b'\r\nNode.js v18.17.1\r\n')
+            self.assertBasePrompt(projdir_name, b'')
+            self.sendline('echo "${NODE_HOME}"')
+            self.expect_exact(
+                b'\r\n/usr/local/opt/node-v18.17.1-linux-x64\r\n',
+            )
+
 
 ##############################################################################
 # main